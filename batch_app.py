@@ -0,0 +1,194 @@
+"""Batch analysis of GitHub repositories and users
+
+Reads one target per line from a file or stdin:
+    owner/repo or https://github.com/owner/repo   -> repository analysis
+    username, @username or https://github.com/user -> user profile analysis
+Blank lines and lines starting with # are ignored.
+
+Targets are fetched and graded concurrently and each result is written as one
+JSON line as soon as it is ready. Successful targets are recorded in a
+checkpoint file, so rerunning the same command after a crash (or after the
+GitHub request budget ran out) only processes the remaining targets.
+
+Usage:
+    python batch_app.py targets.txt --output results.jsonl
+    cat targets.txt | python batch_app.py - --concurrency 8 --max-github-requests 2000
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from src.config.settings import settings
+from src.utils.github_client import BACKGROUND, INTERACTIVE, github_priority
+from src.utils.metrics import github_request_count
+
+_TARGET = re.compile(
+    r"^(?:https?://)?(?:www\.)?(?:github\.com/)?@?(?P<owner>[\w-]+)(?:/(?P<repo>[\w.-]+?))?(?:\.git)?/?$"
+)
+
+
+def parse_target(line: str) -> dict | None:
+    """Parse an input line into {"kind", "owner", "repo", "key"} (None when invalid)"""
+    match = _TARGET.match(line.strip())
+    if not match:
+        return None
+    owner, repo = match.group("owner"), match.group("repo")
+    if repo:
+        return {"kind": "repo", "owner": owner, "repo": repo, "key": f"repo:{owner}/{repo}".lower()}
+    return {"kind": "user", "owner": owner, "repo": None, "key": f"user:{owner}".lower()}
+
+
+def read_targets(source: str) -> tuple[list[dict], list[str]]:
+    """Read targets from a file ("-" for stdin), dropping duplicates
+
+    Returns:
+        (targets in input order, lines that are not valid targets)
+    """
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    targets, invalid, seen = [], [], set()
+    with stream:
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            target = parse_target(line)
+            if target is None:
+                invalid.append(line)
+            elif target["key"] not in seen:
+                seen.add(target["key"])
+                targets.append(target)
+    return targets, invalid
+
+
+def load_checkpoint(path: str | None) -> set[str]:
+    """Keys of the targets a previous run finished"""
+    if not path:
+        return set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def _analysis_content(update: dict) -> str:
+    reply = update["messages"][-1]
+    return reply.get("content") if isinstance(reply, dict) else reply.content
+
+
+async def analyse(target: dict, include_data: bool) -> dict:
+    """Fetch and grade one target with the same agents the chat apps use"""
+    from src.agents.github import agithub_agent, fetch_repo_data
+    from src.agents.github_user import agithub_user_agent, fetch_user_data
+
+    owner, repo = target["owner"], target["repo"]
+    result = {"target": f"{owner}/{repo}" if repo else owner, "kind": target["kind"]}
+    started = time.perf_counter()
+    # Fetched here (and kept in the GitHub cache for the agent) to tell missing targets from analyses
+    if repo:
+        data = await asyncio.to_thread(fetch_repo_data, owner, repo, False)
+    else:
+        data = await asyncio.to_thread(fetch_user_data, owner)
+    if not data:
+        result.update({"status": "error", "error": "not found or not accessible",
+                       "seconds": time.perf_counter() - started})
+        return result
+
+    state = {"messages": [{"role": "user", "content": f"https://github.com/{owner}/{repo or ''}".rstrip("/")}],
+             "message_type": "Github" if repo else "Github_user", "username": owner, "repo_name": repo}
+    update = await (agithub_agent(state) if repo else agithub_user_agent(state))
+    result.update({"status": "ok", "analysis": _analysis_content(update), "seconds": time.perf_counter() - started})
+    if include_data:
+        result["data"] = data
+    return result
+
+
+async def run_batch(targets: list[dict], args, output, checkpoint) -> dict:
+    """Analyse targets with args.concurrency workers, writing each result when it is ready"""
+    counts = {"ok": 0, "error": 0, "not_started": 0}
+    pending = iter(targets)
+    budget_start = github_request_count()
+
+    def budget_left() -> bool:
+        return not args.max_github_requests or github_request_count() - budget_start < args.max_github_requests
+
+    def write(result: dict, key: str):
+        output.write(json.dumps(result, default=str, ensure_ascii=False) + "\n")
+        output.flush()
+        # Checkpointed after the result is written: a crash in between repeats one target at most
+        if checkpoint and result["status"] == "ok":
+            checkpoint.write(key + "\n")
+            checkpoint.flush()
+
+    async def worker():
+        for target in pending:
+            if not budget_left():
+                counts["not_started"] += 1
+                continue
+            try:
+                result = await analyse(target, args.include_data)
+            except Exception as e:
+                result = {"target": f"{target['owner']}/{target['repo'] or ''}".rstrip("/"),
+                          "kind": target["kind"], "status": "error", "error": str(e)}
+            counts[result["status"]] += 1
+            write(result, target["key"])
+            done = counts["ok"] + counts["error"]
+            if args.progress and done % args.progress == 0:
+                print(f"⏳ {done}/{len(targets)} done ({counts['error']} errors)", file=sys.stderr)
+
+    with github_priority(args.priority):
+        await asyncio.gather(*(worker() for _ in range(max(1, args.concurrency))))
+    counts["github_requests"] = github_request_count() - budget_start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse many GitHub repositories and users")
+    parser.add_argument("input", nargs="?", default="-", help="file with one target per line ('-' for stdin)")
+    parser.add_argument("--output", help="JSONL file results are appended to (stdout by default)")
+    parser.add_argument("--checkpoint", help="file recording finished targets (default: <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY, help="targets analysed at once")
+    parser.add_argument("--max-github-requests", type=int, default=0,
+                        help="stop starting targets after this many GitHub requests (0 = no limit)")
+    parser.add_argument("--priority", choices=[BACKGROUND, INTERACTIVE], default=BACKGROUND,
+                        help="rate-limit priority; background leaves GITHUB_INTERACTIVE_RESERVE for the chat apps")
+    parser.add_argument("--include-data", action="store_true", help="add the fetched GitHub data to each result")
+    parser.add_argument("--progress", type=int, default=10, help="report progress every N targets (0 = never)")
+    args = parser.parse_args()
+
+    if not settings.GITHUB_TOKEN:
+        print("❌ Error: GITHUB_TOKEN not found in .env file", file=sys.stderr)
+        sys.exit(1)
+
+    targets, invalid = read_targets(args.input)
+    for line in invalid:
+        print(f"⚠️ Skipping invalid target: {line}", file=sys.stderr)
+
+    checkpoint_path = args.checkpoint or (f"{args.output}.checkpoint" if args.output else None)
+    finished = load_checkpoint(checkpoint_path)
+    remaining = [target for target in targets if target["key"] not in finished]
+    if finished:
+        print(f"↩️ Resuming: {len(targets) - len(remaining)} of {len(targets)} targets already done", file=sys.stderr)
+
+    started = time.perf_counter()
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    try:
+        counts = asyncio.run(run_batch(remaining, args, output, checkpoint))
+    finally:
+        if args.output:
+            output.close()
+        if checkpoint:
+            checkpoint.close()
+
+    print(f"✅ {counts['ok']} analysed, {counts['error']} failed in {time.perf_counter() - started:.1f}s "
+          f"({counts['github_requests']} GitHub requests)", file=sys.stderr)
+    if counts["not_started"]:
+        print(f"⏸️ {counts['not_started']} targets not started: GitHub request budget reached. "
+              "Rerun the same command to continue.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Offline end-to-end benchmark of the agent graph
+
+Runs the compiled graph against local stand-ins so results depend only on the
+code under test:
+- GitHub: benchmarks.github_stub serving synthetic or recorded REST/GraphQL responses
+- LLMs: benchmarks.fakes.FakeChatModel with configurable latency and token rate
+- MongoDB: benchmarks.fakes.InMemoryDBClient
+
+Each route (github, github_user, logical, and comparison: three targets in
+one message fanned out in parallel) gets a batch of requests run
+concurrently through graph.ainvoke. Reported per route: p50/p95/p99 latency,
+throughput and GitHub calls; per node: p50/p95/p99 latency. Save a run with
+--output and compare a later commit against it with --baseline.
+
+Run from the repository root:
+    python -m benchmarks.e2e [--requests 20] [--concurrency 8] [--json]
+    python -m benchmarks.e2e --output before.json
+    python -m benchmarks.e2e --baseline before.json
+
+The stub is served over plain HTTP, so GitHub requests skip the rate-limit
+governor of the HTTPS connection.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.callbacks import BaseCallbackHandler
+from benchmarks.fakes import FakeChatModel, InMemoryDBClient, fake_classifier
+from benchmarks.github_stub import GitHubStub
+from src.config.settings import settings
+from src.utils.registry import registry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROUTES = {
+    "github": lambda i: f"https://github.com/bench-org/repo-{i}",
+    "github_user": lambda i: f"https://github.com/bench-user-{i}",
+    "logical": lambda i: f"What is the time complexity of merging {i + 2} sorted lists, and why?",
+    "comparison": lambda i: (f"compare https://github.com/bench-org/app-{i} and "
+                             f"https://github.com/bench-org/lib-{i} and https://github.com/bench-dev-{i}"),
+}
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the wall time of every graph node run"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roots = set()
+        self._started = {}
+        self.durations = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        with self._lock:
+            if parent_run_id is None:
+                self._roots.add(run_id)
+            elif parent_run_id in self._roots and metadata and "langgraph_node" in metadata:
+                self._started[run_id] = (metadata["langgraph_node"], time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        with self._lock:
+            self._roots.discard(run_id)
+            started = self._started.pop(run_id, None)
+            if started:
+                self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._roots.discard(run_id)
+            self._started.pop(run_id, None)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def latency_summary(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
+
+
+def install_stand_ins(args, stub_url: str) -> InMemoryDBClient:
+    """Point the app at the GitHub stub and replace the models and database"""
+    settings.GITHUB_API_URL = stub_url
+    # A token enables the GraphQL user loader; the stub accepts any token
+    settings.GITHUB_TOKEN = "benchmark"
+
+    def model():
+        return FakeChatModel(latency=args.llm_latency, tokens_per_second=args.token_rate,
+                             reply_tokens=args.reply_tokens)
+
+    db = InMemoryDBClient()
+    registry.override("db_client", db)
+    registry.override("classifier_llm", fake_classifier(args.llm_latency))
+    for name in ("logical_llm", "github_llm", "github_user_llm", "summary_llm", "comparison_llm"):
+        registry.override(name, model())
+    return db
+
+
+async def run_route(graph, route: str, args, timer: NodeTimer) -> dict:
+    """Run one route's batch with bounded concurrency and return its latencies"""
+    distinct = args.repeat_targets or args.requests
+    messages = [ROUTES[route](i % distinct) for i in range(args.requests)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors, mismatched = [], 0, 0
+
+    async def one(text: str):
+        nonlocal errors, mismatched
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await graph.ainvoke(
+                    {"messages": [{"role": "user", "content": text}], "message_type": None},
+                    config={"callbacks": [timer]},
+                )
+            except Exception as e:
+                errors += 1
+                print(f"{route} request failed: {e}")
+                return
+            latencies.append(time.perf_counter() - started)
+            routed = "comparison" if len(result.get("targets") or []) > 1 else (result.get("message_type") or "").lower()
+            if routed != route:
+                mismatched += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(text) for text in messages))
+    elapsed = time.perf_counter() - started
+    summary = latency_summary(latencies) if latencies else {"count": 0}
+    summary.update({
+        "errors": errors,
+        "misrouted": mismatched,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+    })
+    return summary
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_benchmark(args) -> dict:
+    fixtures = None
+    if args.fixtures and os.path.exists(args.fixtures):
+        with open(args.fixtures, encoding="utf-8") as f:
+            fixtures = json.load(f)
+    stub = GitHubStub(
+        fixtures=fixtures,
+        latency=args.github_latency,
+        record_upstream="https://api.github.com" if args.record else None,
+        upstream_token=os.getenv("GITHUB_TOKEN"),
+    )
+    db = install_stand_ins(args, stub.start())
+
+    from src.utils.graph_builder import get_graph
+    graph = get_graph()
+    timer = NodeTimer()
+    routes = {}
+    try:
+        for route in args.routes:
+            stub.reset_counts()
+            routes[route] = await run_route(graph, route, args, timer)
+            calls = sum(stub.calls.values())
+            routes[route].update({
+                "github_calls": calls,
+                "github_calls_per_request": calls / args.requests,
+                "github_bytes": stub.bytes_sent,
+                "github_endpoints": dict(stub.calls),
+            })
+    finally:
+        stub.stop()
+        if args.record and args.fixtures:
+            stub.save_fixtures(args.fixtures)
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "repeat_targets": args.repeat_targets,
+            "llm_latency": args.llm_latency,
+            "token_rate": args.token_rate,
+            "reply_tokens": args.reply_tokens,
+            "github_latency": args.github_latency,
+            "fixtures": args.fixtures,
+        },
+        "routes": routes,
+        "nodes": {node: latency_summary(values) for node, values in sorted(timer.durations.items())},
+        "db_calls": db.calls,
+    }
+
+
+def _delta(current: float, previous: float | None) -> str:
+    if not previous:
+        return ""
+    return f" ({(current - previous) / previous * 100:+.0f}%)"
+
+
+def print_report(report: dict, baseline: dict | None):
+    config = report["config"]
+    print(f"End-to-end benchmark at {report['commit'] or 'unknown commit'}: "
+          f"{config['requests']} requests/route, concurrency {config['concurrency']}, "
+          f"LLM {config['llm_latency']}s + {config['reply_tokens']} tokens @ {config['token_rate']}/s")
+    if baseline:
+        print(f"Compared with {baseline.get('commit') or 'baseline'}")
+
+    print(f"\n{'route':<13}{'p50':>16}{'p95':>16}{'p99':>16}{'req/s':>14}{'GitHub calls/req':>18}{'errors':>8}")
+    for route, stats in report["routes"].items():
+        if not stats["count"]:
+            print(f"{route:<13}{'no successful requests':>40}{stats['errors']:>56}")
+            continue
+        old = (baseline or {}).get("routes", {}).get(route, {})
+        cells = [f"{stats[k]:.0f}ms{_delta(stats[k], old.get(k))}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        throughput = f"{stats['throughput_rps']:.1f}{_delta(stats['throughput_rps'], old.get('throughput_rps'))}"
+        calls = f"{stats['github_calls_per_request']:.1f}"
+        print(f"{route:<13}{cells[0]:>16}{cells[1]:>16}{cells[2]:>16}{throughput:>14}{calls:>18}{stats['errors']:>8}")
+
+    print(f"\n{'node':<13}{'runs':>8}{'p50':>16}{'p95':>16}{'p99':>16}")
+    for node, stats in report["nodes"].items():
+        old = (baseline or {}).get("nodes", {}).get(node, {})
+        cells = [f"{stats[k]:.1f}ms{_delta(stats[k], old.get(k))}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{node:<13}{stats['count']:>8}{cells[0]:>16}{cells[1]:>16}{cells[2]:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent graph end to end against local stand-ins")
+    parser.add_argument("--requests", type=int, default=20, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--repeat-targets", type=int, default=0,
+                        help="cycle through this many distinct repositories/users/questions (warm caches); 0 = all distinct")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds before a model's first token")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="tokens per second a model produces")
+    parser.add_argument("--reply-tokens", type=int, default=150, help="tokens per model reply")
+    parser.add_argument("--github-latency", type=float, default=0.0, help="seconds the GitHub stub waits per request")
+    parser.add_argument("--fixtures", help="JSON of recorded GitHub responses to replay (see --record)")
+    parser.add_argument("--record", action="store_true",
+                        help="forward requests missing from --fixtures to api.github.com and save them there")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--baseline", help="report written by --output to compare against")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    # Keep stdout parseable with --json: the app reports problems with print
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        report = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""In-process stand-ins for the LLM and MongoDB used by the offline benchmarks"""
+import asyncio
+import threading
+import time
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from src.models.schemas import MessageClassifier
+from src.utils.history import count_tokens, message_role_content
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model answering with filler text at a configurable speed
+
+    A call waits `latency` seconds before the first token (time to first token)
+    and then produces reply_tokens tokens at tokens_per_second, streaming them
+    when the caller streams. Token usage is reported like a real model's.
+    """
+
+    latency: float = 0.5
+    tokens_per_second: float = 50.0
+    reply_tokens: int = 200
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _tokens(self) -> list[str]:
+        return [f"word{i % 97} " for i in range(self.reply_tokens)]
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _usage(self, messages) -> dict:
+        prompt = sum(count_tokens(message_role_content(msg)[1]) for msg in messages)
+        return {"input_tokens": prompt, "output_tokens": self.reply_tokens,
+                "total_tokens": prompt + self.reply_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency + self._token_delay() * self.reply_tokens)
+        message = AIMessage(content="".join(self._tokens()), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency + self._token_delay() * self.reply_tokens)
+        message = AIMessage(content="".join(self._tokens()), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for token in self._tokens():
+            time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for token in self._tokens():
+            await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+
+def fake_classifier(latency: float = 0.2):
+    """Structured-output stand-in for the classifier LLM
+
+    Only reached for messages the rule-based fast path leaves ambiguous, which
+    it answers as logical questions.
+    """
+    result = MessageClassifier(message_type="logical")
+
+    def classify(_):
+        time.sleep(latency)
+        return result
+
+    async def aclassify(_):
+        await asyncio.sleep(latency)
+        return result
+
+    return RunnableLambda(classify, aclassify)
+
+
+class InMemoryDBClient:
+    """Dict-backed substitute for MongoDBClient covering what a graph run touches"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.analyses = {}
+        self.conversations = {}
+        self.calls = 0
+
+    def get_analysis(self, fingerprint: str):
+        with self._lock:
+            self.calls += 1
+            return self.analyses.get(fingerprint)
+
+    def store_analysis(self, fingerprint: str, content: str, ttl: int):
+        with self._lock:
+            self.calls += 1
+            self.analyses[fingerprint] = content
+
+    def save_conversations(self, turns: list):
+        with self._lock:
+            self.calls += 1
+            for state, session_id in turns:
+                self.conversations[session_id] = list(state["messages"])
+
+    def save_conversation(self, state, session_id: str):
+        self.save_conversations([(state, session_id)])
+
+    def load_conversation(self, session_id: str, limit: int | None = None):
+        with self._lock:
+            self.calls += 1
+            return list(self.conversations.get(session_id, []))[-limit if limit else None:] or None
+
+    def ensure_indexes(self):
+        pass
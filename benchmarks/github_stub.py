@@ -0,0 +1,329 @@
+"""Local HTTP stand-in for the GitHub REST and GraphQL APIs
+
+Responses come from a fixtures file of recorded responses when one is given
+("METHOD /path?query" -> {"status", "headers", "body"}), otherwise they are
+synthesised deterministically from the requested names, so any owner/repo
+exists. With record_upstream set, requests missing from the fixtures are
+forwarded to the real API and recorded for later runs.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+LANGUAGES = ["Python", "TypeScript", "Go", "Rust", "Shell", "Dockerfile", "HTML", "C"]
+TOPICS = ["cli", "api", "machine-learning", "web", "devtools", "database", "testing", "automation"]
+ROOT_FILES = ["README.md", "LICENSE", "pyproject.toml", "src", "tests", ".github", "Dockerfile", "docs"]
+
+_ROUTE_PATTERNS = [
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/users/[^/]+"), "/users/{user}"),
+]
+
+
+def _route(path: str) -> str:
+    """Path with owner, repo and user names replaced by placeholders"""
+    for pattern, template in _ROUTE_PATTERNS:
+        path = pattern.sub(template, path, count=1)
+    return path
+
+
+def _rng(*names) -> random.Random:
+    """Random generator seeded by names, so a name always gets the same data"""
+    return random.Random(hashlib.sha1("/".join(names).lower().encode()).hexdigest())
+
+
+def _timestamp(rng: random.Random, max_days: int) -> str:
+    moment = datetime(2026, 1, 1, tzinfo=UTC) - timedelta(days=rng.randint(1, max_days), seconds=rng.randint(0, 86400))
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class _Server(ThreadingHTTPServer):
+    # Concurrent clients open many connections at once; the default backlog of 5
+    # drops some, adding one-second SYN retransmits to the measurements
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class GitHubStub:
+    """Serves GitHub API responses on 127.0.0.1 and counts the calls it receives"""
+
+    def __init__(self, fixtures: dict | None = None, latency: float = 0.0,
+                 record_upstream: str | None = None, upstream_token: str | None = None):
+        self.fixtures = fixtures or {}
+        self.latency = latency
+        self.record_upstream = record_upstream
+        self.upstream_token = upstream_token
+        self.calls = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self.base_url = None
+
+    # Synthetic data
+
+    def _repo(self, owner: str, repo: str) -> dict:
+        rng = _rng(owner, repo)
+        return {
+            "id": rng.randint(1, 10 ** 9),
+            "name": repo,
+            "full_name": f"{owner}/{repo}",
+            "owner": {"login": owner, "type": "User"},
+            "private": False,
+            "description": f"Benchmark repository {repo}",
+            "url": f"{self.base_url}/repos/{owner}/{repo}",
+            "html_url": f"https://github.com/{owner}/{repo}",
+            "stargazers_count": rng.randint(0, 50000),
+            "forks_count": rng.randint(0, 5000),
+            "open_issues_count": rng.randint(0, 500),
+            "language": rng.choice(LANGUAGES),
+            "created_at": _timestamp(rng, 3000),
+            "updated_at": _timestamp(rng, 30),
+            "pushed_at": _timestamp(rng, 30),
+            "size": rng.randint(10, 500000),
+            "default_branch": "main",
+            "has_wiki": rng.random() < 0.5,
+            "has_issues": True,
+            "fork": False,
+            "license": {"key": "mit", "name": "MIT License"},
+        }
+
+    def _user(self, login: str) -> dict:
+        rng = _rng(login)
+        return {
+            "login": login,
+            "id": rng.randint(1, 10 ** 9),
+            "type": "User",
+            "name": login.title(),
+            "bio": "Benchmark user",
+            "company": None,
+            "location": "Earth",
+            "blog": "",
+            "email": None,
+            "followers": rng.randint(0, 10000),
+            "following": rng.randint(0, 500),
+            "public_repos": rng.randint(5, 60),
+            "public_gists": rng.randint(0, 20),
+            "created_at": _timestamp(rng, 4000),
+            "updated_at": _timestamp(rng, 60),
+            "twitter_username": None,
+            "avatar_url": f"https://avatars.githubusercontent.com/{login}",
+            "hireable": None,
+            "url": f"{self.base_url}/users/{login}",
+        }
+
+    def _user_repo_names(self, login: str) -> list[str]:
+        return [f"project-{i}" for i in range(self._user(login)["public_repos"])]
+
+    def _paginated(self, path: str, query: dict, items: list):
+        """List response with a Link header, as GitHub pages collections"""
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+        headers = {}
+        links = []
+        if page < last:
+            links.append(f'<{self.base_url}{path}?per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{self.base_url}{path}?per_page={per_page}&page={last}>; rel="last"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        return 200, headers, items[(page - 1) * per_page:page * per_page]
+
+    def _graphql(self, variables: dict) -> dict:
+        login = variables["login"]
+        user = self._user(login)
+        names = self._user_repo_names(login)
+        start = int(variables.get("cursor") or 0)
+        page = names[start:start + variables["pageSize"]]
+        nodes = []
+        for name in page:
+            repo = self._repo(login, name)
+            rng = _rng(login, name, "graphql")
+            nodes.append({
+                "name": name,
+                "nameWithOwner": repo["full_name"],
+                "description": repo["description"],
+                "url": repo["html_url"],
+                "createdAt": repo["created_at"],
+                "updatedAt": repo["updated_at"],
+                "pushedAt": repo["pushed_at"],
+                "primaryLanguage": {"name": repo["language"]},
+                "stargazerCount": repo["stargazers_count"],
+                "forkCount": repo["forks_count"],
+                "diskUsage": repo["size"],
+                "isFork": False,
+                "hasWikiEnabled": repo["has_wiki"],
+                "hasIssuesEnabled": True,
+                "defaultBranchRef": {"name": "main"},
+                "licenseInfo": {"name": "MIT License"},
+                "issues": {"totalCount": rng.randint(0, 200)},
+                "pullRequests": {"totalCount": rng.randint(0, 50)},
+                "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in rng.sample(TOPICS, 3)]},
+                "languages": {"edges": [{"size": rng.randint(100, 10 ** 6), "node": {"name": lang}}
+                                        for lang in rng.sample(LANGUAGES, 3)]},
+            })
+        end = start + len(page)
+        data = {
+            "name": user["name"],
+            "login": login,
+            "bio": user["bio"],
+            "company": None,
+            "location": user["location"],
+            "websiteUrl": None,
+            "email": "",
+            "twitterUsername": None,
+            "avatarUrl": user["avatar_url"],
+            "isHireable": False,
+            "createdAt": user["created_at"],
+            "updatedAt": user["updated_at"],
+            "followers": {"totalCount": user["followers"]},
+            "following": {"totalCount": user["following"]},
+            "publicRepos": {"totalCount": len(names)},
+            "gists": {"totalCount": user["public_gists"]},
+            "organizations": {"nodes": []},
+            "repositories": {
+                "pageInfo": {"hasNextPage": end < len(names), "endCursor": str(end)},
+                "nodes": nodes,
+            },
+        }
+        return {"data": {"user": data}}
+
+    def _synthesise(self, method: str, path: str, query: dict, body: bytes):
+        """Return (status, headers, JSON body) for a request"""
+        if method == "POST" and path == "/graphql":
+            return 200, {}, self._graphql(json.loads(body or b"{}").get("variables", {}))
+
+        parts = [part for part in path.split("/") if part]
+        if len(parts) >= 3 and parts[0] == "repos":
+            owner, repo, rest = parts[1], parts[2], parts[3:]
+            rng = _rng(owner, repo)
+            if not rest:
+                return 200, {}, self._repo(owner, repo)
+            if rest == ["languages"]:
+                return 200, {}, {lang: rng.randint(100, 10 ** 6) for lang in rng.sample(LANGUAGES, 3)}
+            if rest == ["topics"]:
+                return 200, {}, {"names": rng.sample(TOPICS, 3)}
+            if rest == ["readme"]:
+                return 200, {}, {"type": "file", "name": "README.md", "path": "README.md",
+                                 "size": rng.randint(200, 20000), "encoding": "base64", "content": ""}
+            if rest in (["commits"], ["contributors"]):
+                count = rng.randint(1, 3000) if rest == ["commits"] else rng.randint(1, 80)
+                items = [{"sha": f"{i:040x}"} if rest == ["commits"] else {"login": f"dev{i}", "contributions": 1}
+                         for i in range(count)]
+                return self._paginated(path, query, items)
+            if rest == ["contents"]:
+                return 200, {}, [{"type": "dir" if "." not in name else "file", "name": name, "path": name,
+                                  "sha": f"{i:040x}", "size": 0} for i, name in enumerate(ROOT_FILES)]
+        if len(parts) >= 2 and parts[0] == "users":
+            login, rest = parts[1], parts[2:]
+            if not rest:
+                return 200, {}, self._user(login)
+            if rest == ["orgs"]:
+                return 200, {}, []
+            if rest == ["repos"]:
+                repos = [self._repo(login, name) for name in self._user_repo_names(login)]
+                return self._paginated(path, query, repos)
+        return 404, {}, {"message": "Not Found"}
+
+    # Recorded responses
+
+    def _fixture_key(self, method: str, path: str, raw_query: str, body: bytes) -> str:
+        if method == "POST":
+            return f"POST {path} {hashlib.sha1(body or b'').hexdigest()}"
+        return f"{method} {path}" + (f"?{raw_query}" if raw_query else "")
+
+    def _forward(self, method: str, path: str, raw_query: str, body: bytes):
+        import requests
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.upstream_token:
+            headers["Authorization"] = f"Bearer {self.upstream_token}"
+        url = f"{self.record_upstream}{path}" + (f"?{raw_query}" if raw_query else "")
+        response = requests.request(method, url, data=body or None, headers=headers, timeout=30)
+        kept = {name: response.headers[name] for name in ("Link", "ETag") if name in response.headers}
+        if "Link" in kept:
+            kept["Link"] = kept["Link"].replace(self.record_upstream, self.base_url)
+        return response.status_code, kept, response.json() if response.content else None
+
+    def respond(self, method: str, target: str, body: bytes, headers) -> tuple[int, dict, bytes]:
+        """Build the response to one request"""
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        key = self._fixture_key(method, path, parts.query, body)
+        if key in self.fixtures:
+            fixture = self.fixtures[key]
+            status, extra, payload = fixture["status"], dict(fixture.get("headers", {})), fixture["body"]
+        elif self.record_upstream:
+            status, extra, payload = self._forward(method, path, parts.query, body)
+            with self._lock:
+                self.fixtures[key] = {"status": status, "headers": extra, "body": payload}
+        else:
+            status, extra, payload = self._synthesise(method, path, parse_qs(parts.query), body)
+
+        data = json.dumps(payload).encode()
+        etag = extra.get("ETag") or f'"{hashlib.sha1(data).hexdigest()}"'
+        if status == 200 and headers.get("If-None-Match") == etag:
+            status, data = 304, b""
+        extra.update({
+            "ETag": etag,
+            "Content-Type": "application/json; charset=utf-8",
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        })
+        with self._lock:
+            self.calls[f"{method} {_route(path)}"] += 1
+            self.bytes_sent += len(data)
+        return status, extra, data
+
+    # Server lifecycle
+
+    def start(self) -> str:
+        """Serve on a free local port in a background thread and return the base URL"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, headers, data = stub.respond(self.command, self.path, body, self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, name="github-stub", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.bytes_sent = 0
+
+    def save_fixtures(self, path: str):
+        """Write the recorded responses for replay"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.fixtures, f, indent=1, sort_keys=True)
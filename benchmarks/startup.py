@@ -0,0 +1,98 @@
+"""Startup-time benchmark
+
+Measures, each in a fresh interpreter:
+- import: importing console_app and telegram_app
+- graph: building the agent graph on first use
+- models: building the remaining registered components (chat models, DB client)
+- first_request: the first graph run, with stand-in models unless --live
+
+Run from the repository root:
+    python -m benchmarks.startup [--runs 5] [--live] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+live = sys.argv[1] == "live"
+
+started = time.perf_counter()
+import console_app, telegram_app
+timings = {"import": time.perf_counter() - started}
+
+from src.utils.graph_builder import get_graph
+from src.utils.registry import registry
+started = time.perf_counter()
+graph = get_graph()
+timings["graph"] = time.perf_counter() - started
+
+if not live:
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+    from src.models.schemas import MessageClassifier
+    registry.override("classifier_llm", RunnableLambda(lambda _: MessageClassifier(message_type="logical")))
+    registry.override("logical_llm", GenericFakeChatModel(messages=iter([AIMessage(content="4")])))
+
+started = time.perf_counter()
+registry.warm_up().join()
+timings["models"] = time.perf_counter() - started
+
+started = time.perf_counter()
+graph.invoke({"messages": [{"role": "user", "content": "What is 2 + 2?"}], "message_type": None})
+timings["first_request"] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def run_once(live: bool) -> dict:
+    """Run the measurements in a new interpreter and return their timings in seconds"""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env["PYTHONPATH"] = str(ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, "live" if live else "offline"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-request latency")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--live", action="store_true", help="call the configured models instead of stand-ins")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once(args.live) for _ in range(args.runs)]
+    summary = {
+        phase: {
+            "min_ms": min(run[phase] for run in runs) * 1000,
+            "median_ms": statistics.median(run[phase] for run in runs) * 1000,
+            "max_ms": max(run[phase] for run in runs) * 1000,
+        }
+        for phase in runs[0]
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"Startup benchmark ({args.runs} runs, {'live' if args.live else 'stand-in'} models)")
+    print(f"{'phase':<15}{'min':>10}{'median':>10}{'max':>10}")
+    for phase, stats in summary.items():
+        print(f"{phase:<15}{stats['min_ms']:>8.0f}ms{stats['median_ms']:>8.0f}ms{stats['max_ms']:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,44 @@
-from src.utils.graph_builder import graph
-from src.database.mongo_client import db_client
+from src.utils.graph_builder import get_graph
+from src.database.mongo_client import get_db_client
+from src.database.write_behind import write_queue
+from src.config.settings import settings
+from src.agents.classifier import classifier_stats
+from src.utils.classification_cache import classification_cache
+from src.utils.github_cache import github_cache
+from src.utils.metrics import metrics_summary, start_metrics_server
+from src.utils.registry import registry
+from src.utils.streaming import stream_turn
+from src.utils.sweep import format_progress, format_report, parse_owner, sweep
+
+def print_reply_header(message_type):
+    """Print the banner of an assistant reply for the agent that produced it"""
+    # Select emoji based on message type
+    if message_type == "Github_user":
+        emoji = "👤"
+        type_label = "User Analysis"
+    elif message_type == "Github":
+        emoji = "🔍"
+        type_label = "Repo Analysis"
+    else:
+        emoji = "🧠"
+        type_label = "Logical"
+    
+    print("-" * 60)
+    print(f"{emoji} Assistant ({type_label}):")
+    print("-" * 60)
 
 def run_chatbot():
     """Run the console chatbot"""
     state = {"messages": [], "message_type": None}
     session_id = "console_session"
+    # Build the graph and models while the database loads and the user types
+    registry.warm_up()
+    start_metrics_server()
+    db_client = get_db_client()
+    db_client.ensure_indexes()
     
     # Load existing conversation
-    existing_conversation = db_client.load_conversation(session_id)
+    existing_conversation = write_queue.load_conversation(session_id, limit=settings.HISTORY_LOAD_LIMIT)
     if existing_conversation and existing_conversation.get("messages"):
         state["messages"] = [
             {"role": msg["role"], "content": msg["content"]} 
@@ -21,6 +52,8 @@ def run_chatbot():
     print("\n📌 **Capabilities:**")
     print("  👤 GitHub User Analysis - Send profile URL")
     print("  🔍 GitHub Repo Analysis - Send repo URL")
+    print("  ⚖️ Comparison - Send several repo/profile URLs")
+    print("  📦 Sweep - Type 'sweep <user or org>' to score all its repos")
     print("  🧠 Logical Assistant - Ask any question\n")
   
     
@@ -31,17 +64,19 @@ def run_chatbot():
             continue
         
         if user_input.lower() == "exit":
+            write_queue.close()
             print("\n👋 Goodbye! Have a great day!\n")
             break
         
         if user_input.lower() == "clear":
-            db_client.clear_conversation(session_id)
+            write_queue.clear_conversation(session_id)
             state = {"messages": [], "message_type": None}
             print("✅ Conversation history cleared!\n")
             continue
         
         if user_input.lower() == "stats":
-            stats = db_client.get_conversation_stats(session_id)
+            write_queue.flush()
+            stats = write_queue.get_conversation_stats(session_id)
             if stats:
                 print("\n" + "=" * 40)
                 print("📊 Conversation Statistics")
@@ -49,9 +84,69 @@ def run_chatbot():
                 print(f"  Total Messages: {stats['total_messages']}")
                 print(f"  Your Messages: {stats['user_messages']}")
                 print(f"  Assistant Messages: {stats['assistant_messages']}")
+                routes = stats['routes']
+                print(f"  Repo / User / Logical: {routes.get('Github', 0)} / {routes.get('Github_user', 0)} / {routes.get('logical', 0)}")
+                print(f"  LLM Tokens: {stats['llm_tokens']}")
+                if stats['last_activity']:
+                    print(f"  Last Activity: {stats['last_activity']:%Y-%m-%d %H:%M}")
                 print("=" * 40 + "\n")
             else:
                 print("❌ No conversation history found.\n")
+            
+            global_stats = db_client.get_global_stats()
+            if global_stats:
+                print("🌍 All Sessions")
+                print("=" * 40)
+                print(f"  Sessions: {global_stats['sessions']}")
+                print(f"  Total Messages: {global_stats['total_messages']}")
+                print(f"  Repo / User / Logical: {global_stats['github_turns']} / {global_stats['github_user_turns']} / {global_stats['logical_turns']}")
+                print(f"  LLM Tokens: {global_stats['llm_tokens']}")
+                print("=" * 40 + "\n")
+            
+            queue_stats = write_queue.stats()
+            print(f"💾 Saved turns: {queue_stats['flushed_turns']} in {queue_stats['flushes']} flushes "
+                  f"(avg {queue_stats['avg_flush_seconds'] * 1000:.1f} ms, errors: {queue_stats['errors']})\n")
+            continue
+        
+        if user_input.lower() == "metrics":
+            summary = metrics_summary()
+            print("\n" + "=" * 60)
+            print("⏱️ Node Metrics (averages per run)")
+            print("=" * 60)
+            for node, node_stats in summary.items():
+                print(f"  {node}: {node_stats['runs']} runs ({node_stats['errors']} errors), "
+                      f"{node_stats['avg_ms']:.0f} ms avg, p95 ≤ {node_stats['p95_ms']:.0f} ms")
+                print(f"    Tokens: {node_stats['avg_prompt_tokens']:.0f} prompt / {node_stats['avg_completion_tokens']:.0f} completion")
+                print(f"    GitHub: {node_stats['avg_github_requests']:.1f} requests, {node_stats['avg_github_bytes'] / 1024:.1f} KB")
+                print(f"    MongoDB: {node_stats['avg_mongo_ms']:.1f} ms")
+            if not summary:
+                print("  No graph runs measured yet.")
+            classified = sum(classifier_stats.values())
+            cache = classification_cache.stats()
+            print(f"🧭 Classifier: {classifier_stats['fast_path']} fast path / {classifier_stats['cache']} cached / "
+                  f"{classifier_stats['llm']} LLM "
+                  f"({(classified - classifier_stats['llm']) / classified if classified else 0:.0%} without the LLM)")
+            print(f"    Cache: {cache['entries']} entries ({cache['bytes'] / 1024:.0f} KB), {cache['hits']} hits / "
+                  f"{cache['misses']} misses ({cache['hit_ratio']:.0%} hit ratio, evicted: {cache['evictions']})")
+            github = github_cache.stats()
+            lookups = github['hits'] + github['misses']
+            print(f"🗄️ GitHub Cache: {github['entries']} entries ({github['bytes'] / 1024:.0f} KB, "
+                  f"evicted: {github['evictions']})")
+            print(f"    {github['hits']} hits / {github['misses']} misses ({github['revalidations']} revalidated by ETag), "
+                  f"{(github['hits'] + github['revalidations']) / lookups if lookups else 0:.0%} served from cache")
+            print("=" * 60 + "\n")
+            continue
+        
+        if user_input.lower().startswith("sweep "):
+            owner = parse_owner(user_input[6:])
+            if not owner:
+                print("❌ Usage: sweep <GitHub user or organisation>\n")
+                continue
+            try:
+                for kind, snapshot in sweep(owner):
+                    print(format_progress(snapshot) if kind == "progress" else f"\n{format_report(snapshot)}\n")
+            except Exception as e:
+                print(f"\n❌ Sweep failed: {e}\n")
             continue
         
         
@@ -60,38 +155,38 @@ def run_chatbot():
         print("\n⏳ Processing...\n")
         
         try:
-            # Invoke the graph with LangSmith run config for better tracing
-            state = graph.invoke(
+            # Stream the graph with LangSmith run config for better tracing
+            streamed = False
+            for kind, payload in stream_turn(
+                get_graph(),
                 state,
                 config={
                     "run_name": "console_app",
                     "tags": ["console", "pr-impressionable-suppression-36"],
                     "metadata": {"session_id": session_id},
                 },
-            )
+            ):
+                if kind == "state":
+                    state = payload
+                    continue
+                
+                # Print reply tokens as they arrive, after the header of the routed agent
+                if not streamed:
+                    print_reply_header(state.get("message_type", "logical"))
+                    print()
+                    streamed = True
+                print(payload, end="", flush=True)
             
-            # Save to database
-            db_client.save_conversation(state, session_id)
+            # Saved in the background, the reply does not wait for the database
+            write_queue.enqueue(state, session_id)
             
             # Display response
-            if state.get("messages") and len(state["messages"]) > 0:
+            if streamed:
+                print("\n")
+                print("-" * 60 + "\n")
+            elif state.get("messages") and len(state["messages"]) > 0:
                 last_message = state["messages"][-1]
-                message_type = state.get("message_type", "logical")
-                
-                # Select emoji based on message type
-                if message_type == "Github_user":
-                    emoji = "👤"
-                    type_label = "User Analysis"
-                elif message_type == "Github":
-                    emoji = "🔍"
-                    type_label = "Repo Analysis"
-                else:
-                    emoji = "🧠"
-                    type_label = "Logical"
-                
-                print("-" * 60)
-                print(f"{emoji} Assistant ({type_label}):")
-                print("-" * 60)
+                print_reply_header(state.get("message_type", "logical"))
                 
                 # Get content
                 if isinstance(last_message, dict):
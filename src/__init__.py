@@ -1,5 +1,14 @@
-from src.utils.graph_builder import graph
-from src.database.mongo_client import db_client
 from src.config.settings import settings
 
-__all__ = ['graph', 'db_client', 'settings']
\ No newline at end of file
+__all__ = ['graph', 'db_client', 'settings']
+
+
+def __getattr__(name):
+    # The graph and the database client are built on first use (src.utils.registry)
+    if name == "graph":
+        from src.utils.graph_builder import get_graph
+        return get_graph()
+    if name == "db_client":
+        from src.database.mongo_client import get_db_client
+        return get_db_client()
+    raise AttributeError(f"module 'src' has no attribute {name!r}")
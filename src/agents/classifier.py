@@ -1,9 +1,34 @@
-from langchain.chat_models import init_chat_model
+from langgraph.constants import TAG_NOSTREAM
 from src.models.schemas import MessageClassifier, State
 from src.config.settings import settings
+from src.utils.classification_cache import get_classification, store_classification
+from src.utils.llm import amodel_slot, get_model, model_slot
+from src.utils.registry import registry
 import re
 
-llm = init_chat_model(settings.LLM_MODEL)
+def _build_classifier_llm():
+    # Routing output is internal, keep it out of the graph's token stream
+    return get_model("classifier").with_structured_output(MessageClassifier).with_config(tags=[TAG_NOSTREAM])
+
+registry.register("classifier_llm", _build_classifier_llm)
+
+# Fast-path patterns for messages whose route is unambiguous without the LLM
+# (sentence punctuation right after a URL, as in "see github.com/a/b.", is not part of it)
+_GITHUB_URL = re.compile(
+    r"https?://(?:www\.)?github\.com/([\w-]+)(?:/([\w.-]+?)(?:\.git)?(?:/[^\s?#)]*?)?)?/?"
+    r"(?=[.,;:!]*(?:[\s?#)]|$))",
+    re.IGNORECASE,
+)
+# First path segments of github.com URLs that are site pages, not users
+_RESERVED_PATHS = {
+    "about", "apps", "collections", "contact", "enterprise", "explore", "features",
+    "issues", "login", "marketplace", "new", "notifications", "orgs", "organizations",
+    "pricing", "pulls", "search", "settings", "sponsors", "topics", "trending",
+}
+# Extra words allowed next to a single URL before the message counts as ambiguous
+_MAX_EXTRA_WORDS = 6
+
+classifier_stats = {"fast_path": 0, "cache": 0, "llm": 0}
 
 
 def _extract_username(text: str) -> str | None:
@@ -60,14 +85,78 @@ def _extract_owner_repo(text: str) -> tuple[str | None, str | None]:
     return None, None
 
 
-def classify_message(state: State):
-    """Classify the user message and extract username/repo when applicable."""
+def _target_update(targets: list[dict]) -> dict:
+    """State update for the targets of a message (fanned out when there are several)"""
+    first = targets[0]
+    return {
+        "message_type": first["kind"],
+        "username": first["username"],
+        "repo_name": first["repo_name"],
+        "targets": targets if len(targets) > 1 else [],
+    }
+
+
+def _unique_targets(targets: list[dict]) -> list[dict]:
+    """Targets in order of mention without repeats"""
+    unique, seen = [], set()
+    for target in targets:
+        key = (target["username"].lower(), (target["repo_name"] or "").lower())
+        if key not in seen:
+            seen.add(key)
+            unique.append(target)
+    return unique
+
+
+def _url_targets(matches) -> list[dict]:
+    """Targets of GitHub URL matches"""
+    return _unique_targets([
+        {"kind": "Github" if m.group(2) else "Github_user", "username": m.group(1), "repo_name": m.group(2)}
+        for m in matches
+    ])
+
+
+def _github_url_matches(text: str) -> list:
+    """GitHub URLs of a message that point at users or repositories (not site pages)"""
+    return [m for m in _GITHUB_URL.finditer(text) if m.group(1).lower() not in _RESERVED_PATHS]
+
+
+def _fast_classify(text: str) -> tuple[dict | None, float]:
+    """Classify messages built around GitHub URLs without calling the LLM
+    
+    Returns:
+        Tuple of (state update or None, confidence). Bare URLs score 1.0, URLs
+        with a short instruction around them (e.g. "compare A and B") 0.9;
+        anything else is left to the LLM.
+    """
+    matches = _github_url_matches(text)
+    if not matches:
+        return None, 0.0
+    
+    update = _target_update(_url_targets(matches))
+    
+    rest, end = [], 0
+    for match in matches:
+        rest.append(text[end:match.start()])
+        end = match.end()
+    rest.append(text[end:])
+    # Punctuation around the URLs (commas between them, a final period) is not a word
+    extra_words = len([word for word in " ".join(rest).split() if re.search(r"\w", word)])
+    if extra_words == 0:
+        return update, 1.0
+    if extra_words <= _MAX_EXTRA_WORDS:
+        return update, 0.9
+    return None, 0.0
+
+
+def _last_user_text(state: State) -> str:
+    """Return the text of the latest message in the state."""
     last_message = state["messages"][-1]
-    user_text = last_message.content if hasattr(last_message, "content") else last_message.get("content")
+    return last_message.content if hasattr(last_message, "content") else last_message.get("content")
 
-    classifier_llm = llm.with_structured_output(MessageClassifier)
 
-    result = classifier_llm.invoke([
+def _classifier_messages(user_text: str) -> list:
+    """Build the prompt for the structured classification call."""
+    return [
         {
             "role": "system",
             "content": """
@@ -87,14 +176,23 @@ Classify the user message into ONE of these categories AND extract identifiers:
    - Use when it's a general question without GitHub identifiers
    - Extract: both username and repo_name = null.
 
+MULTIPLE TARGETS:
+- When the message names more than one repository and/or user (e.g. "compare facebook/react
+  and vuejs/core", or several URLs), list every one of them in `targets` in the order mentioned,
+  and classify and extract identifiers for the first one as above.
+- Otherwise leave `targets` empty.
+
 RULES:
 - Prefer explicit IDs from URLs; otherwise, infer from natural language (e.g., "repo react by facebook").
 - Do not fabricate values. If uncertain, leave the field null.
 """,
         },
         {"role": "user", "content": user_text},
-    ])
+    ]
+
 
+def _apply_fallbacks(result: MessageClassifier, user_text: str) -> dict:
+    """Fill in identifiers the LLM missed and build the state update."""
     message_type = result.message_type
     username = result.username
     repo_name = result.repo_name
@@ -109,4 +207,59 @@ RULES:
             username = username or owner
             repo_name = repo_name or repo
 
-    return {"message_type": message_type, "username": username, "repo_name": repo_name}
\ No newline at end of file
+    # Several URLs, or several targets found by the LLM, are analysed in parallel
+    targets = _url_targets(_github_url_matches(user_text))
+    if len(targets) < 2:
+        targets = _unique_targets([target.model_dump() for target in result.targets if target.username])
+    if len(targets) > 1:
+        return _target_update(targets)
+    return {"message_type": message_type, "username": username, "repo_name": repo_name, "targets": []}
+
+
+def _turn_update(update: dict) -> dict:
+    """Complete a classification into the turn's state update, resetting the previous turn's analyses"""
+    return {"targets": [], **update, "analyses": None}
+
+
+def _classify_without_llm(user_text: str) -> dict | None:
+    """Resolve the message from the rule-based fast path or the classification cache"""
+    update, confidence = _fast_classify(user_text)
+    if update and confidence >= settings.CLASSIFIER_FAST_PATH_MIN_CONFIDENCE:
+        classifier_stats["fast_path"] += 1
+        return update
+    
+    cached = get_classification(user_text)
+    if cached:
+        classifier_stats["cache"] += 1
+        return dict(cached)
+    return None
+
+
+def classify_message(state: State):
+    """Classify the user message and extract username/repo when applicable."""
+    user_text = _last_user_text(state)
+    update = _classify_without_llm(user_text)
+    if update:
+        return _turn_update(update)
+    
+    classifier_stats["llm"] += 1
+    with model_slot("classifier"):
+        result = registry.get("classifier_llm").invoke(_classifier_messages(user_text))
+    update = _apply_fallbacks(result, user_text)
+    store_classification(user_text, update)
+    return _turn_update(update)
+
+
+async def aclassify_message(state: State):
+    """Async variant of classify_message for graph.ainvoke."""
+    user_text = _last_user_text(state)
+    update = _classify_without_llm(user_text)
+    if update:
+        return _turn_update(update)
+    
+    classifier_stats["llm"] += 1
+    async with amodel_slot("classifier"):
+        result = await registry.get("classifier_llm").ainvoke(_classifier_messages(user_text))
+    update = _apply_fallbacks(result, user_text)
+    store_classification(user_text, update)
+    return _turn_update(update)
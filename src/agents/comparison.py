@@ -0,0 +1,97 @@
+from src.config.settings import settings
+from src.models.schemas import State
+from src.agents.github import agithub_agent, github_agent
+from src.agents.github_user import agithub_user_agent, github_user_agent
+from src.utils.llm import amodel_slot, get_model, model_slot
+from src.utils.registry import registry
+
+registry.register("comparison_llm", lambda: get_model("comparison"))
+
+def _target_state(target: dict) -> dict:
+    """Input of one target's analysis: the target alone, so the agent cannot pick up another URL"""
+    owner, repo = target["username"], target["repo_name"]
+    return {
+        "messages": [{"role": "user", "content": f"https://github.com/{owner}/{repo}" if repo else f"https://github.com/{owner}"}],
+        "message_type": target["kind"],
+        "username": owner,
+        "repo_name": repo,
+        "target": target,
+    }
+
+def _target_name(target: dict) -> str:
+    return f"{target['username']}/{target['repo_name']}" if target["repo_name"] else f"@{target['username']}"
+
+def _analysis(target: dict, content: str) -> dict:
+    """Wrap an analysis (or the reason it failed) as an entry of the analyses list"""
+    return {"analyses": [{"target": _target_name(target), "kind": target["kind"], "content": content}]}
+
+def _reply_content(update: dict) -> str:
+    reply = update["messages"][-1]
+    return reply.get("content") if isinstance(reply, dict) else reply.content
+
+def _failed_analysis(target: dict, error: Exception) -> dict:
+    """Analyses entry of a branch that raised, so the other targets are still compared"""
+    print(f"Analysis of {_target_name(target)} failed: {error}")
+    return _analysis(target, f"ANALYSIS FAILED: {type(error).__name__}: {error}")
+
+def analyze_target(state: dict):
+    """Analyse one target of a multi-target message (one parallel branch per target)"""
+    target = state["target"]
+    agent = github_agent if target["kind"] == "Github" else github_user_agent
+    try:
+        return _analysis(target, _reply_content(agent(_target_state(target))))
+    except Exception as e:
+        return _failed_analysis(target, e)
+
+async def aanalyze_target(state: dict):
+    """Async variant of analyze_target"""
+    target = state["target"]
+    agent = agithub_agent if target["kind"] == "Github" else agithub_user_agent
+    try:
+        return _analysis(target, _reply_content(await agent(_target_state(target))))
+    except Exception as e:
+        return _failed_analysis(target, e)
+
+def _comparison_messages(state: State):
+    """Prompt combining the analyses of every target into one comparison"""
+    targets = state.get("targets") or []
+    order = {_target_name(t): i for i, t in enumerate(targets)}
+    analyses = sorted(state.get("analyses") or [], key=lambda a: order.get(a["target"], len(order)))
+    sections = "\n\n".join(f"### {a['target']}\n{a['content']}" for a in analyses)
+    skipped = [_target_name(t) for t in targets[settings.MAX_COMPARE_TARGETS:]]
+    if skipped:
+        sections += (
+            f"\n\nNOT ANALYSED (at most {settings.MAX_COMPARE_TARGETS} targets are compared per message): "
+            f"{', '.join(skipped)}. End the reply by telling the user these were skipped "
+            "and that they can send them in another message."
+        )
+    last_message = state["messages"][-1]
+    request = last_message.get("content") if isinstance(last_message, dict) else last_message.content
+    return [
+        {
+            "role": "system",
+            "content": f"""You compare GitHub repositories and developer profiles.
+Below are individual analyses of each target the user asked about.
+
+{sections}
+
+Write one combined reply:
+1. A markdown table with one row per target and its key scores or traits side by side.
+2. The main differences and trade-offs, as short bullet points backed by the analyses.
+3. A one-line verdict answering the user's request (e.g. which is stronger and for what).
+Mention any target whose analysis failed and why. Do not invent data missing from the analyses."""
+        },
+        {"role": "user", "content": request},
+    ]
+
+def comparison_agent(state: State):
+    """Merge the parallel target analyses into one comparison reply"""
+    with model_slot("comparison"):
+        reply = registry.get("comparison_llm").invoke(_comparison_messages(state))
+    return {"messages": [reply]}
+
+async def acomparison_agent(state: State):
+    """Async variant of comparison_agent"""
+    async with amodel_slot("comparison"):
+        reply = await registry.get("comparison_llm").ainvoke(_comparison_messages(state))
+    return {"messages": [reply]}
@@ -1,20 +1,32 @@
-from langchain.chat_models import init_chat_model
 from src.models.schemas import State
 from src.config.settings import settings
-from github import Github
+from src.utils.analysis_cache import analysis_fingerprint, get_analysis, store_analysis
+from src.utils.github_cache import cached_fetch
+from src.utils.github_client import get_github
+from src.utils.llm import amodel_slot, get_model, model_slot
+from src.utils.registry import registry
+from src.utils.repo_index import get_repo_index
 import re
-from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import copy
+import time
 
-llm = init_chat_model(settings.LLM_MODEL)
+registry.register("github_llm", lambda: get_model("github"))
+# Bump when the analysis prompt changes so that cached analyses are regraded
+PROMPT_VERSION = 1
 
 def extract_github_url(text: str) -> tuple:
     """Extract GitHub URL and parse owner/repo from text"""
-    github_pattern = r'https?://github\.com/([\w-]+)/([\w-]+)'
+    github_pattern = r'https?://github\.com/([\w-]+)/([\w.-]+)'
     match = re.search(github_pattern, text)
     if match:
         owner = match.group(1)
-        repo = match.group(2)
-        return match.group(0), owner, repo
+        # Dots belong to the name (next.js), a trailing .git or sentence period does not
+        repo = match.group(2).rstrip('.').removesuffix('.git').rstrip('.')
+        if repo:
+            return text[match.start():match.start(2)] + repo, owner, repo
     return None, None, None
 
 def extract_owner_and_repo(text: str) -> tuple:
@@ -67,36 +79,21 @@ def extract_owner_and_repo(text: str) -> tuple:
     return None, None
 
 def search_user_repos(owner: str, partial_repo_name: str):
-    """Search all public repos of a user and find the most related one
+    """Find the public repo of a user whose name is most related to the given one
     
     Args:
         owner: GitHub username
         partial_repo_name: Partial or full repository name to match
     
     Returns:
-        Matched repository object or None
+        Matched repository name or None
     """
     try:
-        g = Github(settings.GITHUB_TOKEN)
-        user = g.get_user(owner)
-        
-        # Get all public repositories
-        repos = user.get_repos(type="public")
-        
-        best_match = None
-        best_score = 0
-        
-        for repo in repos:
-            # Calculate similarity score using SequenceMatcher
-            similarity = SequenceMatcher(None, partial_repo_name.lower(), repo.name.lower()).ratio()
-            
-            if similarity > best_score:
-                best_score = similarity
-                best_match = repo
+        matches = get_repo_index(owner).top_k(partial_repo_name, k=1)
         
         # Only return if similarity score is reasonable (> 0.4 threshold)
-        if best_match and best_score > 0.4:
-            return best_match
+        if matches and matches[0][1] > 0.4:
+            return matches[0][0]
         
         return None
     
@@ -104,8 +101,83 @@ def search_user_repos(owner: str, partial_repo_name: str):
         print(f"Error searching user repos: {e}")
         return None
 
+def _readme_info(repository):
+    """README presence and size"""
+    readme = repository.get_readme()
+    return {"readme_size": readme.size, "has_readme": True}
+
+def _root_files_info(repository):
+    """CI/CD, test and Docker indicators from the root directory listing"""
+    file_names = [content.name for content in repository.get_contents("")]
+    return {
+        "has_ci_cd": any(f in file_names for f in ['.github', '.travis.yml', 'Jenkinsfile', '.gitlab-ci.yml']),
+        "has_tests": any('test' in f.lower() for f in file_names),
+        "has_docker": 'Dockerfile' in file_names or 'docker-compose.yml' in file_names,
+    }
+
+# Per-repository sub-requests as (fetch, default) pairs, run concurrently
+_REPO_DETAILS = [
+    (lambda r: {"languages": r.get_languages()}, {"languages": {}}),
+    (lambda r: {"topics": r.get_topics()}, {"topics": []}),
+    (_readme_info, {"has_readme": False, "readme_size": 0}),
+    (lambda r: {"total_commits": r.get_commits().totalCount}, {"total_commits": 0}),
+    (lambda r: {"contributors_count": r.get_contributors().totalCount}, {"contributors_count": 0}),
+    (_root_files_info, {"has_ci_cd": False, "has_tests": False, "has_docker": False}),
+]
+
+_fanout_pool = ThreadPoolExecutor(max_workers=settings.GITHUB_FANOUT_WORKERS, thread_name_prefix="github-fanout")
+
+def _load_repo_data(owner: str, repo: str):
+    """Fetch repository data from the GitHub API, bypassing the cache
+    
+    Returns:
+        Tuple of (repo data dictionary, ETag of the repository resource)
+    """
+    g = get_github()
+    repository = g.get_repo(f"{owner}/{repo}")
+
+    # Fetch repository information
+    repo_data = {
+        "name": repository.name,
+        "full_name": repository.full_name,
+        "description": repository.description,
+        "stars": repository.stargazers_count,
+        "forks": repository.forks_count,
+        "open_issues": repository.open_issues_count,
+        "language": repository.language,
+        "created_at": repository.created_at.strftime("%Y-%m-%d"),
+        "updated_at": repository.updated_at.strftime("%Y-%m-%d"),
+        "pushed_at": repository.pushed_at.isoformat() if repository.pushed_at else None,
+        "size": repository.size,
+        "default_branch": repository.default_branch,
+        "has_wiki": repository.has_wiki,
+        "has_issues": repository.has_issues,
+        "license": repository.license.name if repository.license else "No license",
+    }
+
+    # Issue the independent sub-requests at once; each one that fails or misses
+    # the shared deadline falls back to its default. Copying the context keeps
+    # the caller's GitHub priority in the pool threads.
+    futures = [
+        (_fanout_pool.submit(contextvars.copy_context().run, fetch, repository), default)
+        for fetch, default in _REPO_DETAILS
+    ]
+    deadline = time.monotonic() + settings.GITHUB_CALL_TIMEOUT
+    degraded = False
+    for future, default in futures:
+        try:
+            repo_data.update(future.result(timeout=max(0, deadline - time.monotonic())))
+        except Exception:
+            repo_data.update(copy.deepcopy(default))
+            degraded = True
+    repo_data["partial"] = degraded
+
+    # Without an ETag a degraded result is refetched once its TTL runs out
+    # instead of being revalidated and kept
+    return repo_data, None if degraded else repository.etag
+
 def fetch_repo_data(owner: str, repo: str, search_fallback: bool = True):
-    """Fetch repository data using GitHub API
+    """Fetch repository data using GitHub API (served from the shared cache when possible)
     
     Args:
         owner: GitHub username
@@ -116,65 +188,11 @@ def fetch_repo_data(owner: str, repo: str, search_fallback: bool = True):
         Dictionary with repo data or None
     """
     try:
-        g = Github(settings.GITHUB_TOKEN)
-        repository = g.get_repo(f"{owner}/{repo}")
-        
-        # Fetch repository information
-        repo_data = {
-            "name": repository.name,
-            "full_name": repository.full_name,
-            "description": repository.description,
-            "stars": repository.stargazers_count,
-            "forks": repository.forks_count,
-            "open_issues": repository.open_issues_count,
-            "language": repository.language,
-            "languages": repository.get_languages(),
-            "created_at": repository.created_at.strftime("%Y-%m-%d"),
-            "updated_at": repository.updated_at.strftime("%Y-%m-%d"),
-            "size": repository.size,
-            "default_branch": repository.default_branch,
-            "has_wiki": repository.has_wiki,
-            "has_issues": repository.has_issues,
-            "license": repository.license.name if repository.license else "No license",
-            "topics": repository.get_topics(),
-        }
-        
-        # Get README content
-        try:
-            readme = repository.get_readme()
-            repo_data["readme_size"] = readme.size
-            repo_data["has_readme"] = True
-        except:
-            repo_data["has_readme"] = False
-            repo_data["readme_size"] = 0
-        
-        # Get recent commits count
-        try:
-            commits = repository.get_commits()
-            repo_data["total_commits"] = commits.totalCount
-        except:
-            repo_data["total_commits"] = 0
-        
-        # Get contributors count
-        try:
-            contributors = repository.get_contributors()
-            repo_data["contributors_count"] = contributors.totalCount
-        except:
-            repo_data["contributors_count"] = 0
-        
-        # Check for CI/CD files
-        try:
-            contents = repository.get_contents("")
-            file_names = [content.name for content in contents]
-            repo_data["has_ci_cd"] = any(f in file_names for f in ['.github', '.travis.yml', 'Jenkinsfile', '.gitlab-ci.yml'])
-            repo_data["has_tests"] = any('test' in f.lower() for f in file_names)
-            repo_data["has_docker"] = 'Dockerfile' in file_names or 'docker-compose.yml' in file_names
-        except:
-            repo_data["has_ci_cd"] = False
-            repo_data["has_tests"] = False
-            repo_data["has_docker"] = False
-        
-        return repo_data
+        return cached_fetch(
+            f"repo:{owner}/{repo}".lower(),
+            f"/repos/{owner}/{repo}",
+            lambda: _load_repo_data(owner, repo),
+        )
     
     except Exception as e:
         error_msg = str(e)
@@ -185,19 +203,25 @@ def fetch_repo_data(owner: str, repo: str, search_fallback: bool = True):
             matched_repo = search_user_repos(owner, repo)
             
             if matched_repo:
-                print(f"Found similar repo: {matched_repo.name}")
+                print(f"Found similar repo: {matched_repo}")
                 # Recursively call fetch_repo_data with the matched repo, but disable fallback
-                return fetch_repo_data(owner, matched_repo.name, search_fallback=False)
+                return fetch_repo_data(owner, matched_repo, search_fallback=False)
         
         print(f"Error fetching repo data: {e}")
         return None
 
-def github_agent(state: State):
-    """GitHub repository analyzer agent"""
+def _prepare_repo_analysis(state: State):
+    """Resolve the target repo, fetch its data and build the LLM prompt
+
+    Returns:
+        Tuple of (prompt messages, None, analysis fingerprint) on success or
+        (None, state update, None) when the agent should reply directly without
+        calling the LLM, including when the analysis is already cached
+    """
     
     # Check if GitHub token is configured
     if not settings.GITHUB_TOKEN:
-        return {"messages": [{"role": "assistant", "content": "❌ GitHub token is not configured. Please set the GITHUB_TOKEN environment variable."}]}
+        return None, {"messages": [{"role": "assistant", "content": "❌ GitHub token is not configured. Please set the GITHUB_TOKEN environment variable."}]}, None
     
     # Get the last user message
     last_message = state["messages"][-1]
@@ -210,16 +234,16 @@ def github_agent(state: State):
     owner = state.get("username") or None
     repo = state.get("repo_name") or None
 
-    # Extract GitHub URL first (may overwrite owner/repo if URL present)
+    # Otherwise take them from a GitHub URL in the message
     github_url, url_owner, url_repo = extract_github_url(user_content)
-    if url_owner and url_repo:
+    if url_owner and url_repo and not (owner and repo):
         owner, repo = url_owner, url_repo
     
     # If no URL found, try to extract from natural language
     if not github_url and (not owner or not repo):
         owner, repo = extract_owner_and_repo(user_content)
         if not owner or not repo:
-            return {"messages": [{"role": "assistant", "content": "Please provide a valid GitHub repository URL (e.g., https://github.com/owner/repo) or mention the owner and repository name clearly (e.g., 'get info on mohitjoer/freelance-web' or 'repo of mohitjoer and repo name freelance-web')"}]}
+            return None, {"messages": [{"role": "assistant", "content": "Please provide a valid GitHub repository URL (e.g., https://github.com/owner/repo) or mention the owner and repository name clearly (e.g., 'get info on mohitjoer/freelance-web' or 'repo of mohitjoer and repo name freelance-web')"}]}, None
     
     # Fetch repository data (with fallback search enabled)
     repo_data = fetch_repo_data(owner, repo, search_fallback=True)
@@ -228,21 +252,38 @@ def github_agent(state: State):
         repo_ref = github_url if github_url else f"{owner}/{repo}"
         # Try to provide helpful suggestions
         try:
-            g = Github(settings.GITHUB_TOKEN)
-            user_obj = g.get_user(owner)
-            repos = list(user_obj.get_repos(type="public"))
+            index = get_repo_index(owner)
             
-            if repos:
-                repo_list = "\n- ".join([r.name for r in repos[:10]])
+            if len(index):
+                # Closest names first, padded with other repos of the owner
+                names = [name for name, _ in index.top_k(repo, k=10)]
+                names += [name for name in index.names if name not in names][:10 - len(names)]
+                repo_list = "\n- ".join(names)
                 suggestions = f"\n\n💡 **Available repositories for {owner}:**\n- {repo_list}"
-                if len(repos) > 10:
-                    suggestions += f"\n... and {len(repos) - 10} more"
+                if len(index) > 10:
+                    suggestions += f"\n... and {len(index) - 10} more"
             else:
                 suggestions = f"\n\n💡 No public repositories found for user '{owner}'"
         except Exception as e:
             suggestions = f"\n\n💡 Unable to list repositories: {str(e)}"
         
-        return {"messages": [{"role": "assistant", "content": f"❌ Unable to fetch data for repository: {repo_ref}\n\nPlease check if:\n- The repository name is correct (you provided: '{repo}')\n- The owner name is correct (you provided: '{owner}')\n- The repository is public\n- Your GitHub token has proper permissions{suggestions}"}]}
+        return None, {"messages": [{"role": "assistant", "content": f"❌ Unable to fetch data for repository: {repo_ref}\n\nPlease check if:\n- The repository name is correct (you provided: '{repo}')\n- The owner name is correct (you provided: '{owner}')\n- The repository is public\n- Your GitHub token has proper permissions{suggestions}"}]}, None
+    
+    # Analyses are reused until the repository is pushed to; partial data is never cached
+    fingerprint = None
+    if not repo_data.get("partial"):
+        fingerprint = analysis_fingerprint(
+            "github",
+            {
+                "full_name": repo_data["full_name"].lower(),
+                "pushed_at": repo_data.get("pushed_at") or repo_data["updated_at"],
+                "url": github_url,
+            },
+            PROMPT_VERSION,
+        )
+        cached = get_analysis(fingerprint)
+        if cached:
+            return None, {"messages": [{"role": "assistant", "content": cached}]}, None
     
     # Create detailed context for LLM
     repo_context = f"""
@@ -315,6 +356,32 @@ Format your response as(do not include any explanations):
     
     # Add just the current user message for analysis
     messages.append({"role": "user", "content": f"Please analyze this GitHub repository: {github_url}"})
+    return messages, None, fingerprint
+
+def github_agent(state: State):
+    """GitHub repository analyzer agent"""
+    messages, update, fingerprint = _prepare_repo_analysis(state)
+    if update:
+        return update
+    
+    with model_slot("github"):
+        reply = registry.get("github_llm").invoke(messages)
+    if fingerprint:
+        store_analysis(fingerprint, reply.content)
+    return {"messages": [reply]}
+
+async def agithub_agent(state: State):
+    """Async GitHub repository analyzer agent
+
+    The PyGithub calls are blocking, so they run in a worker thread to keep the
+    event loop free for other conversations.
+    """
+    messages, update, fingerprint = await asyncio.to_thread(_prepare_repo_analysis, state)
+    if update:
+        return update
     
-    reply = llm.invoke(messages)
-    return {"messages": [{"role": "assistant", "content": reply.content}]}
\ No newline at end of file
+    async with amodel_slot("github"):
+        reply = await registry.get("github_llm").ainvoke(messages)
+    if fingerprint:
+        await asyncio.to_thread(store_analysis, fingerprint, reply.content)
+    return {"messages": [reply]}
\ No newline at end of file
@@ -1,11 +1,18 @@
-from langchain.chat_models import init_chat_model
 from src.models.schemas import State
 from src.config.settings import settings
 from github import Github
+from src.utils.analysis_cache import analysis_fingerprint, get_analysis, store_analysis
+from src.utils.github_cache import cached_fetch
+from src.utils.github_client import get_github
+from src.utils.llm import amodel_slot, get_model, model_slot
+from src.utils.registry import registry
 from datetime import datetime, UTC
+import asyncio
 import re
 
-llm = init_chat_model(settings.LLM_MODEL)
+registry.register("github_user_llm", lambda: get_model("github_user"))
+# Bump when the analysis prompt changes so that cached analyses are regraded
+PROMPT_VERSION = 1
 
 def extract_github_username(text: str) -> str:
     """Extract GitHub username from text or URL"""
@@ -38,133 +45,340 @@ def extract_github_username(text: str) -> str:
     
     return None
 
-def fetch_user_data(username: str):
-    """Fetch comprehensive user data from GitHub API"""
+def _load_user_data_rest(username: str):
+    """Fetch user data from the GitHub REST API, bypassing the cache
+    
+    Returns:
+        Tuple of (user data dictionary, ETag of the user resource)
+    """
+    g = get_github()
+    user = g.get_user(username)
+
+    # Basic profile information
+    user_data = {
+        "profile": {
+            "name": user.name or "Not provided",
+            "username": user.login,
+            "bio": user.bio or "No bio",
+            "company": user.company or "Not provided",
+            "location": user.location or "Not provided",
+            "website": user.blog or "Not provided",
+            "email": user.email or "Not public",
+            "followers": user.followers,
+            "following": user.following,
+            "public_repos": user.public_repos,
+            "public_gists": user.public_gists,
+            "created_at": user.created_at.strftime("%Y-%m-%d"),
+            "updated_at": user.updated_at.strftime("%Y-%m-%d"),
+            "twitter_username": user.twitter_username or "Not provided",
+            "avatar_url": user.avatar_url,
+            "hireable": user.hireable,
+            "type": user.type,
+        },
+        "repositories": [],
+        "languages": {},
+        "topics": [],
+        "contribution_stats": {
+            "total_stars": 0,
+            "total_forks": 0,
+            "total_commits": 0,
+            "total_issues": 0,
+            "total_prs": 0,
+        },
+        "organizations": [],
+    }
+
+    # Fetch organizations
     try:
-        g = Github(settings.GITHUB_TOKEN)
-        user = g.get_user(username)
-        
-        # Basic profile information
-        user_data = {
-            "profile": {
-                "name": user.name or "Not provided",
-                "username": user.login,
-                "bio": user.bio or "No bio",
-                "company": user.company or "Not provided",
-                "location": user.location or "Not provided",
-                "website": user.blog or "Not provided",
-                "email": user.email or "Not public",
-                "followers": user.followers,
-                "following": user.following,
-                "public_repos": user.public_repos,
-                "public_gists": user.public_gists,
-                "created_at": user.created_at.strftime("%Y-%m-%d"),
-                "updated_at": user.updated_at.strftime("%Y-%m-%d"),
-                "twitter_username": user.twitter_username or "Not provided",
-                "avatar_url": user.avatar_url,
-                "hireable": user.hireable,
-                "type": user.type,
-            },
-            "repositories": [],
-            "languages": {},
-            "topics": [],
-            "contribution_stats": {
-                "total_stars": 0,
-                "total_forks": 0,
-                "total_commits": 0,
-                "total_issues": 0,
-                "total_prs": 0,
-            },
-            "organizations": [],
-        }
-        
-        # Fetch organizations
+        orgs = user.get_orgs()
+        for org in orgs:
+            user_data["organizations"].append({
+                "name": org.login,
+                "description": org.description or "No description",
+            })
+    except:
+        pass
+
+    # Fetch repositories
+    repos = user.get_repos(type='owner', sort='updated')
+    repo_count = 0
+    max_repos = 20  # Limit to avoid API rate limits
+
+    for repo in repos:
+        if repo_count >= max_repos:
+            break
+
         try:
-            orgs = user.get_orgs()
-            for org in orgs:
-                user_data["organizations"].append({
-                    "name": org.login,
-                    "description": org.description or "No description",
-                })
-        except:
-            pass
-        
-        # Fetch repositories
-        repos = user.get_repos(type='owner', sort='updated')
-        repo_count = 0
-        max_repos = 20  # Limit to avoid API rate limits
-        
-        for repo in repos:
-            if repo_count >= max_repos:
-                break
-            
+            repo_info = {
+                "name": repo.name,
+                "full_name": repo.full_name,
+                "description": repo.description or "No description",
+                "url": repo.html_url,
+                "created_at": repo.created_at.strftime("%Y-%m-%d"),
+                "updated_at": repo.updated_at.strftime("%Y-%m-%d"),
+                "pushed_at": repo.pushed_at.strftime("%Y-%m-%d") if repo.pushed_at else "Never",
+                "language": repo.language or "Not specified",
+                "forks": repo.forks_count,
+                "open_issues": repo.open_issues_count,
+                "size": repo.size,
+                "license": repo.license.name if repo.license else "No license",
+                "topics": repo.get_topics(),
+                "is_fork": repo.fork,
+                "default_branch": repo.default_branch,
+                "has_wiki": repo.has_wiki,
+                "has_issues": repo.has_issues,
+            }
+
+            # Get languages for this repo
             try:
-                repo_info = {
-                    "name": repo.name,
-                    "full_name": repo.full_name,
-                    "description": repo.description or "No description",
-                    "url": repo.html_url,
-                    "created_at": repo.created_at.strftime("%Y-%m-%d"),
-                    "updated_at": repo.updated_at.strftime("%Y-%m-%d"),
-                    "pushed_at": repo.pushed_at.strftime("%Y-%m-%d") if repo.pushed_at else "Never",
-                    "language": repo.language or "Not specified",
-                    "forks": repo.forks_count,
-                    "open_issues": repo.open_issues_count,
-                    "size": repo.size,
-                    "license": repo.license.name if repo.license else "No license",
-                    "topics": repo.get_topics(),
-                    "is_fork": repo.fork,
-                    "default_branch": repo.default_branch,
-                    "has_wiki": repo.has_wiki,
-                    "has_issues": repo.has_issues,
-                }
-                
-                # Get languages for this repo
-                try:
-                    repo_languages = repo.get_languages()
-                    repo_info["languages"] = repo_languages
-                    
-                    # Aggregate languages
-                    for lang, bytes_count in repo_languages.items():
-                        if lang in user_data["languages"]:
-                            user_data["languages"][lang] += bytes_count
-                        else:
-                            user_data["languages"][lang] = bytes_count
-                except:
-                    repo_info["languages"] = {}
-                
-                # Aggregate topics
-                for topic in repo_info["topics"]:
-                    if topic not in user_data["topics"]:
-                        user_data["topics"].append(topic)
-                
-                # Aggregate stats
-                user_data["contribution_stats"]["total_stars"] += repo.stargazers_count
-                user_data["contribution_stats"]["total_forks"] += repo.forks_count
-                user_data["contribution_stats"]["total_issues"] += repo.open_issues_count
-                
-                user_data["repositories"].append(repo_info)
-                repo_count += 1
-                
-            except Exception as e:
-                print(f"Error fetching repo {repo.name}: {e}")
-                continue
-        
-        # Sort languages by usage
-        user_data["languages"] = dict(sorted(
-            user_data["languages"].items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        ))
-        
-        return user_data
+                repo_languages = repo.get_languages()
+                repo_info["languages"] = repo_languages
+
+                # Aggregate languages
+                for lang, bytes_count in repo_languages.items():
+                    if lang in user_data["languages"]:
+                        user_data["languages"][lang] += bytes_count
+                    else:
+                        user_data["languages"][lang] = bytes_count
+            except:
+                repo_info["languages"] = {}
+
+            # Aggregate topics
+            for topic in repo_info["topics"]:
+                if topic not in user_data["topics"]:
+                    user_data["topics"].append(topic)
+
+            # Aggregate stats
+            user_data["contribution_stats"]["total_stars"] += repo.stargazers_count
+            user_data["contribution_stats"]["total_forks"] += repo.forks_count
+            user_data["contribution_stats"]["total_issues"] += repo.open_issues_count
+
+            user_data["repositories"].append(repo_info)
+            repo_count += 1
+
+        except Exception as e:
+            print(f"Error fetching repo {repo.name}: {e}")
+            continue
+
+    # Sort languages by usage
+    user_data["languages"] = dict(sorted(
+        user_data["languages"].items(), 
+        key=lambda x: x[1], 
+        reverse=True
+    ))
+
+    return user_data, user.etag
+
+USER_QUERY = """
+query($login: String!, $pageSize: Int!, $cursor: String, $withProfile: Boolean!) {
+  user(login: $login) {
+    ... @include(if: $withProfile) {
+      name
+      login
+      bio
+      company
+      location
+      websiteUrl
+      email
+      twitterUsername
+      avatarUrl
+      isHireable
+      createdAt
+      updatedAt
+      followers { totalCount }
+      following { totalCount }
+      publicRepos: repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+      gists(privacy: PUBLIC) { totalCount }
+      organizations(first: 100) { nodes { login description } }
+    }
+    repositories(first: $pageSize, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        description
+        url
+        createdAt
+        updatedAt
+        pushedAt
+        primaryLanguage { name }
+        stargazerCount
+        forkCount
+        diskUsage
+        isFork
+        hasWikiEnabled
+        hasIssuesEnabled
+        defaultBranchRef { name }
+        licenseInfo { name }
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        languages(first: 20, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+      }
+    }
+  }
+}
+"""
+
+def _graphql_user_page(g: Github, username: str, page_size: int, cursor: str | None, with_profile: bool):
+    """Run one page of USER_QUERY and return the user node (None if not a user)"""
+    _, response = g.requester.requestJsonAndCheck(
+        "POST",
+        "/graphql",
+        input={
+            "query": USER_QUERY,
+            "variables": {
+                "login": username,
+                "pageSize": page_size,
+                "cursor": cursor,
+                "withProfile": with_profile,
+            },
+        },
+    )
+    if response.get("errors") and not (response.get("data") or {}).get("user"):
+        return None
+    return response["data"]["user"]
+
+def _load_user_data_graphql(username: str):
+    """Fetch user data with paginated GraphQL queries, bypassing the cache
+    
+    Produces the same structure as the REST loader with one query per 100
+    repositories instead of two REST calls per repository. Falls back to REST
+    for logins that are not users (e.g. organizations).
+    
+    Returns:
+        Tuple of (user data dictionary, None since GraphQL responses carry no ETag)
+    """
+    g = get_github()
+    max_repos = settings.GITHUB_USER_MAX_REPOS
+    user = _graphql_user_page(g, username, min(max_repos, 100), None, True)
+    if user is None:
+        return _load_user_data_rest(username)
+
+    user_data = {
+        "profile": {
+            "name": user["name"] or "Not provided",
+            "username": user["login"],
+            "bio": user["bio"] or "No bio",
+            "company": user["company"] or "Not provided",
+            "location": user["location"] or "Not provided",
+            "website": user["websiteUrl"] or "Not provided",
+            "email": user["email"] or "Not public",
+            "followers": user["followers"]["totalCount"],
+            "following": user["following"]["totalCount"],
+            "public_repos": user["publicRepos"]["totalCount"],
+            "public_gists": user["gists"]["totalCount"],
+            "created_at": user["createdAt"][:10],
+            "updated_at": user["updatedAt"][:10],
+            "twitter_username": user["twitterUsername"] or "Not provided",
+            "avatar_url": user["avatarUrl"],
+            "hireable": user["isHireable"],
+            "type": "User",
+        },
+        "repositories": [],
+        "languages": {},
+        "topics": [],
+        "contribution_stats": {
+            "total_stars": 0,
+            "total_forks": 0,
+            "total_commits": 0,
+            "total_issues": 0,
+            "total_prs": 0,
+        },
+        "organizations": [
+            {"name": org["login"], "description": org["description"] or "No description"}
+            for org in user["organizations"]["nodes"]
+        ],
+    }
+
+    page = user["repositories"]
+    while True:
+        for repo in page["nodes"]:
+            if len(user_data["repositories"]) >= max_repos:
+                break
+
+            languages = {edge["node"]["name"]: edge["size"] for edge in repo["languages"]["edges"]}
+            topics = [node["topic"]["name"] for node in repo["repositoryTopics"]["nodes"]]
+            open_issues = repo["issues"]["totalCount"] + repo["pullRequests"]["totalCount"]
+            repo_info = {
+                "name": repo["name"],
+                "full_name": repo["nameWithOwner"],
+                "description": repo["description"] or "No description",
+                "url": repo["url"],
+                "created_at": repo["createdAt"][:10],
+                "updated_at": repo["updatedAt"][:10],
+                "pushed_at": repo["pushedAt"][:10] if repo["pushedAt"] else "Never",
+                "language": (repo["primaryLanguage"] or {}).get("name") or "Not specified",
+                "forks": repo["forkCount"],
+                "open_issues": open_issues,
+                "size": repo["diskUsage"] or 0,
+                "license": (repo["licenseInfo"] or {}).get("name") or "No license",
+                "topics": topics,
+                "is_fork": repo["isFork"],
+                "default_branch": (repo["defaultBranchRef"] or {}).get("name"),
+                "has_wiki": repo["hasWikiEnabled"],
+                "has_issues": repo["hasIssuesEnabled"],
+                "languages": languages,
+            }
+
+            for lang, bytes_count in languages.items():
+                user_data["languages"][lang] = user_data["languages"].get(lang, 0) + bytes_count
+            for topic in topics:
+                if topic not in user_data["topics"]:
+                    user_data["topics"].append(topic)
+
+            user_data["contribution_stats"]["total_stars"] += repo["stargazerCount"]
+            user_data["contribution_stats"]["total_forks"] += repo["forkCount"]
+            user_data["contribution_stats"]["total_issues"] += open_issues
+            user_data["repositories"].append(repo_info)
+
+        remaining = max_repos - len(user_data["repositories"])
+        if remaining <= 0 or not page["pageInfo"]["hasNextPage"]:
+            break
+        next_user = _graphql_user_page(g, username, min(remaining, 100), page["pageInfo"]["endCursor"], False)
+        if next_user is None:
+            break
+        page = next_user["repositories"]
+
+    # Sort languages by usage
+    user_data["languages"] = dict(sorted(
+        user_data["languages"].items(), 
+        key=lambda x: x[1], 
+        reverse=True
+    ))
+
+    return user_data, None
+
+def fetch_user_data(username: str):
+    """Fetch comprehensive user data from GitHub API (served from the shared cache when possible)
+    
+    Uses GraphQL unless GITHUB_USER_FETCH_MODE is set to "rest" or no token is
+    configured (the GraphQL API requires authentication).
+    """
+    if settings.GITHUB_USER_FETCH_MODE == "rest" or not settings.GITHUB_TOKEN:
+        loader = lambda: _load_user_data_rest(username)
+    else:
+        loader = lambda: _load_user_data_graphql(username)
+    try:
+        return cached_fetch(
+            f"user:{username}".lower(),
+            f"/users/{username}",
+            loader,
+        )
     
     except Exception as e:
         print(f"Error fetching user data: {e}")
         return None
 
-def github_user_agent(state: State):
-    """GitHub user profile analyzer agent"""
+def _prepare_user_analysis(state: State):
+    """Resolve the username, fetch profile data and build the LLM prompt
+
+    Returns:
+        Tuple of (prompt messages, None, analysis fingerprint) on success or
+        (None, state update, None) when the agent should reply directly without
+        calling the LLM, including when the analysis is already cached
+    """
     
     # Get the last user message
     last_message = state["messages"][-1]
@@ -177,17 +391,35 @@ def github_user_agent(state: State):
     username = state.get("username") or extract_github_username(user_content)
     
     if not username:
-        return {"messages": [{"role": "assistant", "content": "Please provide a valid GitHub username or profile URL (e.g., `octocat` or `https://github.com/octocat`)"}]}
+        return None, {"messages": [{"role": "assistant", "content": "Please provide a valid GitHub username or profile URL (e.g., `octocat` or `https://github.com/octocat`)"}]}, None
     
     # Fetch user data
     user_data = fetch_user_data(username)
     
     if not user_data:
-        return {"messages": [{"role": "assistant", "content": f"❌ Unable to fetch data for GitHub user: **{username}**\n\nPlease check if:\n- The username is correct\n- The profile is public\n- Your GitHub token has proper permissions"}]}
+        return None, {"messages": [{"role": "assistant", "content": f"❌ Unable to fetch data for GitHub user: **{username}**\n\nPlease check if:\n- The username is correct\n- The profile is public\n- Your GitHub token has proper permissions"}]}, None
     
     # Create profile context
     profile = user_data["profile"]
     
+    # Analyses are reused until the profile changes or one of its repositories is pushed to
+    fingerprint = analysis_fingerprint(
+        "github_user",
+        {
+            "username": profile["username"].lower(),
+            "updated_at": profile["updated_at"],
+            "public_repos": profile["public_repos"],
+            "pushed_at": max(
+                (repo["pushed_at"] for repo in user_data["repositories"] if repo["pushed_at"] != "Never"),
+                default=None,
+            ),
+        },
+        PROMPT_VERSION,
+    )
+    cached = get_analysis(fingerprint)
+    if cached:
+        return None, {"messages": [{"role": "assistant", "content": cached}]}, None
+    
     # Top languages
     top_languages = list(user_data["languages"].keys())[:10]
     
@@ -262,6 +494,26 @@ def github_user_agent(state: State):
     system_prompt = profile_context
     messages = [{"role": "system", "content": system_prompt}]
     messages.append({"role": "user", "content": f"Analyze this GitHub user's profile: {username}"})
+    return messages, None, fingerprint
+
+def github_user_agent(state: State):
+    """GitHub user profile analyzer agent"""
+    messages, update, fingerprint = _prepare_user_analysis(state)
+    if update:
+        return update
+    
+    with model_slot("github_user"):
+        reply = registry.get("github_user_llm").invoke(messages)
+    store_analysis(fingerprint, reply.content)
+    return {"messages": [reply]}
+
+async def agithub_user_agent(state: State):
+    """Async GitHub user profile analyzer agent (GitHub fetch runs in a worker thread)"""
+    messages, update, fingerprint = await asyncio.to_thread(_prepare_user_analysis, state)
+    if update:
+        return update
     
-    reply = llm.invoke(messages)
-    return {"messages": [{"role": "assistant", "content": reply.content}]}
\ No newline at end of file
+    async with amodel_slot("github_user"):
+        reply = await registry.get("github_user_llm").ainvoke(messages)
+    await asyncio.to_thread(store_analysis, fingerprint, reply.content)
+    return {"messages": [reply]}
\ No newline at end of file
@@ -1,11 +1,16 @@
-from langchain.chat_models import init_chat_model
+from langgraph.constants import TAG_NOSTREAM
 from src.models.schemas import State
 from src.config.settings import settings
+from src.utils.history import context_window, message_role_content, summary_prompt
+from src.utils.llm import amodel_slot, get_model, model_slot
+from src.utils.registry import registry
 
-llm = init_chat_model(settings.LLM_MODEL)
+registry.register("logical_llm", lambda: get_model("logical"))
+# Summaries are internal, keep them out of the graph's token stream
+registry.register("summary_llm", lambda: get_model("summary").with_config(tags=[TAG_NOSTREAM]))
 
-def logical_agent(state: State):
-    """Logical assistance agent"""
+def _build_messages(state: State, summary: str | None, start: int):
+    """Build the system prompt, the summary of older turns and the recent history for the LLM"""
     messages = [
         {
             "role": "system",
@@ -15,13 +20,30 @@ def logical_agent(state: State):
             Be direct and straightforward in your responses."""
         }
     ]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+
+    for msg in state["messages"][start:]:
+        role, content = message_role_content(msg)
+        messages.append({"role": role, "content": content})
+    return messages
+
+def logical_agent(state: State):
+    """Logical assistance agent"""
+    summary, start, fold_to = context_window(state)
+    if fold_to > start:
+        with model_slot("summary"):
+            summary = registry.get("summary_llm").invoke(summary_prompt(summary, state["messages"][start:fold_to])).content
+    with model_slot("logical"):
+        reply = registry.get("logical_llm").invoke(_build_messages(state, summary, fold_to))
+    return {"messages": [reply], "summary": summary, "summarized_count": fold_to}
 
-    for msg in state["messages"]:
-        if isinstance(msg, dict):
-            messages.append({"role": msg.get("role", "user"), "content": msg.get("content")})
-        else:
-            role = "assistant" if msg.type == "ai" else "user"
-            messages.append({"role": role, "content": msg.content})
-    
-    reply = llm.invoke(messages)
-    return {"messages": [{"role": "assistant", "content": reply.content}]}
\ No newline at end of file
+async def alogical_agent(state: State):
+    """Async logical assistance agent"""
+    summary, start, fold_to = context_window(state)
+    if fold_to > start:
+        async with amodel_slot("summary"):
+            summary = (await registry.get("summary_llm").ainvoke(summary_prompt(summary, state["messages"][start:fold_to]))).content
+    async with amodel_slot("logical"):
+        reply = await registry.get("logical_llm").ainvoke(_build_messages(state, summary, fold_to))
+    return {"messages": [reply], "summary": summary, "summarized_count": fold_to}
@@ -1,3 +1,5 @@
+from langgraph.types import Send
+from src.config.settings import settings
 from src.models.schemas import State
 
 def router(state: State):
@@ -7,4 +9,14 @@ def router(state: State):
         return {"next": "github"} 
     if message_type == "Github_user":  
         return {"next": "github_user"}   
-    return {"next": "logical"}
\ No newline at end of file
+    return {"next": "logical"}
+
+def route(state: State):
+    """Next node(s) after the router: one parallel analysis per target when the message names several
+
+    At most MAX_COMPARE_TARGETS are analysed; merge tells the user about the rest.
+    """
+    targets = state.get("targets") or []
+    if len(targets) > 1:
+        return [Send("analyze_target", {"target": target}) for target in targets[:settings.MAX_COMPARE_TARGETS]]
+    return router(state)["next"]
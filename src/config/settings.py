@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+import json
 import os
 
 load_dotenv()
@@ -9,9 +10,94 @@ class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-    LLM_MODEL = "gpt-4o"
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+    # Model used by each LLM call site; routing and summaries only need a small model
+    NODE_MODELS = {
+        "classifier": os.getenv("CLASSIFIER_MODEL", "gpt-4o-mini"),
+        "summary": os.getenv("SUMMARY_MODEL", "gpt-4o-mini"),
+        "logical": os.getenv("LOGICAL_MODEL", LLM_MODEL),
+        "github": os.getenv("GITHUB_MODEL", LLM_MODEL),
+        "github_user": os.getenv("GITHUB_USER_MODEL", LLM_MODEL),
+        "comparison": os.getenv("COMPARISON_MODEL", LLM_MODEL),
+    }
+    # Request timeout (seconds) and concurrent request limit per model, MODEL_LIMITS (JSON) overrides
+    DEFAULT_MODEL_LIMITS = {"timeout": 60.0, "max_concurrency": 8}
+    MODEL_LIMITS = {
+        "gpt-4o": {"timeout": 60.0, "max_concurrency": 8},
+        "gpt-4o-mini": {"timeout": 15.0, "max_concurrency": 32},
+        **json.loads(os.getenv("MODEL_LIMITS", "{}")),
+    }
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "32"))
     DATABASE_NAME = "chatbot_db"
     CONVERSATIONS_COLLECTION = "conversations"
     MESSAGES_COLLECTION = "messages"
+    ANALYSES_COLLECTION = "analyses"
+    MESSAGE_BUCKET_SIZE = int(os.getenv("MESSAGE_BUCKET_SIZE", "100"))
+    SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "0"))
+    # Seconds between deletions of the message buckets of expired sessions (with SESSION_TTL_SECONDS)
+    BUCKET_PRUNE_INTERVAL = int(os.getenv("BUCKET_PRUNE_INTERVAL", "3600"))
+    HISTORY_LOAD_LIMIT = int(os.getenv("HISTORY_LOAD_LIMIT", "50"))
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+    HISTORY_KEEP_TOKENS = int(os.getenv("HISTORY_KEEP_TOKENS", "2000"))
+    SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "250"))
+    SUMMARY_INPUT_MAX_CHARS = int(os.getenv("SUMMARY_INPUT_MAX_CHARS", "4000"))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+    WRITE_BEHIND_CLOSE_RETRIES = int(os.getenv("WRITE_BEHIND_CLOSE_RETRIES", "3"))
+    CLASSIFIER_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_FAST_PATH_MIN_CONFIDENCE", "0.9"))
+    CLASSIFIER_CACHE_TTL = int(os.getenv("CLASSIFIER_CACHE_TTL", "86400"))
+    CLASSIFIER_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFIER_CACHE_MAX_ENTRIES", "5000"))
+    CLASSIFIER_CACHE_MAX_BYTES = int(os.getenv("CLASSIFIER_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+    CLASSIFIER_CACHE_FILE = os.getenv("CLASSIFIER_CACHE_FILE")
+    CLASSIFIER_CACHE_SAVE_EVERY = int(os.getenv("CLASSIFIER_CACHE_SAVE_EVERY", "25"))
+    TELEGRAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.5"))
+    # Telegram conversations kept in memory (LRU and idle eviction, rehydrated from MongoDB)
+    SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "1000"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+    SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "3600"))
+    SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", str(2 * HISTORY_LOAD_LIMIT)))
+    MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", "8"))
+    MAX_QUEUE_PER_CHAT = int(os.getenv("MAX_QUEUE_PER_CHAT", "5"))
+    # Targets compared from one chat message (further ones are listed as skipped)
+    MAX_COMPARE_TARGETS = int(os.getenv("MAX_COMPARE_TARGETS", "5"))
+    # Targets analysed at once by batch_app
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    # Telegram user ids allowed to use admin commands such as /metrics
+    ADMIN_USER_IDS = {int(i) for i in os.getenv("ADMIN_USER_IDS", "").split(",") if i.strip()}
+    # Port of the Prometheus /metrics endpoint (0 disables it)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "32"))
+    GITHUB_MAX_INFLIGHT = int(os.getenv("GITHUB_MAX_INFLIGHT", "20"))
+    GITHUB_INTERACTIVE_RESERVE = int(os.getenv("GITHUB_INTERACTIVE_RESERVE", "500"))
+    GITHUB_MAX_WAIT = float(os.getenv("GITHUB_MAX_WAIT", "30"))
+    GITHUB_CALL_TIMEOUT = float(os.getenv("GITHUB_CALL_TIMEOUT", "10"))
+    GITHUB_FANOUT_WORKERS = int(os.getenv("GITHUB_FANOUT_WORKERS", "16"))
+    GITHUB_USER_FETCH_MODE = os.getenv("GITHUB_USER_FETCH_MODE", "graphql")
+    GITHUB_USER_MAX_REPOS = int(os.getenv("GITHUB_USER_MAX_REPOS", "100"))
+    REPO_INDEX_REFRESH = int(os.getenv("REPO_INDEX_REFRESH", "600"))
+    REPO_INDEX_MAX_AGE = int(os.getenv("REPO_INDEX_MAX_AGE", "86400"))
+    REPO_INDEX_MAX_OWNERS = int(os.getenv("REPO_INDEX_MAX_OWNERS", "256"))
+    # Organisation / user sweeps (/sweep): repos per page, cap (0 = all), progress interval
+    SWEEP_PAGE_SIZE = int(os.getenv("SWEEP_PAGE_SIZE", "100"))
+    SWEEP_MAX_REPOS = int(os.getenv("SWEEP_MAX_REPOS", "0"))
+    SWEEP_PROGRESS_EVERY = int(os.getenv("SWEEP_PROGRESS_EVERY", "100"))
+    SWEEP_STALE_DAYS = int(os.getenv("SWEEP_STALE_DAYS", "365"))
+    SWEEP_TOP_N = int(os.getenv("SWEEP_TOP_N", "10"))
+    ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600)))
+    GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", "300"))
+    GITHUB_CACHE_MAX_AGE = int(os.getenv("GITHUB_CACHE_MAX_AGE", "21600"))
+    GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "512"))
+    GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    def model_for(self, node: str) -> str:
+        """Model configured for an LLM call site (LLM_MODEL when not listed)"""
+        return self.NODE_MODELS.get(node, self.LLM_MODEL)
+
+    def model_limits(self, model: str) -> dict:
+        """Timeout and concurrency limit of a model"""
+        return {**self.DEFAULT_MODEL_LIMITS, **self.MODEL_LIMITS.get(model, {})}
 
 settings = Settings()
\ No newline at end of file
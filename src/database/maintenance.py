@@ -0,0 +1,31 @@
+import argparse
+from src.database.mongo_client import get_db_client
+
+
+def main():
+    """Print collection sizes and index usage, optionally pruning orphaned buckets"""
+    parser = argparse.ArgumentParser(description="Conversation storage maintenance")
+    parser.add_argument("--prune", action="store_true", help="delete message buckets of expired sessions")
+    args = parser.parse_args()
+    db_client = get_db_client()
+    db_client.ensure_indexes()
+
+    if args.prune:
+        print(f"🧹 Pruned {db_client.prune_orphan_buckets()} orphaned message buckets\n")
+
+    for name, stats in db_client.maintenance_report().items():
+        print("=" * 50)
+        print(f"📦 {name}")
+        print("=" * 50)
+        print(f"  Documents: {stats['documents']}")
+        print(f"  Data Size: {stats['data_bytes'] / 1024:.1f} KB")
+        print(f"  Storage Size: {stats['storage_bytes'] / 1024:.1f} KB")
+        print(f"  Index Size: {stats['index_bytes'] / 1024:.1f} KB")
+        print("  Index Usage:")
+        for index_name, usage in stats["indexes"].items():
+            print(f"    - {index_name}: {usage['operations']} ops since {usage['since']:%Y-%m-%d %H:%M}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
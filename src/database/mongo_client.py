@@ -1,70 +1,416 @@
-from pymongo import MongoClient
-from datetime import datetime, UTC
+from pymongo import ASCENDING, DeleteMany, MongoClient, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, OperationFailure
+from datetime import datetime, timedelta, UTC
 from src.config.settings import settings
+from src.utils.metrics import record_mongo_command
+from src.utils.registry import registry
+
+class CommandTimer(monitoring.CommandListener):
+    """Reports the duration of every MongoDB command to the metrics
+
+    pymongo publishes command events in the thread running the command, so
+    the time is attributed to the graph node that issued it.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_mongo_command(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record_mongo_command(event.command_name, event.duration_micros / 1e6)
+
 
 class MongoDBClient:
-    """MongoDB client for conversation storage"""
-    
+    """MongoDB client for conversation storage
+
+    Each session has a small header document in the conversations collection
+    and its messages in fixed-size bucket documents in the messages collection
+    ({session_id, bucket, messages, count}), so appending to or reading the tail
+    of a conversation never touches its full history.
+    """
+
     def __init__(self):
-        self.client = MongoClient(settings.MONGODB_URI)
+        self.client = MongoClient(settings.MONGODB_URI, event_listeners=[CommandTimer()])
         self.db = self.client[settings.DATABASE_NAME]
         self.conversations = self.db[settings.CONVERSATIONS_COLLECTION]
         self.messages = self.db[settings.MESSAGES_COLLECTION]
-    
-    def save_conversation(self, state, session_id: str):
-        """Save conversation state to MongoDB"""
-        conversation_data = {
-            "session_id": session_id,
-            "message_type": state.get("message_type"),
-            "timestamp": datetime.now(UTC),
-            "messages": []
-        }
-        
-        for msg in state["messages"]:
-            if isinstance(msg, dict):
-                message_entry = {
-                    "role": msg.get("role", "user"),
-                    "content": msg.get("content"),
-                    "timestamp": datetime.now(UTC)
-                }
-            else:
-                role = "assistant" if msg.type == "ai" else "user"
-                message_entry = {
-                    "role": role,
-                    "content": msg.content,
-                    "timestamp": datetime.now(UTC)
-                }
-            conversation_data["messages"].append(message_entry)
-        
+        self.analyses = self.db[settings.ANALYSES_COLLECTION]
+        self.bucket_size = settings.MESSAGE_BUCKET_SIZE
+        # Messages stored per session, and how many of the in-memory state's
+        # messages are already persisted (they differ when only a tail was loaded)
+        self._message_counts: dict[str, int] = {}
+        self._synced_counts: dict[str, int] = {}
+
+    def _ensure_index(self, collection, keys, name: str, **options):
+        """Create an index, replacing an existing one of the same name with other options"""
+        try:
+            collection.create_index(keys, name=name, **options)
+        except OperationFailure as e:
+            # 85 IndexOptionsConflict / 86 IndexKeySpecsConflict: e.g. the TTL setting changed
+            if e.code not in (85, 86):
+                raise
+            collection.drop_index(name)
+            collection.create_index(keys, name=name, **options)
+
+    def ensure_indexes(self):
+        """Declare the indexes every query relies on (called once by each app at startup)
+
+        - conversations.session_id (unique): header lookups and updates
+        - conversations.timestamp: last activity; a TTL index expiring idle
+          sessions when SESSION_TTL_SECONDS is set
+        - messages.(session_id, bucket) (unique): bucket appends and tail reads
+        - messages.last_activity: when a bucket was last written; finds the
+          buckets of idle sessions whose expired header they outlived
+        - analyses.expires_at: TTL index removing expired cached analyses
+        """
+        self._ensure_index(self.conversations, [("session_id", ASCENDING)], "session_id_unique", unique=True)
+        if settings.SESSION_TTL_SECONDS:
+            self._ensure_index(
+                self.conversations,
+                [("timestamp", ASCENDING)],
+                "last_activity",
+                expireAfterSeconds=settings.SESSION_TTL_SECONDS,
+            )
+        else:
+            self._ensure_index(self.conversations, [("timestamp", ASCENDING)], "last_activity")
+        self._ensure_index(
+            self.messages,
+            [("session_id", ASCENDING), ("bucket", ASCENDING)],
+            "session_bucket_unique",
+            unique=True,
+        )
+        # Not a TTL index: an active session's older buckets are not rewritten
+        self._ensure_index(self.messages, [("last_activity", ASCENDING)], "bucket_last_activity")
+        self._ensure_index(self.analyses, [("expires_at", ASCENDING)], "analysis_expiry", expireAfterSeconds=0)
+
+    def _message_entry(self, msg, timestamp):
+        """Convert a dict or LangChain message into a stored message entry"""
+        if isinstance(msg, dict):
+            role = msg.get("role", "user")
+            content = msg.get("content")
+        else:
+            role = "assistant" if msg.type == "ai" else "user"
+            content = msg.content
+        return {"role": role, "content": content, "timestamp": timestamp}
+
+    def _bucket_operations(self, session_id: str, entries: list, start: int, now) -> list:
+        """Bucket writes that store entries at message positions start, start + 1, ...
+
+        Each write replaces a bucket's messages from the chunk's offset on
+        instead of pushing, so repeating it (a flush retried after a partial
+        failure) leaves the buckets as they were. Only the written buckets get
+        their last_activity set to now.
+        """
+        operations = []
+        position = start
+        while entries:
+            bucket = position // self.bucket_size
+            offset = position % self.bucket_size
+            chunk, entries = entries[:self.bucket_size - offset], entries[self.bucket_size - offset:]
+            # $literal: message contents starting with "$" are not field paths
+            messages = {"$literal": chunk}
+            if offset:
+                messages = {"$concatArrays": [{"$slice": [{"$ifNull": ["$messages", []]}, offset]}, messages]}
+            operations.append(UpdateOne(
+                {"session_id": session_id, "bucket": bucket},
+                [{"$set": {"messages": messages, "count": offset + len(chunk), "last_activity": now}}],
+                upsert=True,
+            ))
+            position += len(chunk)
+        return operations
+
+    def _migrate_legacy(self, session_id: str, conversation) -> int:
+        """Move messages embedded in an old-style conversation document into buckets"""
+        legacy_messages = conversation.get("messages") or []
+        self.messages.delete_many({"session_id": session_id})
+        operations = self._bucket_operations(session_id, legacy_messages, 0, datetime.now(UTC))
+        if operations:
+            self.messages.bulk_write(operations, ordered=True)
         self.conversations.update_one(
             {"session_id": session_id},
-            {"$set": conversation_data},
-            upsert=True
+            {"$set": {"message_count": len(legacy_messages)}, "$unset": {"messages": ""}},
         )
-    
-    def load_conversation(self, session_id: str):
-        """Load conversation from MongoDB"""
-        return self.conversations.find_one({"session_id": session_id})
-    
+        return len(legacy_messages)
+
+    def _message_count(self, session_id: str) -> int:
+        """Number of messages stored for a session (read once, then tracked)"""
+        if session_id not in self._message_counts:
+            header = self.conversations.find_one({"session_id": session_id}, {"message_count": 1, "stats.total": 1})
+            if header is None:
+                # Drop buckets left behind by a header that expired via TTL
+                self.messages.delete_many({"session_id": session_id})
+                count = 0
+            elif "message_count" in header:
+                count = header["message_count"]
+            else:
+                count = self._migrate_legacy(session_id, self.conversations.find_one({"session_id": session_id}))
+            if header is not None and "stats" not in header:
+                self._backfill_stats(session_id)
+            self._message_counts[session_id] = count
+        return self._message_counts[session_id]
+
+    def _backfill_stats(self, session_id: str):
+        """Build the counters of a session stored before they were maintained (one bucket scan)"""
+        stats = {"total": 0, "user": 0, "assistant": 0, "routes": {}, "llm_tokens": 0}
+        for bucket in self.messages.find({"session_id": session_id}, {"messages.role": 1}):
+            for msg in bucket["messages"]:
+                stats["total"] += 1
+                stats[msg["role"]] = stats.get(msg["role"], 0) + 1
+        self.conversations.update_one({"session_id": session_id}, {"$set": {"stats": stats}})
+
+    def _stats_increments(self, state, new_messages: list, entries: list) -> dict:
+        """$inc document for the counters of one saved turn"""
+        increments = {
+            "stats.total": len(entries),
+            "stats.user": sum(1 for entry in entries if entry["role"] == "user"),
+            "stats.assistant": sum(1 for entry in entries if entry["role"] == "assistant"),
+            "stats.llm_tokens": sum(
+                (getattr(msg, "usage_metadata", None) or {}).get("total_tokens", 0)
+                for msg in new_messages
+            ),
+        }
+        if entries:
+            # A write-behind snapshot may cover several coalesced turns
+            routes = state.get("routes") or ({state["message_type"]: 1} if state.get("message_type") else {})
+            for route, turns in routes.items():
+                increments[f"stats.routes.{route}"] = turns
+        return increments
+
+    def _turn_operations(self, state, session_id: str, now):
+        """Build the writes that persist the messages a session gained since its last save
+
+        Returns:
+            (bucket operations, header operations, stored message count, synced message count)
+        """
+        messages = state["messages"]
+        count = self._message_count(session_id)
+        synced = self._synced_counts.get(session_id, 0)
+        bucket_ops, header_ops = [], []
+
+        if len(messages) < synced:
+            bucket_ops.append(DeleteMany({"session_id": session_id}))
+            header_ops.append(UpdateOne({"session_id": session_id}, {"$unset": {"stats": ""}}))
+            count, synced = 0, 0
+
+        new_messages = messages[synced:]
+        new_entries = [self._message_entry(msg, now) for msg in new_messages]
+        bucket_ops += self._bucket_operations(session_id, new_entries, count, now)
+        header_ops.append(UpdateOne(
+            {"session_id": session_id},
+            {
+                "$set": {
+                    "message_type": state.get("message_type"),
+                    "timestamp": now,
+                    "message_count": count + len(new_entries),
+                },
+                "$inc": self._stats_increments(state, new_messages, new_entries),
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        ))
+        return bucket_ops, header_ops, count + len(new_entries), len(messages)
+
+    def save_conversations(self, turns: list):
+        """Save the state of several sessions with one bulk_write per collection
+
+        Args:
+            turns: (state, session_id) pairs, at most one per session
+        """
+        now = datetime.now(UTC)
+        bucket_ops, header_ops, counts = [], [], {}
+        for state, session_id in turns:
+            buckets, headers, count, synced = self._turn_operations(state, session_id, now)
+            bucket_ops += buckets
+            header_ops += headers
+            # A session's turn is saved once its last header write is applied
+            counts[session_id] = (count, synced, len(header_ops))
+
+        if bucket_ops:
+            self.messages.bulk_write(bucket_ops, ordered=True)
+        applied = len(header_ops)
+        try:
+            if header_ops:
+                self.conversations.bulk_write(header_ops, ordered=True)
+        except BulkWriteError as e:
+            # Ordered: the writes before the first failed one were applied
+            applied = min(error["index"] for error in e.details.get("writeErrors") or [{"index": 0}])
+            raise
+        except Exception:
+            applied = 0
+            raise
+        finally:
+            # Sessions not advanced here are retried in full; their bucket writes are idempotent
+            for session_id, (count, synced, header_end) in counts.items():
+                if header_end <= applied:
+                    self._message_counts[session_id] = count
+                    self._synced_counts[session_id] = synced
+
+    def save_conversation(self, state, session_id: str):
+        """Save conversation state to MongoDB
+
+        Only messages added since the last save or load are appended, so earlier
+        messages keep their original timestamps and each turn costs a
+        constant-size write. Per-session counters (messages per role, turns per
+        route, LLM tokens) are updated in the same header write. If the in-memory
+        history shrank instead, the stored history and counters are replaced.
+        """
+        self.save_conversations([(state, session_id)])
+
+    def load_conversation(self, session_id: str, limit: int | None = None):
+        """Load conversation from MongoDB
+
+        Args:
+            session_id: Session to load
+            limit: Only load the last `limit` messages (all when None)
+
+        Returns:
+            Header document with a "messages" list, or None
+        """
+        conversation = self.conversations.find_one({"session_id": session_id}, {"_id": 0})
+        if conversation is None:
+            self.messages.delete_many({"session_id": session_id})
+            self._message_counts[session_id] = 0
+            self._synced_counts[session_id] = 0
+            return None
+        if "message_count" not in conversation:
+            conversation["message_count"] = self._migrate_legacy(session_id, conversation)
+            conversation.pop("messages", None)
+
+        count = conversation["message_count"]
+        query = {"session_id": session_id}
+        if limit is not None:
+            query["bucket"] = {"$gte": max(0, count - limit) // self.bucket_size}
+        messages = []
+        for bucket in self.messages.find(query, {"messages": 1}).sort("bucket", 1):
+            messages.extend(bucket["messages"])
+        if limit is not None:
+            messages = messages[-limit:] if limit else []
+
+        conversation["messages"] = messages
+        self._message_counts[session_id] = count
+        self._synced_counts[session_id] = len(messages)
+        return conversation
+
     def clear_conversation(self, session_id: str):
         """Clear conversation history"""
         self.conversations.delete_one({"session_id": session_id})
-    
+        self.messages.delete_many({"session_id": session_id})
+        self._message_counts[session_id] = 0
+        self._synced_counts[session_id] = 0
+
     def get_conversation_stats(self, session_id: str):
-        """Get conversation statistics"""
-        conversation = self.conversations.find_one({"session_id": session_id})
-        
-        if conversation and conversation.get("messages"):
-            total_messages = len(conversation["messages"])
-            user_messages = sum(1 for msg in conversation["messages"] if msg["role"] == "user")
-            assistant_messages = sum(1 for msg in conversation["messages"] if msg["role"] == "assistant")
-            
-            return {
-                "total_messages": total_messages,
-                "user_messages": user_messages,
-                "assistant_messages": assistant_messages,
-                "session_id": session_id
+        """Get conversation statistics from the session's counters (a single point read)"""
+        self._message_count(session_id)
+        header = self.conversations.find_one({"session_id": session_id}, {"stats": 1, "timestamp": 1})
+        if not header or not header.get("stats", {}).get("total"):
+            return None
+
+        stats = header["stats"]
+        return {
+            "total_messages": stats["total"],
+            "user_messages": stats.get("user", 0),
+            "assistant_messages": stats.get("assistant", 0),
+            "routes": stats.get("routes", {}),
+            "llm_tokens": stats.get("llm_tokens", 0),
+            "last_activity": header.get("timestamp"),
+            "session_id": session_id
+        }
+
+    def get_analysis(self, fingerprint: str):
+        """Return the cached analysis stored under a fingerprint, if not expired"""
+        doc = self.analyses.find_one(
+            {"_id": fingerprint, "expires_at": {"$gt": datetime.now(UTC)}},
+            {"content": 1},
+        )
+        return doc["content"] if doc else None
+
+    def store_analysis(self, fingerprint: str, content: str, ttl: int):
+        """Cache an analysis under its fingerprint for ttl seconds"""
+        now = datetime.now(UTC)
+        self.analyses.replace_one(
+            {"_id": fingerprint},
+            {
+                "content": content,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            },
+            upsert=True,
+        )
+
+    def get_global_stats(self):
+        """Aggregate the counters of all sessions"""
+        pipeline = [
+            {"$group": {
+                "_id": None,
+                "sessions": {"$sum": 1},
+                "total_messages": {"$sum": "$stats.total"},
+                "user_messages": {"$sum": "$stats.user"},
+                "assistant_messages": {"$sum": "$stats.assistant"},
+                "llm_tokens": {"$sum": "$stats.llm_tokens"},
+                "github_turns": {"$sum": "$stats.routes.Github"},
+                "github_user_turns": {"$sum": "$stats.routes.Github_user"},
+                "logical_turns": {"$sum": "$stats.routes.logical"},
+                "last_activity": {"$max": "$timestamp"},
+            }},
+            {"$project": {"_id": 0}},
+        ]
+        return next(self.conversations.aggregate(pipeline), None)
+
+    def prune_orphan_buckets(self, idle_seconds: float | None = None) -> int:
+        """Delete message buckets whose session header no longer exists (e.g. expired)
+
+        Args:
+            idle_seconds: Only consider sessions with a bucket not written for
+                this long (all sessions when None). A header expiring via TTL
+                outlives its session's last written bucket, so passing
+                SESSION_TTL_SECONDS finds every expired session.
+        """
+        query = {}
+        if idle_seconds is not None:
+            query["last_activity"] = {"$lt": datetime.now(UTC) - timedelta(seconds=idle_seconds)}
+        candidates = self.messages.distinct("session_id", query)
+        if not candidates:
+            return 0
+        live_sessions = set(self.conversations.distinct("session_id", {"session_id": {"$in": candidates}}))
+        orphaned = [sid for sid in candidates if sid not in live_sessions]
+        if not orphaned:
+            return 0
+        for session_id in orphaned:
+            self._message_counts.pop(session_id, None)
+            self._synced_counts.pop(session_id, None)
+        return self.messages.delete_many({"session_id": {"$in": orphaned}}).deleted_count
+
+    def maintenance_report(self):
+        """Report document counts, storage size and index usage per collection"""
+        report = {}
+        for collection in (self.conversations, self.messages, self.analyses):
+            storage = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]), {}).get("storageStats", {})
+            report[collection.name] = {
+                "documents": storage.get("count", 0),
+                "data_bytes": storage.get("size", 0),
+                "storage_bytes": storage.get("storageSize", 0),
+                "index_bytes": storage.get("totalIndexSize", 0),
+                "indexes": {
+                    stats["name"]: {
+                        "operations": stats["accesses"]["ops"],
+                        "since": stats["accesses"]["since"],
+                    }
+                    for stats in collection.aggregate([{"$indexStats": {}}])
+                },
             }
-        return None
+        return report
+
+registry.register("db_client", MongoDBClient)
+
+def get_db_client() -> MongoDBClient:
+    """Return the process-wide client, connecting on first use"""
+    return registry.get("db_client")
+
+def __getattr__(name):
+    # Kept for `from src.database.mongo_client import db_client`
+    if name == "db_client":
+        return get_db_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-db_client = MongoDBClient()
\ No newline at end of file
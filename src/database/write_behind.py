@@ -0,0 +1,215 @@
+import atexit
+import threading
+import time
+from src.config.settings import settings
+from src.database.mongo_client import MongoDBClient, get_db_client
+
+
+class WriteBehindQueue:
+    """Persists conversation turns off the request path
+
+    enqueue() only records a snapshot of the session's state; a background
+    thread writes the pending sessions with MongoDBClient.save_conversations
+    once batch_size sessions are pending or flush_interval seconds have passed.
+    A session enqueued again before its flush replaces its pending snapshot:
+    a save appends every message not stored yet, so the newer snapshot covers
+    both turns.
+
+    Every conversation call of the client goes through this queue (flushes,
+    loads, clears, stats), serialised by one lock, so reads see all enqueued
+    turns and the client's per-session counts are only touched under the lock.
+    With prune_interval set, the flush thread also deletes the message buckets
+    of expired sessions that often.
+    """
+
+    def __init__(self, client: MongoDBClient | None, batch_size: int, flush_interval: float,
+                 prune_interval: float = 0):
+        self._client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self._last_prune = time.monotonic()
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_turns = 0
+        self.errors = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.pruned_buckets = 0
+
+    @property
+    def client(self) -> MongoDBClient:
+        """The given client, or the process-wide one (only connected once something is written or read)"""
+        return self._client or get_db_client()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.prune_interval and time.monotonic() - self._last_prune >= self.prune_interval:
+                self.prune()
+
+    def enqueue(self, state, session_id: str):
+        """Schedule a session's state for saving (returns immediately)"""
+        message_type = state.get("message_type")
+        snapshot = {
+            "messages": list(state["messages"]),
+            "message_type": message_type,
+            "routes": {message_type: 1} if message_type else {},
+        }
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                previous = self._pending.get(session_id)
+                if previous:
+                    self.coalesced += 1
+                    for route, turns in previous["routes"].items():
+                        snapshot["routes"][route] = snapshot["routes"].get(route, 0) + turns
+                self._pending[session_id] = snapshot
+                self.enqueued += 1
+                if len(self._pending) >= self.batch_size:
+                    self._wake.set()
+        if closed:
+            # Late turn after shutdown started: write it through
+            with self._db_lock:
+                self.client.save_conversation(snapshot, session_id)
+            return
+        self._ensure_thread()
+
+    def flush(self, session_id: str | None = None) -> int:
+        """Write pending turns now
+
+        Args:
+            session_id: Only flush this session (all sessions when None)
+
+        Returns:
+            Number of sessions written
+        """
+        with self._db_lock:
+            return self._flush_locked(session_id)
+
+    def _flush_locked(self, session_id: str | None = None) -> int:
+        with self._lock:
+            if session_id is None:
+                batch, self._pending = self._pending, {}
+            elif session_id in self._pending:
+                batch = {session_id: self._pending.pop(session_id)}
+            else:
+                batch = {}
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            self.client.save_conversations([(state, sid) for sid, state in batch.items()])
+        except Exception as e:
+            print(f"Error flushing {len(batch)} conversations: {e}")
+            with self._lock:
+                self.errors += 1
+                for sid, state in batch.items():
+                    newer = self._pending.get(sid)
+                    if newer:
+                        # Keep the newer snapshot, counting the failed batch's turns in it
+                        for route, turns in state["routes"].items():
+                            newer["routes"][route] = newer["routes"].get(route, 0) + turns
+                    else:
+                        self._pending[sid] = state
+            return 0
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.flushes += 1
+            self.flushed_turns += sum(max(1, sum(state["routes"].values())) for state in batch.values())
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        return len(batch)
+
+    def load_conversation(self, session_id: str, limit: int | None = None):
+        """Flush the session's pending turn, then load it (see MongoDBClient.load_conversation)"""
+        with self._db_lock:
+            self._flush_locked(session_id)
+            return self.client.load_conversation(session_id, limit=limit)
+
+    def get_conversation_stats(self, session_id: str):
+        """Flush the session's pending turn, then read its counters (see MongoDBClient.get_conversation_stats)"""
+        with self._db_lock:
+            self._flush_locked(session_id)
+            return self.client.get_conversation_stats(session_id)
+
+    def clear_conversation(self, session_id: str):
+        """Drop the session's pending turn and clear its stored history"""
+        with self._db_lock:
+            with self._lock:
+                self._pending.pop(session_id, None)
+            self.client.clear_conversation(session_id)
+
+    def prune(self) -> int:
+        """Delete the message buckets of sessions whose header expired (see MongoDBClient.prune_orphan_buckets)"""
+        self._last_prune = time.monotonic()
+        try:
+            with self._db_lock:
+                pruned = self.client.prune_orphan_buckets(settings.SESSION_TTL_SECONDS or None)
+        except Exception as e:
+            print(f"Error pruning orphaned message buckets: {e}")
+            return 0
+        with self._lock:
+            self.pruned_buckets += pruned
+        return pruned
+
+    def close(self, retries: int = settings.WRITE_BEHIND_CLOSE_RETRIES):
+        """Stop the flush thread and write everything still pending"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+
+        for _ in range(retries):
+            self.flush()
+            if not self._pending:
+                return
+        print(f"❌ Could not save {len(self._pending)} conversations on shutdown")
+
+    def stats(self):
+        """Get queue depth and flush metrics"""
+        with self._lock:
+            return {
+                "pending_sessions": len(self._pending),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "flushed_turns": self.flushed_turns,
+                "errors": self.errors,
+                "pruned_buckets": self.pruned_buckets,
+                "last_flush_seconds": self.last_flush_seconds,
+                "avg_flush_seconds": self.flush_seconds / self.flushes if self.flushes else 0.0,
+                "max_flush_seconds": self.max_flush_seconds,
+            }
+
+
+write_queue = WriteBehindQueue(
+    None,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+    prune_interval=settings.BUCKET_PRUNE_INTERVAL if settings.SESSION_TTL_SECONDS else 0,
+)
+atexit.register(write_queue.close)
@@ -4,6 +4,21 @@ from typing_extensions import TypedDict
 from typing import Annotated
 from langgraph.graph.message import add_messages
 
+class Target(BaseModel):
+    """A repository or user named in a message"""
+    kind: Literal["Github", "Github_user"] = Field(
+        ...,
+        description="'Github' for a repository, 'Github_user' for a user profile",
+    )
+    username: str = Field(
+        ...,
+        description="GitHub username (the repository owner for 'Github')",
+    )
+    repo_name: str | None = Field(
+        default=None,
+        description="Repository name for 'Github', null for 'Github_user'",
+    )
+
 class MessageClassifier(BaseModel):
     """Schema for message classification and extraction"""
     message_type: Literal["Github","Github_user", "logical"] = Field(
@@ -18,10 +33,25 @@ class MessageClassifier(BaseModel):
         default=None,
         description="GitHub repository name when message_type is 'Github'",
     )
+    targets: list[Target] = Field(
+        default_factory=list,
+        description="Every repository/user to analyse when the message names more than one (e.g. a comparison), in the order mentioned; empty otherwise",
+    )
+
+def merge_analyses(left: list | None, right: list | None) -> list:
+    """Reducer of the per-target analyses: branches append, None starts a new turn"""
+    if right is None:
+        return []
+    return (left or []) + right
 
 class State(TypedDict):
     """State schema for the graph"""
     messages: Annotated[list, add_messages]
     message_type: str | None
     username: str | None
-    repo_name: str | None
\ No newline at end of file
+    repo_name: str | None
+    summary: str | None
+    summarized_count: int
+    # Targets of a multi-target message (analysed in parallel) and their analyses
+    targets: list[dict] | None
+    analyses: Annotated[list, merge_analyses]
\ No newline at end of file
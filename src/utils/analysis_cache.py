@@ -0,0 +1,49 @@
+import hashlib
+import json
+from src.config.settings import settings
+from src.database.mongo_client import get_db_client
+
+analysis_stats = {"hits": 0, "misses": 0}
+
+
+def analysis_fingerprint(node: str, snapshot: dict, prompt_version: int) -> str:
+    """Cache key of an analysis
+
+    Args:
+        node: Agent producing the analysis ("github" or "github_user")
+        snapshot: Fields identifying the analysed data and when it last changed
+            (e.g. full_name and pushed_at), not the fast-moving counters
+        prompt_version: Version of the agent's prompt
+
+    Returns:
+        SHA-256 of the snapshot, the node's model name and the prompt version
+    """
+    payload = json.dumps(
+        {"node": node, "snapshot": snapshot, "model": settings.model_for(node), "prompt_version": prompt_version},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_analysis(fingerprint: str) -> str | None:
+    """Return the stored analysis for a fingerprint (None when disabled, missing or unreadable)"""
+    if not settings.ANALYSIS_CACHE_TTL:
+        return None
+    try:
+        content = get_db_client().get_analysis(fingerprint)
+    except Exception as e:
+        print(f"Error reading analysis cache: {e}")
+        content = None
+    analysis_stats["hits" if content else "misses"] += 1
+    return content
+
+
+def store_analysis(fingerprint: str, content: str):
+    """Store an analysis for ANALYSIS_CACHE_TTL seconds"""
+    if not settings.ANALYSIS_CACHE_TTL or not content:
+        return
+    try:
+        get_db_client().store_analysis(fingerprint, content, settings.ANALYSIS_CACHE_TTL)
+    except Exception as e:
+        print(f"Error writing analysis cache: {e}")
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its freshness metadata"""
+    value: object
+    size: int
+    stored_at: float
+    expires_at: float
+    etag: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class TTLCache:
+    """Thread-safe cache with per-entry TTL and LRU eviction under an entry and byte cap
+    
+    Expired entries are kept (until evicted) so callers can revalidate them with
+    their ETag instead of refetching.
+    """
+    
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _size_of(value) -> int:
+        """Approximate memory footprint by serialised size"""
+        return len(json.dumps(value, default=str))
+    
+    def peek(self, key: str) -> CacheEntry | None:
+        """Return the entry for a key, fresh or stale, and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def get(self, key: str):
+        """Return a fresh cached value or None, updating hit/miss counters"""
+        entry = self.peek(key)
+        with self._lock:
+            if entry and entry.fresh:
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value, etag: str | None = None, ttl: float | None = None):
+        """Store a value, evicting least recently used entries to respect the caps"""
+        size = self._size_of(value)
+        now = time.monotonic()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old.size
+            if size > self.max_bytes:
+                return
+            self._entries[key] = CacheEntry(value, size, now, now + ttl, etag)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+    
+    def refresh(self, key: str):
+        """Extend the TTL of an entry after a successful revalidation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry.expires_at = time.monotonic() + self.ttl
+                self.revalidations += 1
+    
+    def invalidate(self, key: str):
+        """Drop a single entry"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry.size
+    
+    def snapshot(self) -> list[tuple[str, CacheEntry]]:
+        """Return the current entries, least recently used first"""
+        with self._lock:
+            return list(self._entries.items())
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,102 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from src.config.settings import settings
+from src.utils.cache import TTLCache
+
+classification_cache = TTLCache(
+    ttl=settings.CLASSIFIER_CACHE_TTL,
+    max_entries=settings.CLASSIFIER_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CLASSIFIER_CACHE_MAX_BYTES,
+)
+
+_unsaved = 0
+_save_lock = threading.Lock()
+_save_thread: threading.Thread | None = None
+
+
+def normalise_text(text: str) -> str:
+    """Cache key for a message: lowercased, whitespace collapsed, trailing punctuation dropped"""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip(".!?")
+
+
+def get_classification(text: str) -> dict | None:
+    """Return the cached classification for a message, if any"""
+    return classification_cache.get(normalise_text(text))
+
+
+def store_classification(text: str, result: dict):
+    """Cache a classification and persist the cache every CLASSIFIER_CACHE_SAVE_EVERY inserts
+
+    The save runs in a background thread, so callers on the event loop do not
+    wait for the file to be written.
+    """
+    global _unsaved, _save_thread
+    classification_cache.set(normalise_text(text), result)
+    if not settings.CLASSIFIER_CACHE_FILE:
+        return
+    with _save_lock:
+        _unsaved += 1
+        if _unsaved < settings.CLASSIFIER_CACHE_SAVE_EVERY or (_save_thread and _save_thread.is_alive()):
+            return
+        _unsaved = 0
+        _save_thread = threading.Thread(target=save_cache, name="classification-cache-save", daemon=True)
+        _save_thread.start()
+
+
+def save_cache():
+    """Write unexpired entries to CLASSIFIER_CACHE_FILE with wall-clock expiry times
+
+    Entries go to a temporary file renamed over the cache file, so a crash
+    mid-save leaves the previous file intact.
+    """
+    path = settings.CLASSIFIER_CACHE_FILE
+    if not path:
+        return
+    thread = _save_thread
+    if thread and thread.is_alive() and thread is not threading.current_thread():
+        # Shutdown: let the background save finish instead of racing it
+        thread.join()
+    now_mono, now_wall = time.monotonic(), time.time()
+    entries = [
+        {"key": key, "value": entry.value, "expires_at": now_wall + entry.expires_at - now_mono}
+        for key, entry in classification_cache.snapshot()
+        if entry.fresh
+    ]
+    # One temporary file per process, as several apps may share the cache file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error saving classification cache: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_cache():
+    """Load unexpired entries from CLASSIFIER_CACHE_FILE, oldest first to keep LRU order"""
+    path = settings.CLASSIFIER_CACHE_FILE
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading classification cache: {e}")
+        return
+    now = time.time()
+    for entry in entries:
+        remaining = entry["expires_at"] - now
+        if remaining > 0:
+            classification_cache.set(entry["key"], entry["value"], ttl=remaining)
+
+
+load_cache()
+atexit.register(save_cache)
@@ -0,0 +1,52 @@
+import time
+from src.config.settings import settings
+from src.utils.cache import TTLCache
+from src.utils.github_client import get_github
+
+github_cache = TTLCache(
+    ttl=settings.GITHUB_CACHE_TTL,
+    max_entries=settings.GITHUB_CACHE_MAX_ENTRIES,
+    max_bytes=settings.GITHUB_CACHE_MAX_BYTES,
+)
+
+
+def _not_modified(url: str, etag: str) -> bool:
+    """Send a conditional GET; a 304 does not count against the rate limit"""
+    try:
+        g = get_github()
+        status, _, _ = g.requester.requestJson("GET", url, headers={"If-None-Match": etag})
+        return status == 304
+    except Exception as e:
+        print(f"Error revalidating {url}: {e}")
+        return False
+
+
+def cached_fetch(key: str, url: str, fetch):
+    """Return cached GitHub data, revalidating stale entries with their ETag
+    
+    Args:
+        key: Cache key
+        url: API path whose ETag guards the cached data (e.g. "/repos/owner/repo")
+        fetch: Callable returning (data, etag) on a miss; exceptions propagate
+    
+    Returns:
+        The cached or freshly fetched data. Treat it as read-only, it is shared.
+    """
+    value = github_cache.get(key)
+    if value is not None:
+        return value
+    
+    entry = github_cache.peek(key)
+    if (
+        entry
+        and entry.etag
+        and time.monotonic() - entry.stored_at < settings.GITHUB_CACHE_MAX_AGE
+        and _not_modified(url, entry.etag)
+    ):
+        github_cache.refresh(key)
+        return entry.value
+    
+    data, etag = fetch()
+    if data is not None:
+        github_cache.set(key, data, etag)
+    return data
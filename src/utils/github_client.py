@@ -0,0 +1,262 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+from github import Auth, Github
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+from src.config.settings import settings
+from src.utils.metrics import record_github_request
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority: ContextVar[str] = ContextVar("github_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def github_priority(priority: str):
+    """Run the enclosed GitHub calls with the given governor priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _resource_for(url: str) -> str:
+    """Map a request path to the rate-limit bucket GitHub charges it to"""
+    if "/graphql" in url:
+        return "graphql"
+    if "/search/" in url:
+        return "search"
+    return "core"
+
+
+class RateLimitGovernor:
+    """Paces GitHub requests from the rate-limit headers of previous responses
+
+    Interactive requests may spend the whole budget; background requests leave
+    GITHUB_INTERACTIVE_RESERVE requests untouched and are spread evenly over the
+    time left until the window resets. A secondary-limit response (Retry-After,
+    or a 403/429 with no remaining budget) blocks all requests until it expires.
+    """
+
+    def __init__(self, reserve: int, max_inflight: int, max_wait: float):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+        self._buckets: dict[str, dict] = {}
+        self._blocked_until = 0.0
+        self._last_background = 0.0
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.secondary_limit_hits = 0
+
+    def _delay(self, resource: str, priority: str, now: float) -> float:
+        """Seconds to wait before the next request, reserving budget when it is zero"""
+        delay = max(0.0, self._blocked_until - now)
+        bucket = self._buckets.get(resource)
+        if not bucket or bucket["reset"] <= now:
+            return delay
+
+        window = bucket["reset"] - now
+        floor = self.reserve if priority == BACKGROUND else 0
+        spendable = bucket["remaining"] - floor
+        if spendable <= 0:
+            return max(delay, window)
+        if priority == BACKGROUND:
+            interval = window / spendable
+            delay = max(delay, self._last_background + interval - now)
+        if delay <= 0:
+            bucket["remaining"] -= 1
+        return delay
+
+    def before_request(self, url: str):
+        """Block until the request fits the budget (interactive waits are capped)"""
+        resource = _resource_for(url)
+        priority = _priority.get()
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = self._delay(resource, priority, now)
+                if delay <= 0 or (priority == INTERACTIVE and waited >= self.max_wait):
+                    if priority == BACKGROUND:
+                        self._last_background = now
+                    self.requests += 1
+                    if waited:
+                        self.waits += 1
+                        self.wait_seconds += waited
+                    break
+            if priority == INTERACTIVE:
+                delay = min(delay, self.max_wait - waited)
+            time.sleep(delay)
+            waited += delay
+        self._inflight.acquire()
+
+    def after_response(self, status: int | None, headers):
+        """Record the budget reported by GitHub and any secondary-limit backoff"""
+        self._inflight.release()
+        if headers is None:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        with self._lock:
+            if "x-ratelimit-remaining" in headers and "x-ratelimit-reset" in headers:
+                self._buckets[headers.get("x-ratelimit-resource", "core")] = {
+                    "remaining": int(float(headers["x-ratelimit-remaining"])),
+                    "limit": int(float(headers.get("x-ratelimit-limit", 0))),
+                    "reset": float(headers["x-ratelimit-reset"]),
+                }
+            if status in (403, 429):
+                if "retry-after" in headers:
+                    self._blocked_until = max(self._blocked_until, now + float(headers["retry-after"]))
+                    self.secondary_limit_hits += 1
+                elif headers.get("x-ratelimit-remaining") == "0":
+                    self._blocked_until = max(self._blocked_until, float(headers.get("x-ratelimit-reset", now)))
+
+    def stats(self):
+        """Get remaining budget per resource and pacing counters"""
+        now = time.time()
+        with self._lock:
+            return {
+                "resources": {
+                    name: {
+                        "remaining": bucket["remaining"],
+                        "limit": bucket["limit"],
+                        "reset_in_seconds": max(0, int(bucket["reset"] - now)),
+                    }
+                    for name, bucket in self._buckets.items()
+                },
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "secondary_limit_hits": self.secondary_limit_hits,
+                "blocked_for_seconds": max(0.0, self._blocked_until - now),
+            }
+
+
+governor = RateLimitGovernor(
+    reserve=settings.GITHUB_INTERACTIVE_RESERVE,
+    max_inflight=settings.GITHUB_MAX_INFLIGHT,
+    max_wait=settings.GITHUB_MAX_WAIT,
+)
+
+
+def _record_response(url: str, started: float, response):
+    """Report a request's latency and response size to the metrics"""
+    size = len(response.response.content or b"") if response is not None else 0
+    record_github_request(_resource_for(url), time.perf_counter() - started, size)
+
+
+class MeasuredConnection(HTTPRequestsConnectionClass):
+    """Plain HTTP connection (e.g. a local API stand-in) that reports to the metrics"""
+
+    def getresponse(self):
+        response = None
+        started = time.perf_counter()
+        try:
+            response = super().getresponse()
+            return response
+        finally:
+            _record_response(self.url, started, response)
+
+
+class GovernedConnection(HTTPSRequestsConnectionClass):
+    """HTTPS connection that shares one pooled session and reports to the governor
+
+    With injected connection classes PyGithub builds one of these per request
+    and _create_own_connection hands each caller the instance it built, so
+    per-request state stays on the instance (safe across threads) while the
+    keep-alive pool lives in the shared session.
+    """
+
+    _session: requests.Session | None = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+        self.port = port if port else 443
+        self.host = host
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.retry = retry if retry is not None else requests.adapters.DEFAULT_RETRIES
+        self.pool_size = pool_size or requests.adapters.DEFAULT_POOLSIZE
+        self.session = self._shared_session(self.retry, self.pool_size)
+
+    @classmethod
+    def _shared_session(cls, retry, pool_size) -> requests.Session:
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                session.auth = Requester.noopAuth
+                session.mount("https://", requests.adapters.HTTPAdapter(
+                    max_retries=retry,
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                ))
+                cls._session = session
+            return cls._session
+
+    def getresponse(self):
+        governor.before_request(self.url)
+        response = None
+        started = time.perf_counter()
+        try:
+            response = super().getresponse()
+            return response
+        finally:
+            _record_response(self.url, started, response)
+            governor.after_response(
+                response.status if response else None,
+                response.headers if response else None,
+            )
+
+    def close(self):
+        # The session is shared by every request of the process
+        pass
+
+
+_create_connection = Requester._Requester__createConnection
+_connection_lock = threading.Lock()
+
+
+def _create_own_connection(self, hostname=None):
+    """Requester.__createConnection returning the connection built for this call
+
+    PyGithub stores the new connection on the shared requester and returns that
+    attribute after releasing its lock, so a concurrent request could replace it
+    in between and two threads would share one connection. The attribute is
+    cleared here too, so the next request neither reuses nor closes it.
+    """
+    with _connection_lock:
+        connection = _create_connection(self, hostname)
+        self._Requester__connection = None
+    return connection
+
+
+_client: Github | None = None
+_client_lock = threading.Lock()
+
+
+def get_github() -> Github:
+    """Return the process-wide GitHub client (pooled connections, governed pacing)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                Requester.injectConnectionClasses(MeasuredConnection, GovernedConnection)
+                Requester._Requester__createConnection = _create_own_connection
+                _client = Github(
+                    base_url=settings.GITHUB_API_URL,
+                    auth=Auth.Token(settings.GITHUB_TOKEN) if settings.GITHUB_TOKEN else None,
+                    pool_size=settings.GITHUB_POOL_SIZE,
+                    # Pacing is done by the governor instead of a fixed delay
+                    seconds_between_requests=None,
+                    seconds_between_writes=None,
+                )
+    return _client
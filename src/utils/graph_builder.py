@@ -1,38 +1,76 @@
-from langgraph.graph import StateGraph, START, END
-from src.agents.github_user import github_user_agent
-from src.models.schemas import State
-from src.agents.classifier import classify_message
-from src.agents.router import router
-from src.agents.github import github_agent 
-from src.agents.logical import logical_agent
+from src.utils.registry import registry
+
+def _node(name, func, afunc):
+    """Wrap a sync/async agent pair so the graph supports invoke and ainvoke
+
+    Both variants are measured by src.utils.metrics under the node's name.
+    """
+    from langchain_core.runnables import RunnableLambda
+    from src.utils.metrics import instrument_node
+    measured, ameasured = instrument_node(name, func, afunc)
+    return RunnableLambda(measured, afunc=ameasured, name=func.__name__)
 
 def build_graph():
-    """Build and compile the agent graph"""
+    """Build and compile the agent graph
+    
+    Every LLM-backed node has an async implementation, so ``graph.ainvoke`` runs
+    without blocking the caller's event loop while ``graph.invoke`` keeps working
+    for synchronous callers such as the console app.
+    
+    LangGraph and the agents are imported here rather than at module level so
+    that importing this module stays cheap until the graph is first needed.
+    """
+    from langgraph.graph import StateGraph, START, END
+    from src.agents.github_user import github_user_agent, agithub_user_agent
+    from src.models.schemas import State
+    from src.agents.classifier import classify_message, aclassify_message
+    from src.agents.router import route, router
+    from src.agents.comparison import analyze_target, aanalyze_target, comparison_agent, acomparison_agent
+    from src.agents.github import github_agent, agithub_agent
+    from src.agents.logical import logical_agent, alogical_agent
+    from src.utils.metrics import instrument_node
+    
     graph_builder = StateGraph(State)
     
     # Add nodes
-    graph_builder.add_node("classifier", classify_message)
-    graph_builder.add_node("router", router)
-    graph_builder.add_node("github", github_agent)  
-    graph_builder.add_node("github_user", github_user_agent)  
-    graph_builder.add_node("logical", logical_agent)
+    graph_builder.add_node("classifier", _node("classifier", classify_message, aclassify_message))
+    graph_builder.add_node("router", instrument_node("router", router))
+    graph_builder.add_node("github", _node("github", github_agent, agithub_agent))  
+    graph_builder.add_node("github_user", _node("github_user", github_user_agent, agithub_user_agent))  
+    graph_builder.add_node("logical", _node("logical", logical_agent, alogical_agent))
+    graph_builder.add_node("analyze_target", _node("analyze_target", analyze_target, aanalyze_target))
+    graph_builder.add_node("merge", _node("merge", comparison_agent, acomparison_agent))
     
     # Add edges
     graph_builder.add_edge(start_key=START, end_key="classifier")
     graph_builder.add_edge(start_key="classifier", end_key="router")
     
     # Conditional edges
+    # A message naming several targets fans out to one analyze_target branch
+    # per target; the branches run in parallel and merge combines them
     graph_builder.add_conditional_edges(
         "router",
-        lambda state: state.get("next"),
-        path_map={"github": "github","github_user": "github_user", "logical": "logical"}  
+        route,
+        path_map={"github": "github","github_user": "github_user", "logical": "logical", "analyze_target": "analyze_target"}  
     )
     
     graph_builder.add_edge(start_key="github", end_key=END)  
     graph_builder.add_edge(start_key="github_user", end_key=END)
     graph_builder.add_edge(start_key="logical", end_key=END)
+    graph_builder.add_edge(start_key="analyze_target", end_key="merge")
+    graph_builder.add_edge(start_key="merge", end_key=END)
     
     return graph_builder.compile()
 
-# Build the graph once
-graph = build_graph()
\ No newline at end of file
+# Built once, on first use
+registry.register("graph", build_graph)
+
+def get_graph():
+    """Return the compiled agent graph, building it on first use"""
+    return registry.get("graph")
+
+def __getattr__(name):
+    # Kept for `from src.utils.graph_builder import graph`
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+from src.config.settings import settings
+from src.utils.registry import registry
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Tokens a chat API adds around each message for the role and separators
+_MESSAGE_OVERHEAD = 4
+
+_encoding_requested = False
+
+
+def _load_encoding():
+    """Tokenizer of the logical model (tiktoken downloads its BPE file on first use)"""
+    if tiktoken is None:
+        raise ImportError("tiktoken is not installed")
+    try:
+        return tiktoken.encoding_for_model(settings.model_for("logical"))
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+registry.register("tokenizer", _load_encoding)
+
+
+def _get_encoding():
+    """Return the tokenizer once it is loaded, or None
+
+    The tokenizer is built by the registry warm-up, or in the background on
+    first use, so a caller on the event loop never waits for the download.
+    Tokens are estimated until then (and for good if loading fails).
+    """
+    global _encoding_requested
+    if registry.is_built("tokenizer"):
+        return registry.get("tokenizer")
+    if not _encoding_requested:
+        _encoding_requested = True
+        registry.warm_up(["tokenizer"])
+    return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text locally (about 4 characters per token without tiktoken)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_role_content(msg) -> tuple[str, str]:
+    """Role and text content of a dict or LangChain message"""
+    if isinstance(msg, dict):
+        return msg.get("role", "user"), msg.get("content") or ""
+    role = "assistant" if msg.type == "ai" else "user"
+    return role, msg.content if isinstance(msg.content, str) else str(msg.content)
+
+
+def message_tokens(msg) -> int:
+    """Tokens a message costs in a prompt"""
+    return count_tokens(message_role_content(msg)[1]) + _MESSAGE_OVERHEAD
+
+
+def context_window(state) -> tuple[str | None, int, int]:
+    """Decide which messages are sent verbatim and which are folded into the summary
+
+    The summary of messages[:summarized_count] is kept in the state, so old
+    turns are summarised once. While the summary plus the unsummarised messages
+    fit in HISTORY_TOKEN_BUDGET nothing is folded; once they do not, the oldest
+    messages are folded until only HISTORY_KEEP_TOKENS of recent messages are
+    left (the latest message is always kept), which leaves room for several
+    turns before the next fold.
+
+    Returns:
+        (summary, start, fold_to): messages[start:fold_to] must be folded into
+        summary, after which messages[fold_to:] are sent verbatim
+    """
+    messages = state["messages"]
+    summary = state.get("summary")
+    start = state.get("summarized_count") or 0
+    if start > len(messages):
+        # The history was replaced (e.g. cleared), the summary no longer applies
+        summary, start = None, 0
+
+    costs = [message_tokens(msg) for msg in messages[start:]]
+    if count_tokens(summary) + sum(costs) <= settings.HISTORY_TOKEN_BUDGET:
+        return summary, start, start
+
+    fold_to = len(messages) - 1
+    kept = costs[-1]
+    while fold_to > start and kept + costs[fold_to - 1 - start] <= settings.HISTORY_KEEP_TOKENS:
+        fold_to -= 1
+        kept += costs[fold_to - start]
+    return summary, start, fold_to
+
+
+def summary_prompt(summary: str | None, messages: list) -> list[dict]:
+    """Prompt asking the LLM to fold messages into the running summary"""
+    limit = settings.SUMMARY_INPUT_MAX_CHARS
+    transcript = "\n\n".join(
+        f"{role}: {content[:limit]}{' [...]' if len(content) > limit else ''}"
+        for role, content in map(message_role_content, messages)
+    )
+    return [
+        {
+            "role": "system",
+            "content": f"""You maintain a running summary of a conversation between a user and an assistant.
+            Update the summary with the new messages. Keep facts, names, URLs, repository and
+            user analysis results and open questions; drop greetings and repetition.
+            Answer with the updated summary only, in at most {settings.SUMMARY_MAX_WORDS} words."""
+        },
+        {
+            "role": "user",
+            "content": f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"
+        },
+    ]
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from src.config.settings import settings
+from src.utils.registry import registry
+
+_OPENAI_PREFIXES = ("openai:", "gpt-", "o1", "o3", "o4")
+
+
+def _build_http_client():
+    import httpx
+    limits = httpx.Limits(
+        max_connections=settings.LLM_HTTP_POOL_SIZE,
+        max_keepalive_connections=settings.LLM_HTTP_POOL_SIZE,
+    )
+    return httpx.Client(limits=limits)
+
+
+def _build_http_async_client():
+    import httpx
+    limits = httpx.Limits(
+        max_connections=settings.LLM_HTTP_POOL_SIZE,
+        max_keepalive_connections=settings.LLM_HTTP_POOL_SIZE,
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+# One connection pool for every OpenAI model, so keep-alive connections are
+# reused across nodes instead of each model client opening its own
+registry.register("llm_http_client", _build_http_client)
+registry.register("llm_http_async_client", _build_http_async_client)
+
+
+def _build_model(model: str):
+    from langchain.chat_models import init_chat_model
+    options = {
+        "timeout": settings.model_limits(model)["timeout"],
+        "max_retries": settings.LLM_MAX_RETRIES,
+    }
+    if model.startswith(_OPENAI_PREFIXES):
+        options["http_client"] = registry.get("llm_http_client")
+        options["http_async_client"] = registry.get("llm_http_async_client")
+        # Custom HTTP clients turn off langchain-openai's default, and streamed
+        # replies would then carry no usage_metadata for the token counters
+        options["stream_usage"] = True
+    return init_chat_model(model, **options)
+
+
+def get_model(node: str):
+    """Return the chat model configured for a node (one shared instance per model name)"""
+    model = settings.model_for(node)
+    name = f"model:{model}"
+    if not registry.is_built(name):
+        registry.register(name, lambda: _build_model(model))
+    return registry.get(name)
+
+
+class ModelLimiter:
+    """Caps the concurrent requests to one model
+
+    Sync callers (console, worker threads) and async callers (the Telegram
+    event loop) share one count of max_concurrency slots. Waiters queue in FIFO
+    order and a released slot is handed to the next one: a thread is woken
+    through its event, a coroutine through a future resolved on its own loop,
+    so the event loop is never blocked.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+        self.inflight = 0
+        self.calls = 0
+        self.waits = 0
+
+    def _try_acquire(self, waiter) -> bool:
+        """Take a free slot, or queue the waiter (called with the lock held)"""
+        self.calls += 1
+        if self.inflight < self.max_concurrency and not self._waiters:
+            self.inflight += 1
+            return True
+        self.waits += 1
+        self._waiters.append(waiter)
+        return False
+
+    def _release(self):
+        """Hand the slot to the next live waiter, or free it"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                if future.done():
+                    continue
+                try:
+                    loop.call_soon_threadsafe(self._resolve, future)
+                    return
+                except RuntimeError:
+                    # The waiter's loop is closed
+                    continue
+            self.inflight -= 1
+
+    def _resolve(self, future: asyncio.Future):
+        if future.done():
+            # Cancelled after the slot was handed over: pass it on
+            self._release()
+        else:
+            future.set_result(None)
+
+    @contextmanager
+    def slot(self):
+        event = threading.Event()
+        with self._lock:
+            acquired = self._try_acquire(event)
+        if not acquired:
+            event.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            acquired = self._try_acquire(waiter)
+        if not acquired:
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._lock:
+                    queued = waiter in self._waiters
+                    if queued:
+                        self._waiters.remove(waiter)
+                owned = not queued and waiter[1].done() and not waiter[1].cancelled()
+                if owned:
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "inflight": self.inflight,
+                "calls": self.calls,
+                "waits": self.waits,
+            }
+
+
+_limiters: dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(node: str) -> ModelLimiter:
+    model = settings.model_for(node)
+    with _limiters_lock:
+        if model not in _limiters:
+            _limiters[model] = ModelLimiter(settings.model_limits(model)["max_concurrency"])
+        return _limiters[model]
+
+
+def model_slot(node: str):
+    """Context manager holding one of the node model's concurrency slots"""
+    return _limiter(node).slot()
+
+
+def amodel_slot(node: str):
+    """Async context manager holding one of the node model's concurrency slots"""
+    return _limiter(node).aslot()
+
+
+def model_stats():
+    """Get the configured model of each node and the usage of each model's slots"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {
+        "nodes": dict(settings.NODE_MODELS),
+        "models": {model: limiter.stats() for model, limiter in limiters.items()},
+    }
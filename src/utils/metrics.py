@@ -0,0 +1,307 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config.settings import settings
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+REQUEST_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (0, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one series per label set"""
+
+    def __init__(self, name: str, documentation: str, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def series(self) -> dict[tuple, dict]:
+        with self._lock:
+            return {key: {**series, "buckets": list(series["buckets"])} for key, series in self._series.items()}
+
+    def quantile(self, q: float, **labels) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (the largest bound if beyond it)"""
+        series = self.series().get(tuple(sorted(labels.items())))
+        if not series or not series["count"]:
+            return None
+        rank = q * series["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, series["buckets"]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        """Lines of the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series().items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in key)
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+            lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus-style counter with one series per label set"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in key)
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+node_seconds = Histogram("agent_node_duration_seconds", "Wall time of graph node runs", SECONDS_BUCKETS)
+node_prompt_tokens = Histogram("agent_node_prompt_tokens", "LLM prompt tokens per node run", TOKEN_BUCKETS)
+node_completion_tokens = Histogram("agent_node_completion_tokens", "LLM completion tokens per node run", TOKEN_BUCKETS)
+node_github_requests = Histogram("agent_node_github_requests", "GitHub API requests per node run", REQUEST_BUCKETS)
+node_github_bytes = Histogram("agent_node_github_bytes", "GitHub API response bytes per node run", BYTES_BUCKETS)
+node_mongo_seconds = Histogram("agent_node_mongo_seconds", "MongoDB command time per node run", SECONDS_BUCKETS)
+node_errors = Counter("agent_node_errors_total", "Graph node runs that raised")
+github_request_seconds = Histogram("github_request_duration_seconds", "GitHub API request latency", SECONDS_BUCKETS)
+mongo_command_seconds = Histogram("mongo_command_duration_seconds", "MongoDB command latency", SECONDS_BUCKETS)
+
+_METRICS = (
+    node_seconds, node_prompt_tokens, node_completion_tokens, node_github_requests,
+    node_github_bytes, node_mongo_seconds, node_errors, github_request_seconds, mongo_command_seconds,
+)
+
+
+@dataclass
+class NodeUsage:
+    """Resources used by one node run, filled in by the hooks below"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    github_requests: int = 0
+    github_bytes: int = 0
+    mongo_seconds: float = 0.0
+    # Fan-out threads run in copies of the node's context and share this object
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+
+_usage: ContextVar[NodeUsage | None] = ContextVar("node_usage", default=None)
+_token_handler: ContextVar[object | None] = ContextVar("node_token_handler", default=None)
+_token_handler_class = None
+_hook_lock = threading.Lock()
+
+
+def _token_handler_for(usage: NodeUsage):
+    """Callback handler adding the token usage of each chat model call to a node run
+
+    LangChain is imported, and the handler hooked into every run started while
+    a node runs, on first use so importing this module stays cheap.
+    """
+    global _token_handler_class
+    if _token_handler_class is None:
+        with _hook_lock:
+            if _token_handler_class is None:
+                from langchain_core.callbacks import BaseCallbackHandler
+                from langchain_core.tracers.context import register_configure_hook
+
+                class TokenUsageHandler(BaseCallbackHandler):
+                    run_inline = True
+
+                    def __init__(self, usage: NodeUsage):
+                        self.usage = usage
+
+                    def on_llm_end(self, response, **kwargs):
+                        for generations in response.generations:
+                            for generation in generations:
+                                message = getattr(generation, "message", None)
+                                usage_metadata = getattr(message, "usage_metadata", None)
+                                if usage_metadata:
+                                    self.usage.add(
+                                        prompt_tokens=usage_metadata.get("input_tokens", 0),
+                                        completion_tokens=usage_metadata.get("output_tokens", 0),
+                                    )
+
+                register_configure_hook(_token_handler, inheritable=True)
+                _token_handler_class = TokenUsageHandler
+    return _token_handler_class(usage)
+
+
+@contextmanager
+def node_run(node: str):
+    """Measure one run of a graph node and record it in the node histograms"""
+    usage = NodeUsage()
+    usage_token = _usage.set(usage)
+    handler_token = _token_handler.set(_token_handler_for(usage))
+    started = time.perf_counter()
+    try:
+        yield usage
+    except BaseException:
+        node_errors.inc(node=node)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _token_handler.reset(handler_token)
+        _usage.reset(usage_token)
+        node_seconds.observe(elapsed, node=node)
+        node_prompt_tokens.observe(usage.prompt_tokens, node=node)
+        node_completion_tokens.observe(usage.completion_tokens, node=node)
+        node_github_requests.observe(usage.github_requests, node=node)
+        node_github_bytes.observe(usage.github_bytes, node=node)
+        node_mongo_seconds.observe(usage.mongo_seconds, node=node)
+
+
+def instrument_node(node: str, func, afunc=None):
+    """Wrap a node function (and its async variant) so every run is measured
+
+    Returns:
+        The wrapped function, or (function, async function) when afunc is given
+    """
+    @wraps(func)
+    def measured(state):
+        with node_run(node):
+            return func(state)
+
+    if afunc is None:
+        return measured
+
+    @wraps(afunc)
+    async def ameasured(state):
+        with node_run(node):
+            return await afunc(state)
+
+    return measured, ameasured
+
+
+def record_github_request(resource: str, seconds: float, size: int):
+    """Record a GitHub API response (called by the GitHub connection classes)"""
+    github_request_seconds.observe(seconds, resource=resource)
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(github_requests=1, github_bytes=size)
+
+
+def record_mongo_command(command: str, seconds: float):
+    """Record a MongoDB command (called by the client's command listener)"""
+    mongo_command_seconds.observe(seconds, command=command)
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(mongo_seconds=seconds)
+
+
+def github_request_count() -> int:
+    """GitHub API requests made by this process so far"""
+    return sum(series["count"] for series in github_request_seconds.series().values())
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_summary():
+    """Get per-node averages and approximate p95 latency from the histograms"""
+    summary = {}
+    for key, series in sorted(node_seconds.series().items()):
+        node = dict(key)["node"]
+        runs = series["count"]
+
+        def average(histogram):
+            other = histogram.series().get(key)
+            return other["sum"] / runs if other and runs else 0
+
+        summary[node] = {
+            "runs": runs,
+            "errors": int(node_errors.value(node=node)),
+            "avg_ms": series["sum"] / runs * 1000 if runs else 0,
+            "p95_ms": (node_seconds.quantile(0.95, node=node) or 0) * 1000,
+            "avg_prompt_tokens": average(node_prompt_tokens),
+            "avg_completion_tokens": average(node_completion_tokens),
+            "avg_github_requests": average(node_github_requests),
+            "avg_github_bytes": average(node_github_bytes),
+            "avg_mongo_ms": average(node_mongo_seconds) * 1000,
+        }
+    return summary
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int | None = None):
+    """Serve /metrics for Prometheus on METRICS_PORT in a daemon thread (0 disables)
+
+    Returns:
+        The server, or None when disabled or the port is unavailable
+    """
+    port = settings.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((settings.METRICS_HOST, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrics endpoint not started: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
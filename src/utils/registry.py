@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class Registry:
+    """Process-wide components (models, graph, database client) built on first use
+
+    Each component is registered with a factory that runs the first time the
+    component is requested, so importing a module costs nothing until the
+    component is actually needed. Benchmarks and tools can override a
+    component with a ready-made instance before it is built.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.build_seconds: dict[str, float] = {}
+
+    def register(self, name: str, factory):
+        """Declare how to build a component (an already built instance is kept)"""
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        """Return the component, building it on the first call"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            lock = self._locks.get(name)
+        if lock is None:
+            raise KeyError(f"Unknown component: {name}")
+        with lock:
+            if name not in self._instances:
+                started = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                self.build_seconds[name] = time.perf_counter() - started
+            return self._instances[name]
+
+    def override(self, name: str, instance):
+        """Use the given instance for a component instead of building it"""
+        with self._lock:
+            self._locks.setdefault(name, threading.Lock())
+            self._factories.setdefault(name, lambda: instance)
+            self._instances[name] = instance
+
+    def warm_up(self, names=None) -> threading.Thread:
+        """Build components (all registered ones by default) in a background thread
+
+        Components registered while warming up (e.g. the models of the agent
+        modules the graph imports) are built too. Callers asking for a component
+        meanwhile wait for its build instead of starting a second one.
+        """
+        def build():
+            done = set()
+            while True:
+                pending = [name for name in (names or list(self._factories)) if name not in done]
+                if not pending:
+                    break
+                for name in pending:
+                    done.add(name)
+                    try:
+                        self.get(name)
+                    except Exception as e:
+                        print(f"Warm-up of {name} failed: {e}")
+
+        thread = threading.Thread(target=build, name="registry-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def stats(self):
+        """Get registered components and how long each took to build"""
+        with self._lock:
+            return {
+                name: {"built": name in self._instances, "build_seconds": self.build_seconds.get(name)}
+                for name in self._factories
+            }
+
+
+registry = Registry()
@@ -0,0 +1,141 @@
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+from src.config.settings import settings
+from src.utils.github_client import get_github
+
+
+def _trigrams(name: str) -> set[str]:
+    """Padded character trigrams of a lowercased name"""
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RepoNameIndex:
+    """Trigram postings over the repository names of one owner"""
+
+    def __init__(self):
+        self.names: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._gram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self.built_at = time.monotonic()
+        self.refreshed_at = self.built_at
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str):
+        return name.lower() in self._positions
+
+    def add(self, name: str):
+        """Index a repository name (no-op if already present)"""
+        if name in self:
+            return
+        position = len(self.names)
+        grams = _trigrams(name)
+        self.names.append(name)
+        self._positions[name.lower()] = position
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(position)
+
+    def top_k(self, query: str, k: int = 5) -> list[tuple[str, float]]:
+        """Return up to k (name, score) pairs most similar to the query
+
+        Candidates are ranked by trigram Dice overlap from the postings, then the
+        shortlist is rescored with SequenceMatcher so scores keep the same scale
+        as the previous full scan.
+        """
+        query_grams = _trigrams(query)
+        overlap = Counter()
+        for gram in query_grams:
+            overlap.update(self._postings.get(gram, ()))
+        if not overlap:
+            return []
+
+        shortlist = heapq.nlargest(
+            k * 4,
+            overlap,
+            key=lambda i: 2 * overlap[i] / (len(query_grams) + self._gram_counts[i]),
+        )
+        query_lower = query.lower()
+        scored = [
+            (self.names[i], SequenceMatcher(None, query_lower, self.names[i].lower()).ratio())
+            for i in shortlist
+        ]
+        return sorted(scored, key=lambda item: item[1], reverse=True)[:k]
+
+
+_indexes: OrderedDict[str, RepoNameIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+# One lock per owner being indexed, dropped with the owner's index
+_owner_locks: dict[str, threading.Lock] = {}
+
+
+def _owner_lock(key: str) -> threading.Lock:
+    with _indexes_lock:
+        lock = _owner_locks.get(key)
+        if lock is None:
+            lock = _owner_locks[key] = threading.Lock()
+        return lock
+
+
+def _fetch_names(owner: str, known: RepoNameIndex | None = None) -> list[str]:
+    """The owner's public repo names, newest first, stopping at the first one already in known"""
+    repos = get_github().get_user(owner).get_repos(type="public", sort="created", direction="desc")
+    names = []
+    for repo in repos:
+        if known is not None and repo.name in known:
+            break
+        names.append(repo.name)
+    return names
+
+
+def _build_index(names: list[str]) -> RepoNameIndex:
+    index = RepoNameIndex()
+    for name in names:
+        index.add(name)
+    return index
+
+
+def get_repo_index(owner: str) -> RepoNameIndex:
+    """Return the cached name index for an owner, building or refreshing it as needed
+
+    Newly created repos are picked up incrementally every REPO_INDEX_REFRESH
+    seconds; the index is rebuilt from scratch after REPO_INDEX_MAX_AGE so that
+    renamed and deleted repos drop out. A refresh builds a new index and swaps
+    it in, so callers may keep using the index they were given.
+    """
+    key = owner.lower()
+    try:
+        with _owner_lock(key):
+            with _indexes_lock:
+                index = _indexes.get(key)
+                if index:
+                    _indexes.move_to_end(key)
+
+            now = time.monotonic()
+            if index is None or now - index.built_at > settings.REPO_INDEX_MAX_AGE:
+                index = _build_index(_fetch_names(owner))
+            elif now - index.refreshed_at > settings.REPO_INDEX_REFRESH:
+                refreshed = _build_index(_fetch_names(owner, index) + index.names)
+                refreshed.built_at = index.built_at
+                index = refreshed
+            else:
+                return index
+
+            with _indexes_lock:
+                _indexes[key] = index
+                _indexes.move_to_end(key)
+                while len(_indexes) > settings.REPO_INDEX_MAX_OWNERS:
+                    evicted, _ = _indexes.popitem(last=False)
+                    _owner_locks.pop(evicted, None)
+            return index
+    finally:
+        with _indexes_lock:
+            if key not in _indexes:
+                # Loading failed or the index was evicted already
+                _owner_locks.pop(key, None)
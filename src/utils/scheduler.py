@@ -0,0 +1,98 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+
+class QueueFullError(Exception):
+    """Raised when a chat already has the maximum number of pending turns"""
+
+
+class ChatScheduler:
+    """Bounded worker pool that runs jobs in FIFO order per chat
+    
+    Each chat gets its own queue drained by a single worker task, so turns of one
+    conversation never overlap, while a global semaphore caps how many jobs run
+    across all chats at the same time.
+    """
+    
+    def __init__(self, max_concurrency: int, max_queue_per_chat: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue_per_chat = max_queue_per_chat
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[Hashable, deque] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+        self._active: set[Hashable] = set()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+    
+    def submit(self, chat_id: Hashable, job: Callable[[], Awaitable]) -> int:
+        """Queue a job for a chat
+        
+        Args:
+            chat_id: Key whose jobs must run one after another
+            job: Zero-argument coroutine function to run
+        
+        Returns:
+            Number of turns of this chat ahead of the job (0 means it starts now)
+        
+        Raises:
+            QueueFullError: If the chat's queue is already full
+        """
+        queue = self._queues.setdefault(chat_id, deque())
+        ahead = len(queue) + (1 if chat_id in self._active else 0)
+        
+        if len(queue) >= self.max_queue_per_chat:
+            self._rejected += 1
+            raise QueueFullError(f"Queue for chat {chat_id} is full")
+        
+        queue.append((job, time.monotonic()))
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return ahead
+    
+    async def _drain(self, chat_id: Hashable):
+        """Run queued jobs of one chat in order, then retire the worker"""
+        queue = self._queues[chat_id]
+        try:
+            while queue:
+                job, enqueued_at = queue.popleft()
+                self._active.add(chat_id)
+                async with self._semaphore:
+                    wait = time.monotonic() - enqueued_at
+                    self._total_wait += wait
+                    self._max_wait = max(self._max_wait, wait)
+                    self._running += 1
+                    try:
+                        await job()
+                        self._completed += 1
+                    except Exception as e:
+                        self._failed += 1
+                        print(f"Error in scheduled job for chat {chat_id}: {e}")
+                    finally:
+                        self._running -= 1
+                        self._active.discard(chat_id)
+        finally:
+            self._active.discard(chat_id)
+            self._workers.pop(chat_id, None)
+            if not queue:
+                self._queues.pop(chat_id, None)
+    
+    def stats(self):
+        """Get queue depth and wait time metrics"""
+        started = self._completed + self._failed + self._running
+        return {
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "active_chats": len(self._workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_seconds": self._total_wait / started if started else 0.0,
+            "max_wait_seconds": self._max_wait,
+        }
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from src.utils.history import message_role_content
+
+# State fields kept between turns besides the messages (per-turn fields such as
+# targets and analyses are reset by the classifier anyway)
+_KEPT_FIELDS = ("message_type", "username", "repo_name", "summary", "summarized_count")
+# Rough per-message overhead of the tuple and its strings
+_MESSAGE_OVERHEAD = 120
+
+
+class _Session:
+    __slots__ = ("messages", "fields", "size", "used_at", "length")
+
+    def __init__(self, messages: tuple | None, fields: dict, size: int, used_at: float, length: int):
+        # messages is None for a trimmed session, of which only the fields are kept
+        self.messages = messages
+        self.fields = fields
+        self.size = size
+        self.used_at = used_at
+        self.length = length
+
+
+class SessionStore:
+    """Bounded in-memory conversation states, rehydrated from the database on demand
+
+    Sessions are kept as (role, content) tuples plus a few state fields and
+    evicted least recently used first when there are more than max_sessions or
+    they take more than max_bytes, or once idle for idle_ttl seconds. A session
+    longer than max_messages is trimmed: only its fields are kept, and the next
+    turn reloads its most recent window through the loader, with the summary
+    of older turns carried over and summarized_count rebased onto that window.
+    """
+
+    def __init__(self, loader: Callable[[Hashable], dict | None], max_sessions: int,
+                 max_bytes: int, idle_ttl: float, max_messages: int):
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._sessions: OrderedDict[Hashable, _Session] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rehydrations = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.trims = 0
+
+    @staticmethod
+    def _expand(session: _Session) -> dict:
+        """Graph state of a stored session (a fresh message list the caller may extend)"""
+        return {
+            "messages": [{"role": role, "content": content} for role, content in session.messages],
+            **session.fields,
+        }
+
+    def _remove(self, key: Hashable):
+        session = self._sessions.pop(key, None)
+        if session:
+            self._bytes -= session.size
+
+    def _expire(self, now: float):
+        """Drop sessions idle for longer than idle_ttl (the oldest are first in the LRU order)"""
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.used_at <= self.idle_ttl:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+    def get(self, key: Hashable) -> dict | None:
+        """Resident state of a session, or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(key)
+            if session is None or session.messages is None:
+                return None
+            session.used_at = now
+            self._sessions.move_to_end(key)
+            self.hits += 1
+            return self._expand(session)
+
+    def load(self, key: Hashable) -> dict:
+        """State of a session, rehydrated through the loader when not resident (blocking)"""
+        state = self.get(key)
+        if state is not None:
+            return state
+        with self._lock:
+            trimmed = self._sessions.get(key)
+        conversation = self.loader(key)
+        state = {
+            "messages": [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in (conversation or {}).get("messages") or []
+            ],
+            "message_type": None,
+        }
+        if trimmed is not None and trimmed.messages is None:
+            # Both message lists end with the latest message; the summary covers
+            # the trimmed session's first summarized_count messages
+            fields = dict(trimmed.fields)
+            if "summarized_count" in fields:
+                shift = trimmed.length - len(state["messages"])
+                fields["summarized_count"] = min(max(0, fields["summarized_count"] - shift), len(state["messages"]))
+            state.update(fields)
+        with self._lock:
+            self.rehydrations += 1
+        self.put(key, state)
+        return state
+
+    def put(self, key: Hashable, state: dict):
+        """Store a session's state after a turn, evicting others to respect the caps"""
+        messages = tuple(message_role_content(msg) for msg in state.get("messages") or [])
+        fields = {name: state[name] for name in _KEPT_FIELDS if state.get(name) is not None}
+        size = sum(len(role) + len(content) + _MESSAGE_OVERHEAD for role, content in messages)
+        size += len(fields.get("summary") or "")
+        now = time.monotonic()
+        with self._lock:
+            self._remove(key)
+            if len(messages) > self.max_messages or size > self.max_bytes:
+                # Reloaded with only the recent window on the next turn
+                self.trims += 1
+                kept_size = len(fields.get("summary") or "") + _MESSAGE_OVERHEAD
+                session = _Session(None, fields, kept_size, now, len(messages))
+            else:
+                session = _Session(messages, fields, size, now, len(messages))
+            self._sessions[key] = session
+            self._bytes += session.size
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def discard(self, key: Hashable):
+        """Forget a session (it is rehydrated on its next turn)"""
+        with self._lock:
+            self._remove(key)
+
+    def stats(self) -> dict:
+        """Resident sessions (trimmed ones included) and bytes, and hit / rehydration / eviction counters"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "rehydrations": self.rehydrations,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "trims": self.trims,
+            }
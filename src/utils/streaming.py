@@ -0,0 +1,41 @@
+from langchain_core.messages import AIMessageChunk
+
+# Nodes whose LLM output is the reply shown to the user (the parallel
+# analyze_target branches are combined by merge, which streams the reply)
+REPLY_NODES = {"github", "github_user", "logical", "merge"}
+
+STREAM_MODES = ["messages", "values"]
+
+
+def _reply_token(chunk, metadata) -> str:
+    """Text of a streamed chunk if it belongs to the user-facing reply"""
+    if metadata.get("langgraph_node") not in REPLY_NODES or not isinstance(chunk, AIMessageChunk):
+        return ""
+    return chunk.content if isinstance(chunk.content, str) else ""
+
+
+def stream_turn(graph, state, config=None):
+    """Run the graph for one turn, yielding reply tokens as they arrive
+
+    Yields:
+        ("token", text) for each reply token, and ("state", state) after every
+        step; the last "state" event is the final state with the full reply
+    """
+    for mode, payload in graph.stream(state, config=config, stream_mode=STREAM_MODES):
+        if mode == "values":
+            yield "state", payload
+        else:
+            text = _reply_token(*payload)
+            if text:
+                yield "token", text
+
+
+async def astream_turn(graph, state, config=None):
+    """Async variant of stream_turn"""
+    async for mode, payload in graph.astream(state, config=config, stream_mode=STREAM_MODES):
+        if mode == "values":
+            yield "state", payload
+        else:
+            text = _reply_token(*payload)
+            if text:
+                yield "token", text
@@ -0,0 +1,219 @@
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator
+
+from src.config.settings import settings
+from src.utils.github_client import BACKGROUND, get_github, github_priority
+
+_OWNER = re.compile(r"^(?:https?://)?(?:www\.)?(?:github\.com/)?@?(?P<owner>[A-Za-z0-9](?:[A-Za-z0-9-]{0,38}))/?$")
+HISTOGRAM_BINS = 10
+
+
+def parse_owner(text: str) -> str | None:
+    """GitHub login from "owner", "@owner" or a profile URL (None when invalid)"""
+    match = _OWNER.match(text.strip())
+    return match.group("owner") if match else None
+
+
+def iter_repositories(owner: str, page_size: int | None = None) -> Iterator[dict]:
+    """Yield the raw metadata of every repository of a user or organisation
+
+    Pages are requested one at a time at background priority, so only one page
+    is held in memory however many repositories the owner has.
+    """
+    page_size = page_size or settings.SWEEP_PAGE_SIZE
+    requester = get_github().requester
+    page = 1
+    while True:
+        with github_priority(BACKGROUND):
+            _, items = requester.requestJsonAndCheck(
+                "GET",
+                f"/users/{owner}/repos",
+                parameters={"type": "owner", "sort": "full_name", "per_page": page_size, "page": page},
+            )
+        yield from items
+        if len(items) < page_size:
+            return
+        page += 1
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def score_repository(repo: dict, now: datetime) -> float:
+    """Heuristic 0-10 health score from listing metadata alone (no extra requests)
+
+    Activity up to 4 (last push), popularity up to 3 (log of stars),
+    description, license and topics 1 each.
+    """
+    pushed = _parse_time(repo.get("pushed_at")) or _parse_time(repo.get("created_at")) or now
+    days = (now - pushed).days
+    if repo.get("archived"):
+        activity = 0
+    elif days <= 30:
+        activity = 4
+    elif days <= 180:
+        activity = 3
+    elif days <= 365:
+        activity = 2
+    elif days <= 730:
+        activity = 1
+    else:
+        activity = 0
+    popularity = min(3.0, math.log10(repo.get("stargazers_count", 0) + 1))
+    hygiene = bool(repo.get("description")) + bool(repo.get("license")) + bool(repo.get("topics"))
+    return round(activity + popularity + hygiene, 1)
+
+
+def score_repositories(repos: Iterable[dict], stale_days: int | None = None) -> Iterator[dict]:
+    """Reduce raw repository metadata to compact scored records"""
+    stale_days = settings.SWEEP_STALE_DAYS if stale_days is None else stale_days
+    now = datetime.now(timezone.utc)
+    for repo in repos:
+        pushed = _parse_time(repo.get("pushed_at")) or _parse_time(repo.get("created_at"))
+        archived = bool(repo.get("archived"))
+        yield {
+            "name": repo["name"],
+            "language": repo.get("language") or "Unknown",
+            "score": score_repository(repo, now),
+            "stars": repo.get("stargazers_count", 0),
+            "pushed_at": pushed,
+            "fork": bool(repo.get("fork")),
+            "archived": archived,
+            "stale": not archived and pushed is not None and (now - pushed).days > stale_days,
+        }
+
+
+class SweepAggregate:
+    """Running totals of a sweep whose size does not grow with the number of repos
+
+    Only counters, the language tally and two top-N heaps (best scores and
+    oldest pushes among stale repos) are kept.
+    """
+
+    def __init__(self, owner: str, top_n: int | None = None):
+        self.owner = owner
+        self.top_n = top_n or settings.SWEEP_TOP_N
+        self.total = 0
+        self.forks = 0
+        self.archived = 0
+        self.stale = 0
+        self.stars = 0
+        self.score_sum = 0.0
+        self.languages = Counter()
+        self.histogram = [0] * HISTOGRAM_BINS
+        self._top: list[tuple] = []
+        self._stalest: list[tuple] = []
+
+    def add(self, record: dict):
+        self.total += 1
+        self.forks += record["fork"]
+        self.archived += record["archived"]
+        self.stars += record["stars"]
+        self.score_sum += record["score"]
+        self.languages[record["language"]] += 1
+        self.histogram[min(int(record["score"]), HISTOGRAM_BINS - 1)] += 1
+        self._push(self._top, (record["score"], record["name"]))
+        if record["stale"]:
+            self.stale += 1
+            # Negated timestamp: the heap drops the most recently pushed first
+            self._push(self._stalest, (-record["pushed_at"].timestamp(), record["name"], record["pushed_at"]))
+
+    def _push(self, heap: list, item: tuple):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+
+    def snapshot(self) -> dict:
+        """Plain-data view of the aggregate so far"""
+        return {
+            "owner": self.owner,
+            "total": self.total,
+            "forks": self.forks,
+            "archived": self.archived,
+            "stale": self.stale,
+            "stars": self.stars,
+            "avg_score": self.score_sum / self.total if self.total else 0.0,
+            "languages": self.languages.most_common(),
+            "histogram": list(self.histogram),
+            "top": [{"name": name, "score": score} for score, name in sorted(self._top, reverse=True)],
+            "stalest": [{"name": name, "pushed_at": pushed} for _, name, pushed in sorted(self._stalest, reverse=True)],
+        }
+
+
+def sweep(owner: str, max_repos: int | None = None, progress_every: int | None = None):
+    """Stream every repository of an owner through fetch -> score -> aggregate
+
+    Yields:
+        ("progress", snapshot) every progress_every repos, then ("done", snapshot)
+    """
+    max_repos = settings.SWEEP_MAX_REPOS if max_repos is None else max_repos
+    progress_every = progress_every or settings.SWEEP_PROGRESS_EVERY
+    aggregate = SweepAggregate(owner)
+    records = score_repositories(iter_repositories(owner))
+    for record in islice(records, max_repos or None):
+        aggregate.add(record)
+        if aggregate.total % progress_every == 0:
+            yield "progress", aggregate.snapshot()
+    yield "done", aggregate.snapshot()
+
+
+async def asweep(owner: str, max_repos: int | None = None, progress_every: int | None = None):
+    """Async variant of sweep: the blocking pages are fetched in worker threads"""
+    events = sweep(owner, max_repos, progress_every)
+    while True:
+        event = await asyncio.to_thread(next, events, None)
+        if event is None:
+            return
+        yield event
+
+
+def format_progress(snapshot: dict) -> str:
+    """Short status line with the partial results of a running sweep"""
+    top = ", ".join(f"`{repo['name']}` {repo['score']:.1f}" for repo in snapshot["top"][:3])
+    return (
+        f"⏳ Sweeping {snapshot['owner']}: {snapshot['total']} repos scored "
+        f"(avg {snapshot['avg_score']:.1f}/10, {snapshot['stale']} stale)\n"
+        f"Top so far: {top or '-'}"
+    )
+
+
+def format_report(snapshot: dict) -> str:
+    """Aggregate report of a finished sweep (Markdown)"""
+    total = snapshot["total"]
+    if not total:
+        return f"📦 {snapshot['owner']} has no public repositories."
+
+    lines = [
+        f"📦 **Sweep of {snapshot['owner']}**: {total} repos "
+        f"({snapshot['forks']} forks, {snapshot['archived']} archived), {snapshot['stars']} ⭐",
+        f"Average score: {snapshot['avg_score']:.1f}/10",
+        "",
+        "**Languages**",
+    ]
+    languages = snapshot["languages"]
+    for language, count in languages[:8]:
+        lines.append(f"• {language}: {count} ({count / total:.0%})")
+    if len(languages) > 8:
+        others = sum(count for _, count in languages[8:])
+        lines.append(f"• {len(languages) - 8} others: {others} ({others / total:.0%})")
+
+    lines += ["", "**Score histogram**"]
+    widest = max(snapshot["histogram"])
+    for i, count in enumerate(snapshot["histogram"]):
+        bar = "█" * round(count / widest * 20) if widest else ""
+        lines.append(f"`{i:>2}-{i + 1:<2}` {bar} {count}")
+
+    lines += ["", "**Top repos**"]
+    lines += [f"• `{repo['name']}` {repo['score']:.1f}" for repo in snapshot["top"]]
+
+    lines += ["", f"**Stale repos** (no push in {settings.SWEEP_STALE_DAYS}+ days): {snapshot['stale']}"]
+    lines += [f"• `{repo['name']}` last push {repo['pushed_at']:%Y-%m-%d}" for repo in snapshot["stalest"]]
+    return "\n".join(lines)
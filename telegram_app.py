@@ -1,35 +1,144 @@
+import asyncio
+import time
+from datetime import timedelta
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from src.utils.graph_builder import graph
-from src.database.mongo_client import db_client
+from github import UnknownObjectException
+from src.agents.classifier import classifier_stats
+from src.utils.classification_cache import classification_cache
+from src.utils.github_cache import github_cache
+from src.utils.graph_builder import get_graph
+from src.database.mongo_client import get_db_client
+from src.database.write_behind import write_queue
 from src.config.settings import settings
+from src.utils.scheduler import ChatScheduler, QueueFullError
+from src.utils.metrics import metrics_summary, start_metrics_server
+from src.utils.registry import registry
+from src.utils.session_store import SessionStore
+from src.utils.streaming import astream_turn
+from src.utils.sweep import asweep, format_progress, format_report, parse_owner
 
-SINGLE_SESSION_ID = "telegram_chat"
-user_sessions = {}
+def session_id_for(chat_id: int) -> str:
+    """MongoDB session id of a Telegram chat"""
+    return f"telegram_{chat_id}"
+
+# Conversation state per Telegram chat id, rehydrated from MongoDB after eviction
+user_sessions = SessionStore(
+    lambda chat_id: write_queue.load_conversation(session_id_for(chat_id), limit=settings.HISTORY_LOAD_LIMIT),
+    max_sessions=settings.SESSION_MAX_ACTIVE,
+    max_bytes=settings.SESSION_MAX_BYTES,
+    idle_ttl=settings.SESSION_IDLE_TTL,
+    max_messages=settings.SESSION_MAX_MESSAGES,
+)
+scheduler = ChatScheduler(settings.MAX_CONCURRENT_RUNS, settings.MAX_QUEUE_PER_CHAT)
+# Chats with a /sweep in progress (one at a time per chat)
+active_sweeps = set()
+
+def reply_emoji(message_type: str) -> str:
+    """Emoji prefix of a reply, based on the agent that produced it"""
+    if message_type == "Github_user":
+        return "👤"
+    if message_type == "Github":
+        return "🔍"
+    return "🧠"
+
+class StreamingReply:
+    """A reply message edited in place while the LLM streams it
+
+    The message is sent at the first token and then edited at most once every
+    TELEGRAM_EDIT_INTERVAL seconds, keeping well within Telegram's edit rate
+    limits. Interim edits are plain text since a partial reply is often invalid
+    Markdown; finish() writes the complete reply with Markdown.
+    """
+
+    def __init__(self, message, emoji: str):
+        self.message = message
+        self.emoji = emoji
+        self.text = ""
+        self.sent = None
+        self.shown = None
+        self.next_edit = 0.0
+
+    async def _edit(self, text: str, parse_mode=None):
+        if (text, parse_mode) == self.shown:
+            return
+        try:
+            await self.sent.edit_text(text, parse_mode=parse_mode)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self.next_edit = time.monotonic() + retry_after
+            raise
+        self.shown = (text, parse_mode)
+        self.next_edit = time.monotonic() + settings.TELEGRAM_EDIT_INTERVAL
+
+    async def add(self, token: str):
+        """Append a streamed token, updating the message when the throttle allows"""
+        self.text += token
+        preview = f"{self.emoji} {self.text[:4000]}"
+        if self.sent is None:
+            self.sent = await self.message.reply_text(preview)
+            self.shown = (preview, None)
+            self.next_edit = time.monotonic() + settings.TELEGRAM_EDIT_INTERVAL
+        elif time.monotonic() >= self.next_edit:
+            try:
+                await self._edit(preview)
+            except (RetryAfter, BadRequest):
+                # Skipped interim edits are caught up by the next one or by finish()
+                pass
+
+    async def finish(self, response_content: str):
+        """Replace the streamed text with the complete reply (split past 4000 characters)"""
+        chunks = [response_content[i:i+4000] for i in range(0, len(response_content), 4000)] or [""]
+        first = f"{self.emoji} {chunks[0]}"
+        for attempt in range(2):
+            try:
+                await self._edit(first, parse_mode='Markdown')
+                break
+            except RetryAfter:
+                await asyncio.sleep(max(0.0, self.next_edit - time.monotonic()))
+            except BadRequest:
+                # Not valid Markdown: keep the reply as plain text
+                await self._edit(first)
+                break
+        for chunk in chunks[1:]:
+            await self.message.reply_text(chunk, parse_mode='Markdown')
+
+async def schedule(update: Update, job):
+    """Queue a job behind the chat's running and pending turns, telling the user when it has to wait"""
+    chat_id = update.effective_chat.id
+    
+    try:
+        ahead = scheduler.submit(chat_id, job)
+    except QueueFullError:
+        await update.message.reply_text(
+            "⏳ I'm busy with your previous messages. Please wait for them to finish and try again."
+        )
+        return
+    
+    if ahead:
+        await update.message.reply_text(f"⏳ Busy, your message is queued at position {ahead}.")
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Start command handler"""
-    user_id = update.effective_user.id
+    """Start command handler (runs after the chat's pending turns)"""
+    await schedule(update, lambda: start_session(update))
+
+async def start_session(update: Update):
+    """Greet the user, reloading their stored history"""
+    chat_id = update.effective_chat.id
     
-    existing_conversation = db_client.load_conversation(SINGLE_SESSION_ID)
-    if existing_conversation and existing_conversation.get("messages"):
-        user_sessions[user_id] = {
-            "messages": [
-                {"role": msg["role"], "content": msg["content"]} 
-                for msg in existing_conversation["messages"]
-            ],
-            "message_type": None
-        }
+    # Reloaded from MongoDB, so the greeting reflects the stored history
+    user_sessions.discard(chat_id)
+    state = await asyncio.to_thread(user_sessions.load, chat_id)
+    if state["messages"]:
         await update.message.reply_text(
             "Welcome back! 👋\n\n"
             "I've loaded your previous conversation history.\n"
             "I can analyze GitHub repositories, user profiles, and provide logical assistance!"
         )
     else:
-        user_sessions[user_id] = {
-            "messages": [],
-            "message_type": None
-        }
         await update.message.reply_text(
             "Hello! 👋 I'm your AI assistant with multiple capabilities:\n\n"
             "👤 **GitHub User Analyzer**\n"
@@ -47,45 +156,56 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 async def clear_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Clear conversation history"""
-    user_id = update.effective_user.id
+    """Clear conversation history (after the chat's pending turns, so none writes it back)"""
+    await schedule(update, lambda: clear_session(update))
+
+async def clear_session(update: Update):
+    """Drop the stored and in-memory history of a chat"""
+    chat_id = update.effective_chat.id
     
-    db_client.clear_conversation(SINGLE_SESSION_ID)
+    await asyncio.to_thread(write_queue.clear_conversation, session_id_for(chat_id))
     
-    user_sessions[user_id] = {
-        "messages": [],
-        "message_type": None
-    }
+    user_sessions.put(chat_id, {"messages": [], "message_type": None})
     
     await update.message.reply_text("✅ Your conversation history has been cleared!")
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle incoming messages"""
+    """Handle incoming messages by queueing them on the per-chat scheduler"""
+    await schedule(update, lambda: process_message(update))
+
+async def process_message(update: Update):
+    """Run the graph for one message (called by the scheduler, one turn per chat at a time)"""
+    chat_id = update.effective_chat.id
     user_id = update.effective_user.id
     user_message = update.message.text
     
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {
-            "messages": [],
-            "message_type": None
-        }
-    
-    state = user_sessions[user_id]
+    state = await asyncio.to_thread(user_sessions.load, chat_id)
     state["messages"].append({"role": "user", "content": user_message})
     
     await update.message.chat.send_action(action="typing")
     
     try:
-        result = graph.invoke(
+        result = state
+        reply = None
+        async for kind, payload in astream_turn(
+            get_graph(),
             state,
             config={
                 "run_name": "telegram_app",
                 "tags": ["telegram", "pr-impressionable-suppression-36"],
-                "metadata": {"user_id": user_id},
+                "metadata": {"user_id": user_id, "chat_id": chat_id},
             },
-        )
-        user_sessions[user_id] = result
-        db_client.save_conversation(result, SINGLE_SESSION_ID)
+        ):
+            if kind == "state":
+                result = payload
+                continue
+            if reply is None:
+                reply = StreamingReply(update.message, reply_emoji(result.get("message_type", "logical")))
+            await reply.add(payload)
+        
+        user_sessions.put(chat_id, result)
+        # Saved in the background, the reply does not wait for the database
+        write_queue.enqueue(result, session_id_for(chat_id))
         
         if result.get("messages") and len(result["messages"]) > 0:
             last_message = result["messages"][-1]
@@ -95,17 +215,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 response_content = last_message.content
             
-            # Select emoji based on message type
-            message_type = result.get("message_type", "logical")
-            if message_type == "Github_user":
-                emoji = "👤"
-            elif message_type == "Github":
-                emoji = "🔍"
-            else:
-                emoji = "🧠"
+            emoji = reply_emoji(result.get("message_type", "logical"))
             
+            if reply:
+                await reply.finish(response_content)
             # Split long messages for Telegram (max 4096 characters)
-            if len(response_content) > 4000:
+            elif len(response_content) > 4000:
                 chunks = [response_content[i:i+4000] for i in range(0, len(response_content), 4000)]
                 for i, chunk in enumerate(chunks):
                     if i == 0:
@@ -131,19 +246,131 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def get_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Get conversation statistics"""
-    stats = db_client.get_conversation_stats(SINGLE_SESSION_ID)
+    session_id = session_id_for(update.effective_chat.id)
+    stats = await asyncio.to_thread(write_queue.get_conversation_stats, session_id)
     
     if stats:
         stats_text = (
             "📊 **Conversation Statistics**\n\n"
             f"Total Messages: {stats['total_messages']}\n"
             f"Your Messages: {stats['user_messages']}\n"
-            f"My Responses: {stats['assistant_messages']}"
+            f"My Responses: {stats['assistant_messages']}\n"
+            f"Repo / User / Logical: {stats['routes'].get('Github', 0)} / "
+            f"{stats['routes'].get('Github_user', 0)} / {stats['routes'].get('logical', 0)}"
         )
         await update.message.reply_text(stats_text, parse_mode='Markdown')
     else:
         await update.message.reply_text("No conversation history found. Start chatting with me!")
 
+async def queue_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show scheduler queue metrics"""
+    stats = scheduler.stats()
+    persistence = write_queue.stats()
+    sessions = user_sessions.stats()
+    stats_text = (
+        "⚙️ **Queue Status**\n\n"
+        f"Running: {stats['running']}/{stats['max_concurrency']}\n"
+        f"Queued: {stats['queued']}\n"
+        f"Active Chats: {stats['active_chats']}\n"
+        f"Completed: {stats['completed']} (failed: {stats['failed']}, rejected: {stats['rejected']})\n"
+        f"Avg Wait: {stats['avg_wait_seconds']:.2f}s (max: {stats['max_wait_seconds']:.2f}s)\n\n"
+        f"Sessions in Memory: {sessions['sessions']}/{sessions['max_sessions']} "
+        f"({sessions['bytes'] / 1024:.0f}/{sessions['max_bytes'] / 1024:.0f} KB)\n"
+        f"Session Hits: {sessions['hits']} (reloaded: {sessions['rehydrations']}, "
+        f"evicted: {sessions['evictions']}, expired: {sessions['expirations']}, trimmed: {sessions['trims']})\n\n"
+        f"Unsaved Chats: {persistence['pending_sessions']}\n"
+        f"Saved Turns: {persistence['flushed_turns']} in {persistence['flushes']} flushes "
+        f"(errors: {persistence['errors']})\n"
+        f"Avg Flush: {persistence['avg_flush_seconds'] * 1000:.1f}ms (max: {persistence['max_flush_seconds'] * 1000:.1f}ms)"
+    )
+    await update.message.reply_text(stats_text, parse_mode='Markdown')
+
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show per-node latency, token, GitHub and MongoDB metrics (admins only)"""
+    if update.effective_user.id not in settings.ADMIN_USER_IDS:
+        await update.message.reply_text("⛔ This command is only available to admins.")
+        return
+    
+    summary = metrics_summary()
+    lines = ["⏱️ **Node Metrics** (averages per run)\n"]
+    for node, stats in summary.items():
+        lines.append(
+            f"`{node}`: {stats['runs']} runs ({stats['errors']} errors)\n"
+            f"Latency: {stats['avg_ms']:.0f}ms avg, p95 ≤ {stats['p95_ms']:.0f}ms\n"
+            f"Tokens: {stats['avg_prompt_tokens']:.0f} prompt / {stats['avg_completion_tokens']:.0f} completion\n"
+            f"GitHub: {stats['avg_github_requests']:.1f} requests, {stats['avg_github_bytes'] / 1024:.1f} KB\n"
+            f"MongoDB: {stats['avg_mongo_ms']:.1f}ms\n"
+        )
+    if not summary:
+        lines.append("No graph runs measured yet.\n")
+    
+    classified = sum(classifier_stats.values())
+    cache = classification_cache.stats()
+    lines.append(
+        "🧭 **Classifier**\n"
+        f"Routed: {classifier_stats['fast_path']} fast path / {classifier_stats['cache']} cached / "
+        f"{classifier_stats['llm']} LLM "
+        f"({(classified - classifier_stats['llm']) / classified if classified else 0:.0%} without the LLM)\n"
+        f"Cache: {cache['entries']} entries ({cache['bytes'] / 1024:.0f} KB), {cache['hits']} hits / "
+        f"{cache['misses']} misses ({cache['hit_ratio']:.0%} hit ratio, evicted: {cache['evictions']})\n"
+    )
+    
+    github = github_cache.stats()
+    lookups = github['hits'] + github['misses']
+    lines.append(
+        "🗄️ **GitHub Cache**\n"
+        f"Entries: {github['entries']} ({github['bytes'] / 1024:.0f} KB, evicted: {github['evictions']})\n"
+        f"Hits: {github['hits']} / Misses: {github['misses']} ({github['revalidations']} revalidated by ETag)\n"
+        f"Served from cache: {(github['hits'] + github['revalidations']) / lookups if lookups else 0:.0%}"
+    )
+    await update.message.reply_text("\n".join(lines), parse_mode='Markdown')
+
+async def sweep_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start scoring every repository of a user or organisation in the background"""
+    chat_id = update.effective_chat.id
+    owner = parse_owner(context.args[0]) if context.args else None
+    if not owner:
+        await update.message.reply_text("Usage: /sweep <GitHub user or organisation>")
+        return
+    if chat_id in active_sweeps:
+        await update.message.reply_text("⏳ A sweep is already running in this chat, please wait for its report.")
+        return
+    
+    active_sweeps.add(chat_id)
+    # Runs as its own task: a sweep of thousands of repos must not hold up other updates
+    context.application.create_task(run_sweep(update, owner))
+
+async def run_sweep(update: Update, owner: str):
+    """Post sweep progress by editing one message, then send the aggregate report"""
+    chat_id = update.effective_chat.id
+    try:
+        progress = await update.message.reply_text(f"⏳ Sweeping {owner}...")
+        next_edit = time.monotonic() + settings.TELEGRAM_EDIT_INTERVAL
+        report = None
+        async for kind, snapshot in asweep(owner):
+            if kind == "done":
+                report = format_report(snapshot)
+            elif time.monotonic() >= next_edit:
+                try:
+                    await progress.edit_text(format_progress(snapshot), parse_mode='Markdown')
+                except (RetryAfter, BadRequest):
+                    # Skipped progress edits are superseded by the next one or the report
+                    pass
+                next_edit = time.monotonic() + settings.TELEGRAM_EDIT_INTERVAL
+        
+        for chunk in [report[i:i+4000] for i in range(0, len(report), 4000)]:
+            try:
+                await update.message.reply_text(chunk, parse_mode='Markdown')
+            except BadRequest:
+                await update.message.reply_text(chunk)
+    except UnknownObjectException:
+        await update.message.reply_text(f"❌ GitHub user or organisation {owner} not found.")
+    except Exception as e:
+        print(f"Sweep error: {e}")
+        await update.message.reply_text("❌ Sorry, the sweep failed. Please try again later.")
+    finally:
+        active_sweeps.discard(chat_id)
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Help command"""
     help_text = (
@@ -157,12 +384,20 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Send a repo URL:\n"
         "`https://github.com/owner/repo`\n"
         "Get code quality grades on 10 categories\n\n"
+        "⚖️ **Comparison**\n"
+        "Send several repo or profile URLs in one message\n"
+        "They are analysed in parallel and compared\n\n"
+        "📦 **Sweep**\n"
+        "`/sweep owner` scores every repo of a user or organisation\n"
+        "and reports languages, scores and stale repos\n\n"
         "🧠 **Logical Assistance**\n"
         "Ask me general questions\n\n"
         "**Commands:**\n"
         "/start - Start conversation\n"
         "/clear - Clear history\n"
         "/stats - View statistics\n"
+        "/queue - View queue status\n"
+        "/sweep - Sweep all repos of a user or org\n"
         "/help - Show this help\n\n"
         "**Examples:**\n"
         "• `https://github.com/torvalds` - User profile\n"
@@ -197,6 +432,10 @@ def main():
         print("❌ Error: TELEGRAM_BOT_TOKEN not found in .env file")
         return
     
+    # Build the graph and models while the bot connects to Telegram
+    registry.warm_up()
+    start_metrics_server()
+    get_db_client().ensure_indexes()
     application = Application.builder().token(token).build()
     
     application.add_handler(CommandHandler("start", start))
@@ -204,6 +443,9 @@ def main():
     application.add_handler(CommandHandler("stats", get_stats))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("example", example_command))
+    application.add_handler(CommandHandler("queue", queue_status))
+    application.add_handler(CommandHandler("metrics", metrics_command))
+    application.add_handler(CommandHandler("sweep", sweep_command))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     print("=" * 50)
@@ -214,7 +456,10 @@ def main():
     print("=" * 50)
     print("Press Ctrl+C to stop.")
     
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        write_queue.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""GitHub stub, fake models and in-memory database for tests that run the agents end to end"""
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from benchmarks.e2e import install_stand_ins
+from benchmarks.github_stub import GitHubStub
+from src.utils.github_cache import github_cache
+
+_stub = None
+
+
+class RecordingStub(GitHubStub):
+    """GitHub stub that also keeps the path of every request"""
+
+    def __init__(self):
+        super().__init__()
+        self.paths = []
+
+    def respond(self, method, target, body, headers):
+        with self._lock:
+            self.paths.append(target.split("?")[0])
+        return super().respond(method, target, body, headers)
+
+
+def github_stub() -> RecordingStub:
+    """Start the stub and install the stand-ins once per test run
+
+    The GitHub cache is emptied on every call so each test sees its own requests.
+    """
+    global _stub
+    if _stub is None:
+        _stub = RecordingStub()
+        install_stand_ins(SimpleNamespace(llm_latency=0.0, token_rate=0, reply_tokens=5), _stub.start())
+    github_cache.clear()
+    _stub.paths.clear()
+    return _stub
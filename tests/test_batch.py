@@ -0,0 +1,27 @@
+import asyncio
+import unittest
+
+from batch_app import analyse, parse_target
+from tests.stand_ins import github_stub
+
+
+class DottedRepoBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = github_stub()
+
+    def test_dotted_repo_names_are_parsed_whole(self):
+        for line in ("vercel/next.js", "https://github.com/vercel/next.js", "github.com/vercel/next.js.git"):
+            target = parse_target(line)
+            self.assertEqual((target["owner"], target["repo"]), ("vercel", "next.js"), line)
+
+    def test_dotted_repo_is_fetched_and_graded_as_given(self):
+        result = asyncio.run(analyse(parse_target("vercel/next.js"), include_data=True))
+
+        self.assertEqual((result["status"], result["target"]), ("ok", "vercel/next.js"))
+        self.assertEqual(result["data"]["full_name"], "vercel/next.js")
+        self.assertIn("/repos/vercel/next.js", self.stub.paths)
+        self.assertNotIn("/repos/vercel/next", self.stub.paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
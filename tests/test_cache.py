@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from src.utils.cache import TTLCache
+from src.utils.github_cache import cached_fetch, github_cache
+from src.utils.github_client import get_github
+from tests.stand_ins import github_stub
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_entries_expire_but_stay_available_for_revalidation(self):
+        cache = TTLCache(ttl=10, max_entries=10, max_bytes=10 ** 6)
+        with mock.patch("src.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("k", {"v": 1}, etag='"e1"')
+            self.assertEqual(cache.get("k"), {"v": 1})
+        with mock.patch("src.utils.cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("k"))
+            self.assertEqual(cache.peek("k").etag, '"e1"')
+            cache.refresh("k")
+            self.assertEqual(cache.get("k"), {"v": 1})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["revalidations"]), (2, 1, 1))
+        self.assertAlmostEqual(stats["hit_ratio"], 2 / 3)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TTLCache(ttl=10, max_entries=2, max_bytes=10 ** 6)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual([key for key, _ in cache.snapshot()], ["a", "c"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_values_over_the_byte_cap_are_not_cached(self):
+        cache = TTLCache(ttl=10, max_entries=10, max_bytes=16)
+        cache.set("big", "x" * 100)
+        self.assertIsNone(cache.peek("big"))
+
+
+class CachedFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = github_stub()
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        headers, data = get_github().requester.requestJsonAndCheck("GET", "/repos/o/r")
+        return data, headers.get("etag")
+
+    def expire(self, key):
+        github_cache.peek(key).expires_at = 0
+
+    def test_stale_entry_is_revalidated_with_a_304(self):
+        first = cached_fetch("repo:o/r", "/repos/o/r", self.fetch)
+        self.assertIs(cached_fetch("repo:o/r", "/repos/o/r", self.fetch), first)
+        self.expire("repo:o/r")
+
+        revalidations = github_cache.stats()["revalidations"]
+        self.assertIs(cached_fetch("repo:o/r", "/repos/o/r", self.fetch), first)
+        self.assertEqual(self.fetches, 1)
+        # The fetch and the conditional GET answered 304 by the stub
+        self.assertEqual(self.stub.paths.count("/repos/o/r"), 2)
+        self.assertEqual(github_cache.stats()["revalidations"], revalidations + 1)
+        self.assertTrue(github_cache.peek("repo:o/r").fresh)
+
+    def test_changed_resource_is_fetched_again(self):
+        cached_fetch("repo:o/r", "/repos/o/r", self.fetch)
+        entry = github_cache.peek("repo:o/r")
+        entry.etag, entry.expires_at = '"outdated"', 0
+
+        cached_fetch("repo:o/r", "/repos/o/r", self.fetch)
+        self.assertEqual(self.fetches, 2)
+        self.assertNotEqual(github_cache.peek("repo:o/r").etag, '"outdated"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.config.settings import settings
+from src.utils import classification_cache as cache_module
+
+
+class ClassificationCacheSaveTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "classifications.json")
+        for name, value in (("CLASSIFIER_CACHE_FILE", self.path), ("CLASSIFIER_CACHE_SAVE_EVERY", 2)):
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cache_module.classification_cache.clear()
+        cache_module._unsaved = 0
+
+    def wait_for_save(self):
+        if cache_module._save_thread:
+            cache_module._save_thread.join()
+
+    def test_saves_in_the_background_every_n_inserts(self):
+        writers = []
+        dump = json.dump
+
+        def recording_dump(*args, **kwargs):
+            writers.append(threading.current_thread())
+            return dump(*args, **kwargs)
+
+        with mock.patch.object(cache_module.json, "dump", recording_dump):
+            cache_module.store_classification("hello", {"message_type": "logical"})
+            self.assertFalse(os.path.exists(self.path))
+            cache_module.store_classification("what is a monad?", {"message_type": "logical"})
+            self.wait_for_save()
+
+        self.assertEqual(len(writers), 1)
+        self.assertIsNot(writers[0], threading.current_thread())
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual({entry["key"] for entry in json.load(f)}, {"hello", "what is a monad"})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["classifications.json"])
+
+    def test_failed_save_keeps_the_previous_file(self):
+        cache_module.store_classification("one", {"message_type": "logical"})
+        cache_module.store_classification("two", {"message_type": "logical"})
+        self.wait_for_save()
+
+        cache_module.store_classification("three", {"message_type": "logical"})
+        with mock.patch.object(cache_module.json, "dump", side_effect=OSError("disk full")):
+            cache_module.save_cache()
+
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual({entry["key"] for entry in json.load(f)}, {"one", "two"})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["classifications.json"])
+
+        cache_module.classification_cache.clear()
+        cache_module.load_cache()
+        self.assertEqual(cache_module.get_classification("Two!"), {"message_type": "logical"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from src.agents.classifier import _fast_classify
+from src.agents.router import route
+from src.config.settings import settings
+
+
+def targets(update: dict) -> list[tuple]:
+    return [(t["username"], t["repo_name"]) for t in update["targets"]]
+
+
+class FastClassifyUrlTest(unittest.TestCase):
+    def test_comma_separated_urls_are_all_targets(self):
+        update, confidence = _fast_classify("compare https://github.com/facebook/react, https://github.com/vuejs/core")
+        self.assertEqual(targets(update), [("facebook", "react"), ("vuejs", "core")])
+        self.assertEqual(confidence, 0.9)
+
+    def test_trailing_period_is_not_part_of_the_repo_name(self):
+        update, _ = _fast_classify("compare https://github.com/facebook/react and https://github.com/vuejs/core.")
+        self.assertEqual(targets(update), [("facebook", "react"), ("vuejs", "core")])
+
+    def test_single_url_followed_by_punctuation(self):
+        for text in ("https://github.com/facebook/react.", "https://github.com/facebook/react!",
+                     "https://github.com/facebook/react;"):
+            update, confidence = _fast_classify(text)
+            self.assertEqual((update["message_type"], update["repo_name"]), ("Github", "react"), text)
+            self.assertEqual(confidence, 1.0, text)
+
+    def test_user_url_followed_by_punctuation(self):
+        update, _ = _fast_classify("https://github.com/torvalds, please")
+        self.assertEqual((update["message_type"], update["username"], update["repo_name"]),
+                         ("Github_user", "torvalds", None))
+
+    def test_dots_inside_repo_names_are_kept(self):
+        update, _ = _fast_classify("look at https://github.com/vercel/next.js.")
+        self.assertEqual(update["repo_name"], "next.js")
+
+
+class CompareTargetLimitTest(unittest.TestCase):
+    def test_route_analyses_at_most_max_compare_targets(self):
+        listed = [{"kind": "Github", "username": "o", "repo_name": f"r{i}"} for i in range(settings.MAX_COMPARE_TARGETS + 3)]
+        sends = route({"messages": [], "message_type": "Github", "targets": listed})
+        self.assertEqual([send.arg["target"] for send in sends], listed[:settings.MAX_COMPARE_TARGETS])
+
+
+if __name__ == "__main__":
+    unittest.main()
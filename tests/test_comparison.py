@@ -0,0 +1,24 @@
+import asyncio
+import unittest
+
+from tests.stand_ins import github_stub
+
+
+class DottedRepoComparisonTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = github_stub()
+
+    def test_dotted_repo_name_is_analysed_as_given(self):
+        from src.utils.graph_builder import get_graph
+
+        text = "compare https://github.com/vercel/next.js and https://github.com/facebook/react"
+        result = asyncio.run(get_graph().ainvoke({"messages": [{"role": "user", "content": text}], "message_type": None}))
+
+        self.assertEqual(sorted(a["target"] for a in result["analyses"]), ["facebook/react", "vercel/next.js"])
+        self.assertTrue(all(not a["content"].startswith("ANALYSIS FAILED") for a in result["analyses"]))
+        self.assertIn("/repos/vercel/next.js", self.stub.paths)
+        self.assertNotIn("/repos/vercel/next", self.stub.paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from src.utils.github_client import BACKGROUND, RateLimitGovernor, github_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimitGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for name in ("time", "sleep"):
+            patcher = mock.patch(f"src.utils.github_client.time.{name}", getattr(self.clock, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.governor = RateLimitGovernor(reserve=10, max_inflight=4, max_wait=30)
+
+    def budget(self, remaining: int, reset_in: float, status: int = 200, **extra):
+        """Report the headers of a response (to a request that took an in-flight slot)"""
+        self.governor._inflight.acquire()
+        headers = {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Limit": "5000",
+                   "X-RateLimit-Reset": str(self.clock.now + reset_in), **extra}
+        self.governor.after_response(status, headers)
+
+    def request(self, priority: str | None = None) -> float:
+        """Seconds a request waited before being sent"""
+        slept = len(self.clock.slept)
+        if priority:
+            with github_priority(priority):
+                self.governor.before_request("/repos/o/r")
+        else:
+            self.governor.before_request("/repos/o/r")
+        self.governor._inflight.release()
+        return sum(self.clock.slept[slept:])
+
+    def test_interactive_requests_may_spend_the_reserve(self):
+        self.budget(remaining=5, reset_in=600)
+        self.assertEqual(self.request(), 0)
+        self.assertEqual(self.governor.stats()["resources"]["core"]["remaining"], 4)
+
+    def test_background_requests_wait_for_the_reset_inside_the_reserve(self):
+        self.budget(remaining=10, reset_in=600)
+        self.assertAlmostEqual(self.request(BACKGROUND), 600)
+        self.assertEqual(self.governor.stats()["waits"], 1)
+
+    def test_background_requests_are_spread_over_the_window(self):
+        self.budget(remaining=20, reset_in=100)
+        self.assertEqual(self.request(BACKGROUND), 0)
+        # 9 spendable requests left for 100 seconds
+        self.assertAlmostEqual(self.request(BACKGROUND), 100 / 9, places=3)
+
+    def test_interactive_wait_is_capped(self):
+        self.budget(remaining=0, reset_in=600)
+        self.assertAlmostEqual(self.request(), 30)
+
+    def test_retry_after_blocks_every_request(self):
+        self.budget(remaining=4000, reset_in=600, status=403, **{"Retry-After": "20"})
+        self.assertAlmostEqual(self.request(), 20)
+        self.assertEqual(self.governor.stats()["secondary_limit_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import unittest
+
+from src.utils import history
+from src.utils.registry import registry
+
+
+class FakeEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+class TokenizerLoadingTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.loaded_on = []
+
+        def slow_loader():
+            # Stands in for tiktoken downloading its BPE file
+            self.loaded_on.append(threading.current_thread())
+            self.release.wait(5)
+            return FakeEncoding()
+
+        registry.register("tokenizer", slow_loader)
+        registry._instances.pop("tokenizer", None)
+        history._encoding_requested = False
+        self.addCleanup(self.restore)
+
+    def restore(self):
+        self.release.set()
+        registry.register("tokenizer", history._load_encoding)
+        registry._instances.pop("tokenizer", None)
+        history._encoding_requested = False
+
+    def test_counts_are_estimated_while_the_tokenizer_loads_in_the_background(self):
+        text = "one two three four five six seven eight"
+        self.assertEqual(history.count_tokens(text), len(text) // 4 + 1)
+        self.assertFalse(registry.is_built("tokenizer"))
+
+        self.release.set()
+        registry.warm_up(["tokenizer"]).join(5)
+        self.assertNotIn(threading.current_thread(), self.loaded_on)
+        self.assertEqual(history.count_tokens(text), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
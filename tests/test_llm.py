@@ -0,0 +1,52 @@
+import json
+import os
+import unittest
+
+import httpx
+
+from src.utils.llm import _build_model
+from src.utils.metrics import node_completion_tokens, node_prompt_tokens, node_run
+from src.utils.registry import registry
+
+
+def _chunk(**fields) -> str:
+    body = {"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o", **fields}
+    return f"data: {json.dumps(body)}\n\n"
+
+
+def _openai_stream(request: httpx.Request) -> httpx.Response:
+    """Streamed chat completion that, like the API, only reports usage when asked to"""
+    payload = json.loads(request.content)
+    events = [
+        _chunk(choices=[{"index": 0, "delta": {"role": "assistant", "content": "Hello"}, "finish_reason": None}]),
+        _chunk(choices=[{"index": 0, "delta": {"content": " there"}, "finish_reason": "stop"}]),
+    ]
+    if (payload.get("stream_options") or {}).get("include_usage"):
+        events.append(_chunk(choices=[], usage={"prompt_tokens": 12, "completion_tokens": 2, "total_tokens": 14}))
+    events.append("data: [DONE]\n\n")
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, content="".join(events).encode())
+
+
+class StreamedUsageTest(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("OPENAI_API_KEY", "test")
+        registry.override("llm_http_client", httpx.Client(transport=httpx.MockTransport(_openai_stream)))
+
+    def test_streamed_reply_reports_tokens(self):
+        model = _build_model("gpt-4o")
+        with node_run("streamed_usage_test"):
+            reply = None
+            for chunk in model.stream([{"role": "user", "content": "hi"}]):
+                reply = chunk if reply is None else reply + chunk
+
+        self.assertEqual(reply.content, "Hello there")
+        # Counted by the conversation stats (llm_tokens) and the node token histograms
+        self.assertEqual(reply.usage_metadata["total_tokens"], 14)
+        series = dict(node_prompt_tokens.series())[(("node", "streamed_usage_test"),)]
+        self.assertEqual(series["sum"], 12)
+        series = dict(node_completion_tokens.series())[(("node", "streamed_usage_test"),)]
+        self.assertEqual(series["sum"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
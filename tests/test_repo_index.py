@@ -0,0 +1,65 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.config.settings import settings
+from src.utils import repo_index
+
+
+class FakeGithub:
+    """Serves repos per owner, newest first as requested with sort="created" """
+
+    def __init__(self):
+        self.repos = {}
+
+    def get_user(self, owner):
+        if owner not in self.repos:
+            raise LookupError(owner)
+        names = self.repos[owner]
+        return SimpleNamespace(get_repos=lambda **kwargs: [SimpleNamespace(name=name) for name in reversed(names)])
+
+
+class RepoIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.github = FakeGithub()
+        patcher = mock.patch.object(repo_index, "get_github", lambda: self.github)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        repo_index._indexes.clear()
+        repo_index._owner_locks.clear()
+        self.addCleanup(repo_index._indexes.clear)
+
+    def test_top_k_ranks_similar_names_first(self):
+        self.github.repos["o"] = ["freelance-web", "linux", "dotfiles", "web-freelance-api"]
+        names = [name for name, _ in repo_index.get_repo_index("o").top_k("freelance-web", k=2)]
+        self.assertEqual(names[0], "freelance-web")
+        self.assertIn("web-freelance-api", names)
+
+    def test_refresh_swaps_in_a_new_index(self):
+        self.github.repos["o"] = ["a-repo", "b-repo"]
+        first = repo_index.get_repo_index("o")
+        self.github.repos["o"].append("c-repo")
+
+        with mock.patch.object(settings, "REPO_INDEX_REFRESH", -1):
+            refreshed = repo_index.get_repo_index("o")
+
+        self.assertIsNot(refreshed, first)
+        self.assertEqual(first.names, ["b-repo", "a-repo"])
+        self.assertEqual(refreshed.names, ["c-repo", "b-repo", "a-repo"])
+        self.assertEqual(refreshed.built_at, first.built_at)
+        self.assertIs(repo_index.get_repo_index("o"), refreshed)
+
+    def test_owner_locks_are_dropped_with_their_index(self):
+        with mock.patch.object(settings, "REPO_INDEX_MAX_OWNERS", 2):
+            for i in range(5):
+                self.github.repos[f"owner{i}"] = ["repo"]
+                repo_index.get_repo_index(f"owner{i}")
+            with self.assertRaises(LookupError):
+                repo_index.get_repo_index("missing")
+
+        self.assertEqual(set(repo_index._indexes), {"owner3", "owner4"})
+        self.assertEqual(set(repo_index._owner_locks), {"owner3", "owner4"})
+
+
+if __name__ == "__main__":
+    unittest.main()
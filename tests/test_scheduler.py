@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import telegram_app
+from src.database.write_behind import WriteBehindQueue
+from src.utils.scheduler import ChatScheduler, QueueFullError
+from src.utils.session_store import SessionStore
+from tests.test_write_behind import make_client, turn
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def fake_update(chat_id: int):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id), message=FakeMessage())
+
+
+async def drained(scheduler: ChatScheduler):
+    while scheduler.stats()["active_chats"]:
+        await asyncio.sleep(0)
+
+
+class ChatSchedulerTest(unittest.TestCase):
+    def test_jobs_of_a_chat_run_in_order_one_at_a_time(self):
+        events = []
+
+        async def scenario():
+            scheduler = ChatScheduler(max_concurrency=4, max_queue_per_chat=5)
+
+            def job(name):
+                async def run():
+                    events.append(("start", name))
+                    await asyncio.sleep(0)
+                    events.append(("end", name))
+                return run
+
+            ahead = [scheduler.submit("a", job(i)) for i in range(3)]
+            await drained(scheduler)
+            return ahead, scheduler.stats()
+
+        ahead, stats = asyncio.run(scenario())
+        self.assertEqual(ahead, [0, 1, 2])
+        self.assertEqual(events, [(kind, i) for i in range(3) for kind in ("start", "end")])
+        self.assertEqual((stats["completed"], stats["queued"], stats["active_chats"]), (3, 0, 0))
+
+    def test_chats_run_concurrently_up_to_the_limit(self):
+        async def scenario():
+            scheduler = ChatScheduler(max_concurrency=2, max_queue_per_chat=5)
+            running, peak = 0, 0
+            release = asyncio.Event()
+
+            async def job():
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await release.wait()
+                running -= 1
+
+            for chat in range(4):
+                scheduler.submit(chat, job)
+            for _ in range(5):
+                await asyncio.sleep(0)
+            busy = scheduler.stats()["running"]
+            release.set()
+            await drained(scheduler)
+            return busy, peak
+
+        self.assertEqual(asyncio.run(scenario()), (2, 2))
+
+    def test_full_queue_rejects_and_failures_do_not_stop_the_chat(self):
+        async def scenario():
+            scheduler = ChatScheduler(max_concurrency=1, max_queue_per_chat=2)
+            done = []
+
+            async def failing():
+                raise RuntimeError("boom")
+
+            async def ok():
+                done.append(True)
+
+            scheduler.submit("a", failing)
+            scheduler.submit("a", ok)
+            with self.assertRaises(QueueFullError):
+                scheduler.submit("a", ok)
+            # Other chats have their own queue
+            scheduler.submit("b", ok)
+            await drained(scheduler)
+            return done, scheduler.stats()
+
+        done, stats = asyncio.run(scenario())
+        self.assertEqual(len(done), 2)
+        self.assertEqual((stats["completed"], stats["failed"], stats["rejected"]), (2, 1, 1))
+
+
+class ClearDuringTurnTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = WriteBehindQueue(make_client(), batch_size=100, flush_interval=3600)
+        self.sessions = SessionStore(
+            lambda chat_id: self.queue.load_conversation(telegram_app.session_id_for(chat_id)),
+            max_sessions=10, max_bytes=10 ** 6, idle_ttl=3600, max_messages=100,
+        )
+
+    def test_clear_sent_during_a_turn_runs_after_it(self):
+        update = fake_update(1)
+
+        async def scenario():
+            scheduler = ChatScheduler(max_concurrency=2, max_queue_per_chat=5)
+            release = asyncio.Event()
+
+            async def running_turn():
+                # Tail of process_message: the finished turn is kept and saved
+                await release.wait()
+                state = turn("hi", "hello")
+                self.sessions.put(1, state)
+                self.queue.enqueue(state, telegram_app.session_id_for(1))
+
+            with mock.patch.multiple(telegram_app, scheduler=scheduler, user_sessions=self.sessions,
+                                     write_queue=self.queue):
+                scheduler.submit(1, running_turn)
+                await asyncio.sleep(0)
+                await telegram_app.clear_history(update, None)
+                release.set()
+                await drained(scheduler)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.sessions.load(1)["messages"], [])
+        self.queue.flush()
+        self.assertIsNone(self.queue.load_conversation(telegram_app.session_id_for(1)))
+        self.assertEqual(update.message.replies[-1], "✅ Your conversation history has been cleared!")
+
+
+if __name__ == "__main__":
+    unittest.main()
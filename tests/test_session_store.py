@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+
+from src.utils.session_store import SessionStore
+
+
+def messages(count: int, start: int = 0) -> list[dict]:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(start, start + count)]
+
+
+class FakeLoader:
+    """Stored conversations, of which the loader returns the last `window` messages"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.conversations = {}
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        stored = self.conversations.get(key)
+        return {"messages": stored[-self.window:]} if stored else None
+
+
+def make_store(loader, **caps) -> SessionStore:
+    options = {"max_sessions": 10, "max_bytes": 10 ** 6, "idle_ttl": 3600, "max_messages": 8}
+    options.update(caps)
+    return SessionStore(loader, **options)
+
+
+class SessionStoreTest(unittest.TestCase):
+    def test_resident_sessions_are_served_without_the_loader(self):
+        loader = FakeLoader(window=4)
+        store = make_store(loader)
+        store.put("chat", {"messages": messages(2), "message_type": "Github", "repo_name": "react"})
+
+        state = store.load("chat")
+        self.assertEqual(loader.calls, 0)
+        self.assertEqual((state["message_type"], state["repo_name"]), ("Github", "react"))
+        # The caller gets its own list to append to
+        state["messages"].append({"role": "user", "content": "more"})
+        self.assertEqual(len(store.get("chat")["messages"]), 2)
+
+    def test_least_recently_used_session_is_evicted_first(self):
+        store = make_store(FakeLoader(window=4), max_sessions=2)
+        store.put("a", {"messages": messages(1)})
+        store.put("b", {"messages": messages(1)})
+        store.get("a")
+        store.put("c", {"messages": messages(1)})
+
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNotNone(store.get("c"))
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_byte_cap_evicts_sessions(self):
+        store = make_store(FakeLoader(window=4), max_bytes=300)
+        store.put("a", {"messages": messages(2)})
+        store.put("b", {"messages": messages(2)})
+        stats = store.stats()
+        self.assertLessEqual(stats["bytes"], 300)
+        self.assertEqual((stats["sessions"], stats["evictions"]), (1, 1))
+
+    def test_idle_sessions_expire_and_are_rehydrated(self):
+        loader = FakeLoader(window=4)
+        loader.conversations["chat"] = messages(6)
+        store = make_store(loader, idle_ttl=60)
+        with mock.patch("src.utils.session_store.time.monotonic", return_value=1000.0):
+            store.put("chat", {"messages": messages(6)})
+        with mock.patch("src.utils.session_store.time.monotonic", return_value=1061.0):
+            self.assertIsNone(store.get("chat"))
+            state = store.load("chat")
+
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(state["messages"], messages(4, start=2))
+        stats = store.stats()
+        self.assertEqual((stats["expirations"], stats["rehydrations"], stats["sessions"]), (1, 1, 1))
+
+    def test_unknown_session_loads_empty(self):
+        store = make_store(FakeLoader(window=4))
+        self.assertEqual(store.load("new")["messages"], [])
+        store.discard("new")
+        self.assertIsNone(store.get("new"))
+
+
+class TrimmedSessionTest(unittest.TestCase):
+    def test_summary_survives_a_trim_and_is_rebased_onto_the_window(self):
+        loader = FakeLoader(window=4)
+        store = make_store(loader)
+        history = messages(10)
+        loader.conversations["chat"] = history
+        # m0..m5 are summarised, m6..m9 sent verbatim
+        store.put("chat", {"messages": history, "message_type": "logical",
+                           "summary": "talked about m0-m5", "summarized_count": 6})
+
+        state = store.load("chat")
+        self.assertEqual([msg["content"] for msg in state["messages"]], ["m6", "m7", "m8", "m9"])
+        self.assertEqual(state["summary"], "talked about m0-m5")
+        self.assertEqual(state["summarized_count"], 0)
+        self.assertEqual(store.stats()["trims"], 1)
+
+    def test_summarised_messages_inside_the_window_stay_summarised(self):
+        loader = FakeLoader(window=6)
+        store = make_store(loader)
+        history = messages(10)
+        loader.conversations["chat"] = history
+        store.put("chat", {"messages": history, "summary": "m0-m7", "summarized_count": 8})
+
+        state = store.load("chat")
+        self.assertEqual(state["messages"][state["summarized_count"]:], history[8:])
+        self.assertEqual(state["summary"], "m0-m7")
+
+
+if __name__ == "__main__":
+    unittest.main()
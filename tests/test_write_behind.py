@@ -0,0 +1,142 @@
+import unittest
+from datetime import datetime, timedelta, UTC
+
+import mongomock
+from pymongo import DeleteMany, UpdateMany
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from src.database.mongo_client import MongoDBClient
+from src.database.write_behind import WriteBehindQueue
+
+
+class FlakyCollection:
+    """mongomock collection applying bulk writes one operation at a time
+
+    fail_at makes the next bulk write stop before the operation at that index,
+    like an ordered bulk write that fails part-way (None: no failure).
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.fail_at = None
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, operations, ordered=True):
+        fail_at, self.fail_at = self.fail_at, None
+        for index, operation in enumerate(operations):
+            if index == fail_at:
+                if index == 0:
+                    raise AutoReconnect("injected failure")
+                raise BulkWriteError({"writeErrors": [{"index": index, "errmsg": "injected failure"}]})
+            if isinstance(operation, DeleteMany):
+                self.collection.delete_many(operation._filter)
+            elif isinstance(operation, UpdateMany):
+                self.collection.update_many(operation._filter, operation._doc, upsert=operation._upsert)
+            else:
+                self.collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+
+def make_client(bucket_size: int = 3) -> MongoDBClient:
+    client = MongoDBClient()
+    db = mongomock.MongoClient().db
+    client.conversations = FlakyCollection(db.conversations)
+    client.messages = FlakyCollection(db.messages)
+    client.bucket_size = bucket_size
+    return client
+
+
+def turn(*contents):
+    roles = ["user", "assistant"]
+    return {
+        "messages": [{"role": roles[i % 2], "content": content} for i, content in enumerate(contents)],
+        "message_type": "logical",
+    }
+
+
+class WriteBehindRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client()
+        self.queue = WriteBehindQueue(self.client, batch_size=100, flush_interval=3600)
+
+    def stored(self, session_id):
+        return [msg["content"] for msg in self.client.load_conversation(session_id)["messages"]]
+
+    def test_failed_header_write_is_retried_without_duplicates(self):
+        self.queue.enqueue(turn("hi", "hello"), "s1")
+        self.client.conversations.fail_at = 0
+        self.assertEqual(self.queue.flush(), 0)
+        self.assertEqual(self.queue.stats()["pending_sessions"], 1)
+
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.stored("s1"), ["hi", "hello"])
+        header = self.client.conversations.find_one({"session_id": "s1"})
+        self.assertEqual(header["message_count"], 2)
+        self.assertEqual(header["stats"]["total"], 2)
+
+        # Later turns land at the right positions, across bucket boundaries
+        self.queue.enqueue(turn("hi", "hello", "more", "answer"), "s1")
+        self.queue.flush()
+        self.assertEqual(self.stored("s1"), ["hi", "hello", "more", "answer"])
+
+    def test_bucket_batch_failing_part_way_is_retried_without_duplicates(self):
+        self.queue.enqueue(turn("a", "b", "c", "d", "e"), "s1")
+        self.client.messages.fail_at = 1
+        self.queue.flush()
+        self.queue.enqueue(turn("a", "b", "c", "d", "e", "f", "g"), "s1")
+        self.queue.flush()
+        self.assertEqual(self.stored("s1"), ["a", "b", "c", "d", "e", "f", "g"])
+        header = self.client.conversations.find_one({"session_id": "s1"})
+        self.assertEqual(header["message_count"], 7)
+        self.assertEqual(header["stats"]["total"], 7)
+
+    def test_sessions_saved_before_a_failed_header_are_not_written_twice(self):
+        self.queue.enqueue(turn("one", "two"), "s1")
+        self.queue.enqueue(turn("three", "four"), "s2")
+        self.client.conversations.fail_at = 1
+        self.queue.flush()
+        self.queue.flush()
+        self.assertEqual(self.stored("s1"), ["one", "two"])
+        self.assertEqual(self.stored("s2"), ["three", "four"])
+        for session_id in ("s1", "s2"):
+            header = self.client.conversations.find_one({"session_id": session_id})
+            self.assertEqual(header["stats"]["total"], 2)
+
+
+class BucketExpiryTest(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client()
+        self.queue = WriteBehindQueue(self.client, batch_size=100, flush_interval=3600)
+
+    def last_activity(self, session_id):
+        buckets = self.client.messages.find({"session_id": session_id}).sort("bucket", 1)
+        return [bucket["last_activity"] for bucket in buckets]
+
+    def test_a_turn_only_stamps_the_buckets_it_writes(self):
+        self.queue.enqueue(turn("a", "b", "c", "d"), "s1")
+        self.queue.flush()
+        earlier = datetime(2020, 1, 1)
+        self.client.messages.update_many({"session_id": "s1"}, {"$set": {"last_activity": earlier}})
+        self.queue.enqueue(turn("a", "b", "c", "d", "e", "f"), "s1")
+        self.queue.flush()
+        stamps = self.last_activity("s1")
+        self.assertEqual(stamps[0], earlier)
+        self.assertGreater(stamps[1], earlier)
+
+    def test_prune_deletes_idle_buckets_of_expired_sessions_only(self):
+        for session_id in ("expired", "live", "recent"):
+            self.queue.enqueue(turn("a", "b", "c", "d"), session_id)
+        self.queue.flush()
+        idle = datetime.now(UTC) - timedelta(hours=2)
+        self.client.messages.update_many({"session_id": {"$ne": "recent"}}, {"$set": {"last_activity": idle}})
+        # Headers expired (as the TTL index would) for one idle and one recently written session
+        self.client.conversations.delete_many({"session_id": {"$in": ["expired", "recent"]}})
+
+        self.assertEqual(self.client.prune_orphan_buckets(idle_seconds=3600), 2)
+        remaining = set(self.client.messages.distinct("session_id"))
+        self.assertEqual(remaining, {"live", "recent"})
+
+
+if __name__ == "__main__":
+    unittest.main()